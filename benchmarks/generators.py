@@ -0,0 +1,59 @@
+"""
+Synthetic PDNs of adjustable size, for benchmarks. Each generator returns the root of a new network.
+"""
+
+from pdnviz import PowerComponent, Supply, Load, DualLoad, LDO, DcDc
+
+
+def ldo_chain(depth: int) -> PowerComponent:
+    """A chain of <depth> LDOs, each with one load"""
+    supply = Supply('Supply', v_out=+5.0 + 0.1*depth)
+    output = supply
+    for n in range(depth):
+        v_in = +5.0 + 0.1*(depth-n)
+        ldo = output.add_sink(LDO(f'LDO {n}', v_in_nom=v_in, v_out=v_in-0.1, i_gnd=1e-6, i_out_max=1, p_diss_max=0.5))
+        ldo.add_sink(Load(f'Load {n}', v_in_nom=v_in-0.1, i_in=1e-3))
+        output = ldo
+    return supply
+
+
+def fan_out(width: int) -> PowerComponent:
+    """A single supply with <width> loads"""
+    supply = Supply('Supply', v_out=+3.3, i_out_max=1e-3*width)
+    for n in range(width):
+        supply.add_sink(Load(f'Load {n}', v_in_min=+3.0, v_in_nom=+3.3, v_in_max=+3.6, i_in=1e-3))
+    return supply
+
+
+def dcdc_farm(count: int, curve_points: int = 10, distinct_curves: int = 5) -> PowerComponent:
+    """A supply with <count> DC/DC converters, each with one load; the converters use <distinct_curves> different efficiency curves"""
+    curves = [{0.01*2**k: 70 + 20*k/curve_points + c for k in range(curve_points)} for c in range(distinct_curves)]
+    supply = Supply('Supply', v_out=+12.0)
+    for n in range(count):
+        dcdc = supply.add_sink(DcDc(f'DC/DC {n}', v_in_min=+9, v_in_nom=+12, v_in_max=+15, v_out=+3.3, eff_pct_over_i_out=curves[n % distinct_curves],
+            i_gnd=1e-4, i_out_max=2, p_diss_max=1, t_j_max=125, r_th_ja=50))
+        dcdc.add_sink(Load(f'Load {n}', v_in_nom=+3.3, i_in=0.01 + 0.001*(n % 100)))
+    return supply
+
+
+def dual_load_mesh(rails: int, loads: int, groups: int) -> PowerComponent:
+    """
+    A supply with <rails> LDOs; each of the <loads> DualLoads is supplied by two neighboring rails, and all components
+    are spread over <groups> groups, so that many connections cross group boundaries.
+    """
+    supply = Supply('Supply', v_out=+5.0, group='Group 0')
+    ldos = [supply.add_sink(LDO(f'LDO {n}', v_in_nom=+5.0, v_out=+3.3, i_out_max=10, group=f'Group {n % groups}')) for n in range(rails)]
+    for n in range(loads):
+        load = DualLoad(f'DualLoad {n}', v_in_1_nom=+3.3, v_in_2_nom=+3.3, i_in_1=1e-3, i_in_2=2e-3, group=f'Group {n % groups}')
+        ldos[n % rails].add_sink(load._inputs[0])
+        ldos[(n+1) % rails].add_sink(load._inputs[1])
+    return supply
+
+
+# name -> (generator, arguments), for the benchmark suite
+NETWORKS = {
+    'ldo_chain': (ldo_chain, dict(depth=200)),
+    'fan_out': (fan_out, dict(width=2000)),
+    'dcdc_farm': (dcdc_farm, dict(count=500)),
+    'dual_load_mesh': (dual_load_mesh, dict(rails=20, loads=1000, groups=8)),
+}
@@ -0,0 +1,63 @@
+"""
+Import-time benchmark: measures how long `import pdnviz` plus a simple check() takes in a fresh interpreter,
+and verifies that no heavy dependency is imported along the way. Exits with a non-zero code on a regression,
+so it can be used in CI or in a pre-commit hook.
+
+    python benchmarks/import_time.py [--max-ms 100] [--runs 7]
+"""
+
+import argparse, json, os, subprocess, sys
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules that must not be loaded unless the functionality that needs them is used
+HEAVY_MODULES = ['numpy', 'scipy', 'graphviz', 'openpyxl']
+
+SCRIPT = '''
+import json, sys, time
+t_start = time.perf_counter()
+import pdnviz
+with pdnviz.Supply('Battery', +9, i_out_max=0.2) as battery:
+    with battery.add_sink(pdnviz.LDO('LDO 3.3V', v_in_nom=+9, v_out=+3.3, i_out_max=0.1)) as ldo:
+        ldo.add_sink(pdnviz.Load('MCU', v_in_nom=+3.3, i_in=10e-3))
+    battery.add_sink(pdnviz.DcDc('Boost', v_in_nom=+9, v_out=+12))
+battery.check()
+t_end = time.perf_counter()
+print(json.dumps({'seconds': t_end - t_start, 'modules': sorted(m for m in sys.modules if '.' not in m)}))
+'''
+
+
+def measure(runs: int) -> "tuple[float,list[str]]":
+    env = dict(os.environ, PYTHONPATH=REPO_DIR + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    best, modules = None, []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', SCRIPT], env=env, check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if best is None or result['seconds'] < best:
+            best = result['seconds']
+        modules = result['modules']
+    return best, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Checks the import time of pdnviz')
+    parser.add_argument('--max-ms', type=float, default=100, help='maximum allowed time for import and check, in ms')
+    parser.add_argument('--runs', type=int, default=7, help='number of runs; the fastest one is reported')
+    args = parser.parse_args()
+
+    seconds, modules = measure(args.runs)
+    heavy = [m for m in HEAVY_MODULES if m in modules]
+    print(f'import pdnviz + check(): {seconds*1e3:.1f} ms (limit: {args.max_ms:.0f} ms)')
+    if len(heavy) > 0:
+        print(f'FAIL: heavy modules were imported: {", ".join(heavy)}')
+        return 1
+    if seconds*1e3 > args.max_ms:
+        print('FAIL: import time limit exceeded')
+        return 1
+    print('OK')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
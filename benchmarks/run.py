@@ -0,0 +1,134 @@
+"""
+Benchmark suite: times the main operations on synthetic networks (see generators.py), records their peak memory, and
+compares both against a stored baseline. Exits with a non-zero code on a regression, so it can be used in CI.
+
+    python -m benchmarks.run                      # compare against benchmarks/baseline.json
+    python -m benchmarks.run --save-baseline      # store the current results as the new baseline
+    python -m benchmarks.run --only fan_out --max-slowdown 1.2
+
+Times are the fastest of several runs; note that the baseline is only meaningful on the machine that recorded it.
+"""
+
+import argparse, gc, json, os, platform, sys, tempfile, time, tracemalloc
+
+from pdnviz import PowerConfig
+from .generators import NETWORKS
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def _spreadsheet(root):
+    from pdnviz import PowerSpreadsheet
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        PowerSpreadsheet(root, grouped=True).save(path)
+    finally:
+        os.remove(path)
+
+
+def _graph(root):
+    from pdnviz import PowerGraph
+    return PowerGraph(root, grouped=True).source
+
+
+OPERATIONS = {
+    'update': lambda root: root.update(),
+    'check': lambda root: root.check(),
+    'hierarchy': lambda root: root.get_hierarchy(grouped=True),
+    'spreadsheet': _spreadsheet,
+    'graph_dot': _graph,
+}
+
+
+def measure(network: str, operation: str, repeat: int) -> "dict[str,float]":
+    generator, kwargs = NETWORKS[network]
+    root = generator(**kwargs)
+    function = OPERATIONS[operation]
+    function(root) # warm-up, e.g. for lazy imports and cached topologies
+
+    seconds = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function(root)
+        elapsed = time.perf_counter() - start
+        if seconds is None or elapsed < seconds:
+            seconds = elapsed
+
+    # separate run, as tracing slows everything down
+    tracemalloc.start()
+    try:
+        function(root)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return dict(seconds=seconds, peak_bytes=peak_bytes)
+
+
+def compare(results: "dict[str,dict]", baseline: "dict[str,dict]", max_slowdown: float, max_memory_growth: float, min_seconds: float, min_bytes: int) -> "list[str]":
+    """Returns a description of each regression"""
+    regressions = []
+    for case, result in results.items():
+        reference = baseline.get(case)
+        if reference is None:
+            continue
+        if result['seconds'] > min_seconds and result['seconds'] > reference['seconds'] * max_slowdown:
+            regressions.append(f'{case}: {result["seconds"]*1e3:.1f} ms, baseline {reference["seconds"]*1e3:.1f} ms')
+        if result['peak_bytes'] > min_bytes and result['peak_bytes'] > reference['peak_bytes'] * max_memory_growth:
+            regressions.append(f'{case}: peak memory {result["peak_bytes"]/2**20:.1f} MiB, baseline {reference["peak_bytes"]/2**20:.1f} MiB')
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description='Runs the pdnviz benchmarks')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline file')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--only', action='append', default=[], help='only run cases that contain this text (e.g. a network or an operation)')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timed runs per case; the fastest one is reported')
+    parser.add_argument('--max-slowdown', type=float, default=1.5, help='max. allowed time, relative to the baseline')
+    parser.add_argument('--max-memory-growth', type=float, default=1.25, help='max. allowed peak memory, relative to the baseline')
+    parser.add_argument('--min-ms', type=float, default=5, help='time regressions of cases faster than this are ignored, as they are mostly noise')
+    parser.add_argument('--min-kib', type=float, default=64, help='memory regressions of cases that need less than this are ignored')
+    args = parser.parse_args()
+
+    PowerConfig.set_warning_handler(lambda element, msg: None)
+
+    results = {}
+    for network in NETWORKS:
+        for operation in OPERATIONS:
+            case = f'{network}/{operation}'
+            if len(args.only) > 0 and not any(text in case for text in args.only):
+                continue
+            results[case] = measure(network, operation, args.repeat)
+            print(f'{case:32} {results[case]["seconds"]*1e3:10.1f} ms {results[case]["peak_bytes"]/2**20:10.2f} MiB', flush=True)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as file:
+                baseline = json.load(file)['results']
+        baseline.update(results)
+        with open(args.baseline, 'w') as file:
+            json.dump(dict(python=platform.python_version(), machine=platform.machine(), results=baseline), file, indent=4, sort_keys=True)
+            file.write('\n')
+        print(f'Baseline saved to {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f'No baseline found at {args.baseline}; use --save-baseline to create one')
+        return 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)['results']
+    regressions = compare(results, baseline, args.max_slowdown, args.max_memory_growth, args.min_ms*1e-3, args.min_kib*1024)
+    for regression in regressions:
+        print(f'FAIL: {regression}')
+    if len(regressions) > 0:
+        return 1
+    print('OK')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,5 +3,40 @@ from .power_component import PowerComponent, PowerInput, PowerOutput
 from .power_sources import Supply, MultiSupply, DualSupply
 from .power_sinks import Load, MultiLoad, DualLoad
 from .power_converters import LDO, DcDc
-from .graph import PowerGraph
-from .spreadsheet import PowerSpreadsheet
+
+
+# These pull in heavy dependencies (numpy, graphviz, openpyxl), so they are only imported when they are used
+_LAZY_IMPORTS = {
+    'BatchJob': '.batch',
+    'run_batch': '.batch',
+    'CompiledNetwork': '.compiled',
+    'NetworkState': '.compiled',
+    'EfficiencyCurve': '.efficiency',
+    'EfficiencySurface': '.efficiency',
+    'evaluate_profile': '.timeseries',
+    'evaluate_profile_csv': '.timeseries',
+    'Instrumentation': '.instrumentation',
+    'IntervalState': '.interval',
+    'MonteCarlo': '.montecarlo',
+    'PowerGraph': '.graph',
+    'ProfileEvaluator': '.timeseries',
+    'PowerSpreadsheet': '.spreadsheet',
+    'Snapshot': '.snapshot',
+    'Tolerance': '.montecarlo',
+    'Tracer': '.tracing',
+    'WorstCase': '.worstcase',
+    'WorstCaseResult': '.worstcase',
+}
+
+
+__all__ = ['PowerConfig', 'PowerBaseElement', 'PowerComponent', 'PowerInput', 'PowerOutput',
+    'Supply', 'MultiSupply', 'DualSupply', 'Load', 'MultiLoad', 'DualLoad', 'LDO', 'DcDc', *_LAZY_IMPORTS]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,253 @@
+"""
+Evaluates and exports many PDNs (e.g. all variants of a board) and load scenarios in a pool of processes.
+
+    python -m pdnviz.batch boards.variant_a:build boards.variant_b:build --output ./output --graph
+    python -m pdnviz.batch --jobs boards.release:JOBS --output ./output --processes 8
+
+Each positional argument is a function (given as module:function) that builds a PDN and returns its root component;
+with --jobs, a list of BatchJob objects (or a function returning one) is loaded instead.
+"""
+
+from .power_base import PowerConfig
+from .power_component import PowerComponent
+from .systools import ensure_directories
+from dataclasses import dataclass, field
+import argparse, concurrent.futures, importlib, os, sys, time, traceback
+
+
+
+@dataclass
+class BatchJob:
+    """
+    One PDN to evaluate and export. <build> is a function without arguments that returns the root component; it is
+    called in a worker process, so it must be defined at module level, or be given as 'module:function'.
+    To evaluate scenarios, <loads> are the names of the loads (or full names of inputs) whose input current is varied, and <currents> contains
+    one row per scenario, with one column per load; all scenarios go into one spreadsheet.
+    """
+    name: str
+    build: "callable[[],PowerComponent]|str"
+    loads: "list[str]|None" = None
+    currents: "list[list[float]]|None" = None
+    scenario_names: "list[str]|None" = None
+    grouped: bool = False
+    spreadsheet: bool = True
+    graph: bool = False
+    graph_format: str = 'pdf'
+
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a BatchJob; <ok> means that all limits are met (in all scenarios)"""
+    name: str
+    ok: bool = False
+    files: "list[str]" = field(default_factory=list)
+    warnings: "list[str]" = field(default_factory=list)
+    error: "str|None" = None
+    seconds: float = 0.0
+
+
+
+class BatchReport:
+    """The results of all jobs of a batch, in the order in which the jobs were given"""
+
+
+    def __init__(self, results: "list[BatchResult]", seconds: float):
+        self.results, self.seconds = results, seconds
+
+
+    @property
+    def failed(self) -> "list[BatchResult]":
+        """Jobs that could not be evaluated or exported"""
+        return [r for r in self.results if r.error is not None]
+
+
+    @property
+    def violated(self) -> "list[BatchResult]":
+        """Jobs that were exported, but where limits are exceeded"""
+        return [r for r in self.results if r.error is None and not r.ok]
+
+
+    def summary(self) -> str:
+        lines = [f'{len(self.results)} jobs in {self.seconds:.1f} s: {len(self.results)-len(self.failed)-len(self.violated)} OK, ' +
+            f'{len(self.violated)} with exceeded limits, {len(self.failed)} failed']
+        for result in self.violated:
+            lines.append(f'{result.name}: limits exceeded')
+            lines.extend(f'    {warning}' for warning in result.warnings)
+        for result in self.failed:
+            lines.append(f'{result.name}: failed')
+            lines.extend(f'    {line}' for line in result.error.rstrip().splitlines())
+        return '\n'.join(lines)
+
+
+
+def run_batch(jobs: "list[BatchJob]", output_dir: str, processes: "int|None" = None, t_ambient: "float|None" = None,
+              progress: "callable[[int,int,BatchResult],None]|None" = None) -> "BatchReport":
+    """
+    Runs all jobs in a pool of <processes> worker processes (default: one per CPU), and writes the files to <output_dir>.
+    The jobs use the PowerConfig settings of the calling process, except for the ambient temperature if <t_ambient> is given;
+    changes that a job makes to PowerConfig are undone after it. With processes=0, the jobs run one after another in the calling process.
+    <progress> is called after each job with the number of finished jobs, the total number of jobs, and the result.
+    Errors of individual jobs do not stop the batch; they are reported in the returned BatchReport.
+    """
+
+    config = _get_config()
+    if t_ambient is not None:
+        config['t_ambient'] = t_ambient
+    names = [job.name for job in jobs]
+    if len(names) != len(set(names)):
+        raise ValueError('The names of all jobs must be unique, as they are used as file names')
+    ensure_directories(output_dir)
+
+    start = time.perf_counter()
+    results = [None] * len(jobs) # type: list[BatchResult]
+    if processes == 0:
+        config_before = _get_config(private=True)
+        try:
+            _init_worker(config)
+            for n, job in enumerate(jobs):
+                results[n] = _run_job(job, output_dir)
+                if progress is not None:
+                    progress(n+1, len(jobs), results[n])
+        finally:
+            _set_config(config_before)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(config,)) as pool:
+            futures = {pool.submit(_run_job, job, output_dir): n for n, job in enumerate(jobs)}
+            for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                n = futures[future]
+                try:
+                    results[n] = future.result()
+                except Exception:
+                    # e.g. the job could not be sent to the worker, or the worker died
+                    results[n] = BatchResult(jobs[n].name, error=traceback.format_exc())
+                if progress is not None:
+                    progress(done, len(jobs), results[n])
+    return BatchReport(results, time.perf_counter() - start)
+
+
+def _get_config(private: bool = False) -> dict:
+    """Returns the settings of PowerConfig; the private ones (e.g. the warning handler) are usually not picklable"""
+    return {name: value for name, value in vars(PowerConfig).items()
+        if not name.startswith('__') and not isinstance(value, staticmethod) and (private or not name.startswith('_'))}
+
+
+def _set_config(config: dict):
+    for name, value in config.items():
+        setattr(PowerConfig, name, value)
+
+
+def _init_worker(config: dict):
+    _set_config(config)
+
+
+def _resolve(spec: "str|object") -> object:
+    """Resolves 'module:attribute' into the attribute; anything else is returned as it is"""
+    if not isinstance(spec, str):
+        return spec
+    module, _, attribute = spec.partition(':')
+    if attribute == '':
+        raise ValueError(f'Expected <module:attribute>, got <{spec}>')
+    return getattr(importlib.import_module(module), attribute)
+
+
+def _file_name(name: str) -> str:
+    return ''.join(c if c.isalnum() or c in ' +-_,.' else '_' for c in name)
+
+
+def _run_job(job: BatchJob, output_dir: str) -> BatchResult:
+
+    from .spreadsheet import PowerSpreadsheet
+
+    start = time.perf_counter()
+    result = BatchResult(job.name)
+    # each job starts with the settings of the batch, whatever the previous job changed
+    config_before = _get_config(private=True)
+    PowerConfig.set_warning_handler(lambda element, msg: result.warnings.append(f'{element}: {msg}'))
+    try:
+        root = _resolve(job.build)()
+        if not isinstance(root, PowerComponent):
+            raise TypeError(f'Expected the build function to return a PowerComponent, got {type(root).__name__}')
+        path = os.path.join(output_dir, _file_name(job.name))
+
+        if job.graph:
+            from .graph import PowerGraph
+            # the graph shows the nominal load currents, so it is rendered before any scenario is applied to the objects
+            PowerGraph(root, grouped=job.grouped).save(path + '.' + job.graph_format)
+            result.files.append(path + '.' + job.graph_format)
+
+        if job.loads is None:
+            root.check()
+            # (check() only tells whether the root component itself is ok)
+            topology = root.get_topology()
+            result.ok = all(element.ok() for element in topology.components + topology.inputs + topology.outputs)
+            if job.spreadsheet:
+                PowerSpreadsheet(root, title=job.name, grouped=job.grouped).save(path + '.xlsx')
+                result.files.append(path + '.xlsx')
+        else:
+            network = root.compile()
+            state = network.evaluate_scenarios(job.loads, job.currents)
+            result.ok = all(network.scenarios_ok(state).tolist())
+            if job.spreadsheet:
+                PowerSpreadsheet(network, title=job.name, grouped=job.grouped, scenarios=state, scenario_names=job.scenario_names).save(path + '.xlsx')
+                result.files.append(path + '.xlsx')
+            if not result.ok:
+                # the warnings of the objects only describe the last scenario, so list the failing scenarios instead
+                failing = [n for n, ok in enumerate(network.scenarios_ok(state).tolist()) if not ok]
+                names = job.scenario_names or [f'Scenario {n+1}' for n in range(len(job.currents))]
+                result.warnings = [f'{names[n]}: limits exceeded' for n in failing]
+    except Exception:
+        result.error = traceback.format_exc()
+    finally:
+        _set_config(config_before)
+        result.seconds = time.perf_counter() - start
+    return result
+
+
+def _load_jobs(args: argparse.Namespace) -> "list[BatchJob]":
+    jobs = []
+    for spec in args.jobs:
+        loaded = _resolve(spec)
+        if callable(loaded):
+            loaded = loaded()
+        jobs.extend(loaded)
+    for spec in args.build:
+        jobs.append(BatchJob(spec, spec,
+            grouped=args.grouped, spreadsheet=not args.no_spreadsheet, graph=args.graph, graph_format=args.format))
+    return jobs
+
+
+def main(argv: "list[str]|None" = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pdnviz.batch', description='Evaluates and exports many PDNs in parallel.')
+    parser.add_argument('build', nargs='*', help='function that builds a PDN, as module:function')
+    parser.add_argument('--jobs', action='append', default=[], help='list of BatchJob objects (or a function returning one), as module:attribute')
+    parser.add_argument('--output', default='.', help='output directory')
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes; 0 to run serially (default: one per CPU)')
+    parser.add_argument('--t-ambient', type=float, default=None, help='ambient temperature in °C')
+    parser.add_argument('--grouped', action='store_true', help='one sheet per group')
+    parser.add_argument('--graph', action='store_true', help='also render a graph of each PDN')
+    parser.add_argument('--format', default='pdf', help='file format of the graphs')
+    parser.add_argument('--no-spreadsheet', action='store_true', help='do not generate spreadsheets')
+    parser.add_argument('--strict', action='store_true', help='also fail if any limit is exceeded')
+    args = parser.parse_args(argv)
+
+    # allow the build functions to live next to the current directory, as with "python -m"
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    jobs = _load_jobs(args)
+    if len(jobs) < 1:
+        parser.error('no jobs given')
+
+    def report_progress(done: int, total: int, result: BatchResult):
+        status = 'FAILED' if result.error is not None else ('OK' if result.ok else 'limits exceeded')
+        print(f'[{done}/{total}] {result.name}: {status} ({result.seconds:.2f} s)', flush=True)
+
+    report = run_batch(jobs, args.output, processes=args.processes, t_ambient=args.t_ambient, progress=report_progress)
+    print(report.summary())
+    if len(report.failed) > 0 or (args.strict and len(report.violated) > 0):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
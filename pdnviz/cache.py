@@ -0,0 +1,117 @@
+from .power_base import PowerConfig
+import hashlib, os, shutil, tempfile
+
+
+
+class DiskCache:
+    """
+    Content-addressed files in a directory. Entries are keyed by a hash of everything that determines their content,
+    so they never need to be invalidated; when the directory grows beyond <max_bytes>, the least recently used
+    entries are deleted. Use get_cache() to get the cache for a kind of result, as configured in PowerConfig.
+    """
+
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory, self.max_bytes = directory, max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+
+    def __repr__(self) -> str:
+        return f'<DiskCache({self.directory})>'
+
+
+    @staticmethod
+    def key(*parts: "str|bytes") -> str:
+        """Returns a key for the given parts (e.g. the source of a graph, and the output format)"""
+        hash = hashlib.sha256()
+        for part in parts:
+            if isinstance(part, str):
+                part = part.encode('utf-8')
+            # prefix each part with its length, so that the boundaries between the parts are unambiguous
+            hash.update(len(part).to_bytes(8, 'little'))
+            hash.update(part)
+        return hash.hexdigest()
+
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+
+    def get(self, key: str, suffix: str = '') -> "str|None":
+        """Returns the path of the cached file, or None if there is no such entry"""
+        path = self._path(key, suffix)
+        try:
+            os.utime(path) # mark as recently used
+        except FileNotFoundError:
+            return None
+        return path
+
+
+    def put(self, key: str, source_path: str, suffix: str = '') -> str:
+        """Stores a copy of the given file, and returns the path of the entry"""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(source_path, temp_path)
+            # atomic, so that concurrent processes never see partially written entries
+            os.replace(temp_path, self._path(key, suffix))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self._evict()
+        return self._path(key, suffix)
+
+
+    def put_bytes(self, key: str, data: bytes, suffix: str = '') -> str:
+        """Stores the given data, and returns the path of the entry"""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, self._path(key, suffix))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self._evict()
+        return self._path(key, suffix)
+
+
+    def _evict(self):
+        entries, total = [], 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.endswith('.tmp'):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass # already evicted by another process
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+    def clear(self):
+        """Deletes all entries"""
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file():
+                    os.remove(entry.path)
+
+
+
+def get_cache(name: str) -> "DiskCache|None":
+    """Returns the cache for the given kind of result, or None if caching is disabled in PowerConfig"""
+    if PowerConfig.cache_max_bytes <= 0:
+        return None
+    directory = PowerConfig.cache_dir
+    if directory is None:
+        directory = os.path.join(tempfile.gettempdir(), 'pdnviz-cache')
+    return DiskCache(os.path.join(directory, name), PowerConfig.cache_max_bytes)
@@ -0,0 +1,625 @@
+from .power_base import PowerConfig, PowerBaseElement
+from .power_component import PowerComponent, PowerInput, PowerOutput
+from .power_converters import LDO, DcDc, MAX_ITERATIONS
+from .efficiency import EfficiencyCurve, EfficiencySurface
+from dataclasses import dataclass, fields
+import numpy as np
+import heapq
+
+
+
+KIND_GENERIC, KIND_LDO, KIND_DCDC = 0, 1, 2
+
+
+
+@dataclass
+class NetworkState:
+    """
+    The calculated values of a compiled network. Every array is indexed by the position of the
+    element in CompiledNetwork.inputs, .outputs or .components, respectively (last axis). When
+    evaluating multiple scenarios, the arrays have an additional leading axis for the scenario.
+    """
+
+    """Actual input voltage of each input"""
+    v_in: "np.ndarray"
+
+    """Current drawn by each input"""
+    i_in: "np.ndarray"
+
+    """Power drawn by each input"""
+    p_in: "np.ndarray"
+
+    """Current provided by each output"""
+    i_out: "np.ndarray"
+
+    """Power provided by each output"""
+    p_out: "np.ndarray"
+
+    """Total input power of each component"""
+    comp_p_in: "np.ndarray"
+
+    """Total output power of each component"""
+    comp_p_out: "np.ndarray"
+
+    """Dissipated power of each component"""
+    p_diss: "np.ndarray"
+
+    """Junction temperature of each component"""
+    t_j: "np.ndarray"
+
+    """Voltage drop of each LDO (indexed like CompiledNetwork.ldos)"""
+    v_drop: "np.ndarray"
+
+    """Efficiency of each DC/DC converter in % (indexed like CompiledNetwork.dcdcs)"""
+    eff_pct: "np.ndarray"
+
+
+    def scenario(self, index: int) -> "NetworkState":
+        """Returns the values of a single scenario of a batch evaluation"""
+        return NetworkState(*[getattr(self, f.name)[index] for f in fields(self)])
+
+
+
+@dataclass
+class _Level:
+    outputs: "np.ndarray"
+    sink_index: "np.ndarray"
+    sink_ptr: "np.ndarray"
+    ldos: "np.ndarray"
+    dcdcs: "np.ndarray"
+
+
+
+class CompiledNetwork:
+    """
+    A flat, topologically sorted representation of a network. All inputs, outputs and components
+    are stored in NumPy arrays with CSR-style adjacency, so that the whole network is evaluated with
+    a few vectorized passes (one per hierarchy level) instead of recursively walking the objects.
+
+    The structure is fixed when compiling; if you add sinks afterwards, compile again. Parameters
+    (currents, voltages, limits etc.) are read from the objects on every update(). Alternatively,
+    change load currents and output voltages via set_i_in() and set_v_out(), and call
+    update(incremental=True), which only re-evaluates the affected components.
+    """
+
+
+    def __init__(self, root: "PowerComponent"):
+        self.root = root
+        self._compile_structure()
+        self.state = None # type: NetworkState
+        self._dirty = set() # type: set[int]
+
+
+    def __repr__(self) -> str:
+        return f'<CompiledNetwork({self.root.name}, {len(self.components)} components)>'
+
+
+    def _compile_structure(self):
+
+        # find all components that are reachable from the root
+        components, known = [self.root], {id(self.root)}
+        edges = {} # type: dict[int,list[PowerComponent]]
+        for component in components:
+            downstream = edges.setdefault(id(component), [])
+            for output in component._outputs:
+                for input in output._sinks:
+                    downstream.append(input.parent)
+                    if id(input.parent) not in known:
+                        known.add(id(input.parent))
+                        components.append(input.parent)
+
+        # topological sort (Kahn), and assign each component the length of the longest path from the root
+        in_degree = { id(c): 0 for c in components }
+        for downstream in edges.values():
+            for c in downstream:
+                in_degree[id(c)] += 1
+        level = { id(self.root): 0 }
+        ordered, queue = [], [c for c in components if in_degree[id(c)] == 0]
+        while len(queue) > 0:
+            component = queue.pop()
+            ordered.append(component)
+            for c in edges[id(component)]:
+                level[id(c)] = max(level.get(id(c), 0), level[id(component)] + 1)
+                in_degree[id(c)] -= 1
+                if in_degree[id(c)] == 0:
+                    queue.append(c)
+        if len(ordered) != len(components):
+            raise RuntimeError(f'The network of <{self.root.name}> contains a loop')
+
+        self.components = ordered # type: list[PowerComponent]
+        self.inputs = [i for c in ordered for i in c._inputs] # type: list[PowerInput]
+        self.outputs = [o for c in ordered for o in c._outputs] # type: list[PowerOutput]
+        self._comp_index = comp_index = { id(c): n for n,c in enumerate(ordered) }
+        self._in_index = in_index = { id(i): n for n,i in enumerate(self.inputs) }
+        self._out_index = out_index = { id(o): n for n,o in enumerate(self.outputs) }
+
+        for component in ordered:
+            component._verify_names()
+            for input in component._inputs:
+                if input.source is None:
+                    raise RuntimeError(f'Input <{input.full_name()}> is not connected')
+
+        self.comp_level = np.array([level[id(c)] for c in ordered], dtype=np.int64)
+        self.comp_in_ptr = np.cumsum([0] + [len(c._inputs) for c in ordered], dtype=np.int64)
+        self.comp_out_ptr = np.cumsum([0] + [len(c._outputs) for c in ordered], dtype=np.int64)
+        self.in_comp = np.array([comp_index[id(i.parent)] for i in self.inputs], dtype=np.int64)
+        self.out_comp = np.array([comp_index[id(o.parent)] for o in self.outputs], dtype=np.int64)
+        # inputs that are driven from outside of the network have no source index (-1)
+        self.in_src = np.array([out_index.get(id(i.source), -1) for i in self.inputs], dtype=np.int64)
+        self.out_sink_ptr = np.cumsum([0] + [len(o._sinks) for o in self.outputs], dtype=np.int64)
+        self.out_sink_index = np.array([in_index[id(i)] for o in self.outputs for i in o._sinks], dtype=np.int64)
+
+        self.comp_kind = np.array([self._classify(c) for c in ordered], dtype=np.int8)
+        self.ldos = np.flatnonzero(self.comp_kind == KIND_LDO)
+        self.dcdcs = np.flatnonzero(self.comp_kind == KIND_DCDC)
+        # inputs whose current is a parameter (i.e. of loads), not calculated from the outputs
+        self._load_inputs = np.flatnonzero(self.comp_kind[self.in_comp] == KIND_GENERIC).tolist()
+        # LDOs and DC/DC converters have exactly one input and one output
+        self.ldo_in, self.ldo_out = self.comp_in_ptr[self.ldos], self.comp_out_ptr[self.ldos]
+        self.dcdc_in, self.dcdc_out = self.comp_in_ptr[self.dcdcs], self.comp_out_ptr[self.dcdcs]
+        self._converter_pos = np.full(len(ordered), -1, dtype=np.int64)
+        self._converter_pos[self.ldos] = np.arange(len(self.ldos))
+        self._converter_pos[self.dcdcs] = np.arange(len(self.dcdcs))
+
+        self._levels = [] # type: list[_Level]
+        for lvl in range(int(self.comp_level.max()), -1, -1):
+            outputs = np.flatnonzero(self.comp_level[self.out_comp] == lvl)
+            counts = self.out_sink_ptr[outputs+1] - self.out_sink_ptr[outputs]
+            sink_index = np.concatenate([[]] + [self.out_sink_index[self.out_sink_ptr[o]:self.out_sink_ptr[o+1]] for o in outputs]).astype(np.int64)
+            sink_ptr = np.cumsum(np.concatenate([[0], counts]), dtype=np.int64)
+            ldos = np.flatnonzero(self.comp_level[self.ldos] == lvl)
+            dcdcs = np.flatnonzero(self.comp_level[self.dcdcs] == lvl)
+            self._levels.append(_Level(outputs, sink_index, sink_ptr, ldos, dcdcs))
+
+
+    @staticmethod
+    def _classify(component: "PowerComponent") -> int:
+        """Determines how a component is evaluated; raises an error for components that customize the evaluation"""
+        if isinstance(component, LDO):
+            kind, base = KIND_LDO, LDO
+        elif isinstance(component, DcDc):
+            kind, base = KIND_DCDC, DcDc
+        else:
+            kind, base = KIND_GENERIC, PowerComponent
+        for method in ['update', '_pre_update', '_update_outputs', '_update_inputs', '_update_power', '_update_thermal', '_check']:
+            if getattr(type(component), method) is not getattr(base, method):
+                raise RuntimeError(f'Component <{component.name}> overrides {method}(), and cannot be compiled')
+        if kind != KIND_GENERIC and (len(component._inputs) != 1 or len(component._outputs) != 1):
+            raise RuntimeError(f'Component <{component.name}> does not have a single unique input and output')
+        return kind
+
+
+    def _gather(self):
+        """Reads all parameters from the objects"""
+
+        def values(items, attr):
+            return np.array([np.nan if getattr(x, attr) is None else getattr(x, attr) for x in items], dtype=np.float64)
+
+        def nominal(input: "PowerInput"):
+            try:
+                return float(input.v_in_nom)
+            except (TypeError, ValueError):
+                return np.nan
+
+        self.v_out = values(self.outputs, 'v_out')
+        self.i_out_max = values(self.outputs, 'i_out_max')
+        self.out_p_out_max = values(self.outputs, 'p_out_max')
+
+        self.i_in_fixed = values(self.inputs, 'i_in')
+        self.v_ext = np.array([i.source.v_out if src < 0 else np.nan for i,src in zip(self.inputs, self.in_src)], dtype=np.float64)
+        self.v_in_min = values(self.inputs, 'v_in_min')
+        self.v_in_max = values(self.inputs, 'v_in_max')
+        self.v_in_nom = np.array([nominal(i) for i in self.inputs], dtype=np.float64)
+        self.has_v_in_nom = np.array([i.v_in_nom is not None for i in self.inputs], dtype=bool)
+        self.r_series = np.nan_to_num(values(self.inputs, 'r_series'))
+        if np.any(self.r_series < 0):
+            raise ValueError('Series resistances must not be negative')
+        self._has_series = bool(np.any(self.r_series > 0))
+
+        self.p_out_max = values(self.components, 'p_out_max')
+        self.p_diss_max = values(self.components, 'p_diss_max')
+        self.t_j_max = values(self.components, 't_j_max')
+        self.r_th_ja = values(self.components, 'r_th_ja')
+
+        ldos = [self.components[c] for c in self.ldos]
+        self.ldo_i_gnd = values(ldos, 'i_gnd')
+        self.ldo_v_drop_min = values(ldos, 'v_drop_min')
+
+        dcdcs = [self.components[c] for c in self.dcdcs]
+        self.dcdc_i_gnd = values(dcdcs, 'i_gnd')
+        self.dcdc_curves = [c.get_efficiency_curve() for c in dcdcs] # type: list[EfficiencyCurve|EfficiencySurface|None]
+
+        # converters that share a curve (or surface) are evaluated together
+        self._dcdc_curve_groups = [] # type: list[list[tuple[EfficiencyCurve|EfficiencySurface,np.ndarray]]]
+        for level in self._levels:
+            groups = {} # type: dict[EfficiencyCurve|EfficiencySurface,list[int]]
+            for k in level.dcdcs:
+                if self.dcdc_curves[k] is not None:
+                    groups.setdefault(self.dcdc_curves[k], []).append(k)
+            self._dcdc_curve_groups.append([(curve, np.array(ks, dtype=np.int64)) for curve, ks in groups.items()])
+        self._has_surfaces = any(isinstance(curve, EfficiencySurface) for curve in self.dcdc_curves)
+
+
+    def _source_voltage(self, n: int) -> float:
+        """Returns the output voltage that drives input <n>"""
+        return float(self.v_out[self.in_src[n]] if self.in_src[n] >= 0 else self.v_ext[n])
+
+
+    def _source_voltages(self, v_out: "np.ndarray") -> "np.ndarray":
+        """Returns the output voltage that drives each input"""
+        if len(self.outputs) == 0:
+            return self.v_ext.copy()
+        return np.where(self.in_src >= 0, v_out[..., np.maximum(self.in_src, 0)], self.v_ext)
+
+
+    def _solve(self, i_in_fixed: "np.ndarray|None" = None, v_out: "np.ndarray|None" = None, ldo_i_gnd: "np.ndarray|None" = None,
+            dcdc_i_gnd: "np.ndarray|None" = None, eff_scale: "np.ndarray|None" = None, r_th_ja: "np.ndarray|None" = None) -> "NetworkState":
+        """
+        Evaluates the network, starting with the deepest level. The parameters default to the values that were read from the
+        objects; any leading axes of the given parameters are treated as independent scenarios. <eff_scale> is a factor for
+        the efficiency of each DC/DC converter (the result is limited to 100%).
+        """
+
+        if i_in_fixed is None: i_in_fixed = self.i_in_fixed
+        if v_out is None: v_out = self.v_out
+        if ldo_i_gnd is None: ldo_i_gnd = self.ldo_i_gnd
+        if dcdc_i_gnd is None: dcdc_i_gnd = self.dcdc_i_gnd
+        if r_th_ja is None: r_th_ja = self.r_th_ja
+        batch = np.broadcast_shapes(*[np.shape(p)[:-1] for p in [i_in_fixed, v_out, ldo_i_gnd, dcdc_i_gnd, r_th_ja]
+            + ([] if eff_scale is None else [eff_scale])])
+        ldo_i_gnd = np.broadcast_to(ldo_i_gnd, batch + (len(self.ldos),))
+        dcdc_i_gnd = np.broadcast_to(dcdc_i_gnd, batch + (len(self.dcdcs),))
+
+        v_out = np.broadcast_to(v_out, batch + (len(self.outputs),))
+        i_in = np.broadcast_to(i_in_fixed, batch + (len(self.inputs),)).copy()
+        i_out = np.zeros(batch + (len(self.outputs),))
+        v_src = np.broadcast_to(self._source_voltages(v_out), batch + (len(self.inputs),))
+        v_in = v_src.copy()
+        v_drop = np.full(batch + (len(self.ldos),), np.nan)
+        eff_pct = np.full(batch + (len(self.dcdcs),), 100.0)
+        # converters regulate their output voltage, so the drop across each connection only depends on the current of its
+        #   sink, and has a closed-form solution (see _series_voltage()) once the level below is evaluated
+        series = self.r_series > 0
+        if self._has_series:
+            v_in = np.where(series, v_src - self.r_series * i_in, v_src)
+
+        for level, curve_groups in zip(self._levels, self._dcdc_curve_groups):
+
+            i_out[..., level.outputs] = _segment_sum(i_in, level.sink_index, level.sink_ptr)
+
+            ldo_in, ldo_out = self.ldo_in[level.ldos], self.ldo_out[level.ldos]
+            i_in[..., ldo_in] = i_out[..., ldo_out] + ldo_i_gnd[..., level.ldos]
+            v_drop[..., level.ldos] = self.v_in_nom[ldo_in] - v_out[..., ldo_out]
+
+            dcdc_in, dcdc_out = self.dcdc_in[level.dcdcs], self.dcdc_out[level.dcdcs]
+            v_in[..., dcdc_in] = v_src[..., dcdc_in]
+            # efficiency surfaces depend on the input voltage, which in turn depends on the efficiency across a series
+            #   resistance; this fixed-point iteration converges quickly, as the efficiency only changes slowly with it
+            iterations = MAX_ITERATIONS if self._has_series and self._has_surfaces else 1
+            for _ in range(iterations):
+                for curve, ks in curve_groups:
+                    if isinstance(curve, EfficiencySurface):
+                        eff_pct[..., ks] = curve(i_out[..., self.dcdc_out[ks]], v_in[..., self.dcdc_in[ks]])
+                    else:
+                        eff_pct[..., ks] = curve(i_out[..., self.dcdc_out[ks]])
+                if eff_scale is not None:
+                    eff_pct[..., level.dcdcs] = np.minimum(eff_pct[..., level.dcdcs] * eff_scale[..., level.dcdcs], 100.0)
+                p_conv = np.abs(v_out[..., dcdc_out] * i_out[..., dcdc_out]) / (eff_pct[..., level.dcdcs] / 100)
+                if not self._has_series:
+                    break
+                v_prev = v_in[..., dcdc_in]
+                v_in[..., dcdc_in] = np.where(series[dcdc_in], _series_voltage(v_src[..., dcdc_in], self.r_series[dcdc_in],
+                    dcdc_i_gnd[..., level.dcdcs], p_conv), v_src[..., dcdc_in])
+                if np.allclose(v_in[..., dcdc_in], v_prev, rtol=1e-12, atol=0, equal_nan=True):
+                    break
+            i_in[..., dcdc_in] = dcdc_i_gnd[..., level.dcdcs] + p_conv / v_in[..., dcdc_in]
+
+            if self._has_series:
+                converter_in = np.concatenate([ldo_in, dcdc_in])
+                v_in[..., converter_in] = np.where(series[converter_in],
+                    v_src[..., converter_in] - self.r_series[converter_in] * i_in[..., converter_in], v_src[..., converter_in])
+
+        p_in = np.abs(v_in * i_in)
+        p_out = np.abs(v_out * i_out)
+        comp_p_in = _segment_sum(p_in, np.arange(len(self.inputs)), self.comp_in_ptr)
+        comp_p_out = _segment_sum(p_out, np.arange(len(self.outputs)), self.comp_out_ptr)
+        p_diss = comp_p_in - comp_p_out
+        t_j = PowerConfig.t_ambient + np.where(np.isnan(r_th_ja), 0, p_diss * r_th_ja)
+
+        return NetworkState(v_in, i_in, p_in, i_out, p_out, comp_p_in, comp_p_out, p_diss, t_j, v_drop, eff_pct)
+
+
+    def _violations(self, state: "NetworkState") -> "list[tuple[list[PowerBaseElement],str,np.ndarray,bool]]":
+        """Returns all checked limits as (elements, warning, mask of violating elements, severity)"""
+
+        nom_only = np.isnan(self.v_in_min) & np.isnan(self.v_in_max) & self.has_v_in_nom
+        drop_exceeded = np.zeros(state.p_diss.shape, dtype=bool)
+        drop_exceeded[..., self.ldos] = self.v_in_nom[self.ldo_in] < self.ldo_v_drop_min
+        # the nominal voltage applies to the source, i.e. before the drop across the series resistance
+        series = self.r_series > 0
+        nom_violated = state.v_in != self.v_in_nom
+        if self._has_series:
+            # (the state may have been evaluated with other output voltages; where the input voltage collapsed, use the gathered ones)
+            v_src = np.where(np.isnan(state.v_in), self._source_voltages(self.v_out), state.v_in + self.r_series * state.i_in)
+            nom_violated = np.where(series, ~np.isclose(v_src, self.v_in_nom, rtol=1e-9, atol=0), nom_violated)
+
+        return [
+            (self.inputs, 'Min. input voltage exceeded', state.v_in < self.v_in_min, False),
+            (self.inputs, 'Max. input voltage exceeded', state.v_in > self.v_in_max, False),
+            (self.inputs, 'Nom. input voltage violated', nom_only & nom_violated, True),
+            (self.inputs, 'Input voltage collapses across the series resistance', series & np.isnan(state.v_in), True),
+            (self.outputs, 'Max. output power exceeded', state.p_out > self.out_p_out_max, False),
+            (self.outputs, 'Max. output current exceeded', state.i_out > self.i_out_max, False),
+            (self.components, 'Max. output power exceeded', state.comp_p_out > self.p_out_max, False),
+            (self.components, 'Max. dissipated power exceeded', state.p_diss > self.p_diss_max, False),
+            (self.components, 'Max. junction temperature exceeded', ~np.isnan(self.r_th_ja) & (state.t_j > self.t_j_max), False),
+            (self.components, 'Min. voltage drop exceeded', drop_exceeded, False),
+        ]
+
+
+    def _write_back(self, state: "NetworkState"):
+        """Stores the calculated values in the objects"""
+        for input, v, i, p in zip(self.inputs, state.v_in.tolist(), state.i_in.tolist(), state.p_in.tolist()):
+            input.v_in_actual, input.i_in, input.p_in_calc = v, i, p
+        for output, i, p in zip(self.outputs, state.i_out.tolist(), state.p_out.tolist()):
+            output.i_out_calc, output.p_out_calc = i, p
+        for component, p_in, p_out, p_diss, t_j in zip(self.components, state.comp_p_in.tolist(), state.comp_p_out.tolist(), state.p_diss.tolist(), state.t_j.tolist()):
+            component.p_in_calc, component.p_out_calc, component.p_diss_calc, component.t_j_calc = p_in, p_out, p_diss, t_j
+        for c, v_drop in zip(self.ldos, state.v_drop.tolist()):
+            self.components[c].v_drop_calc = v_drop
+        for c, eff_pct in zip(self.dcdcs, state.eff_pct.tolist()):
+            self.components[c].eff_pct_calc = eff_pct
+
+
+    def _write_warnings(self, state: "NetworkState", raise_severe_errors: bool = False):
+        """Replaces the warnings of all elements by the limits that are violated in the given state"""
+        for element in self.components + self.inputs + self.outputs:
+            element.clear_warnings()
+        for elements, msg, mask, severe in self._violations(state):
+            for n in np.flatnonzero(mask):
+                elements[n]._warn(msg, severe and raise_severe_errors)
+
+
+    def find(self, name: str) -> "PowerComponent|PowerInput":
+        """Returns the component with the given name, or else the input with the given full name (i.e. "component / input")"""
+        topology = self.root.get_topology()
+        if name in topology.components_by_name:
+            return topology.components_by_name[name]
+        return topology.find_input(name)
+
+
+    def index(self, element: "PowerComponent|PowerInput|PowerOutput|str") -> int:
+        """Returns the position of a component, input or output (or of a component or input given by its name) in the arrays of this network"""
+        if isinstance(element, str):
+            element = self.find(element)
+        if isinstance(element, PowerComponent):
+            return self._comp_index[id(element)]
+        elif isinstance(element, PowerInput):
+            return self._in_index[id(element)]
+        elif isinstance(element, PowerOutput):
+            return self._out_index[id(element)]
+        raise TypeError()
+
+
+    def update(self, incremental: bool = False) -> "NetworkState":
+        """
+        Reads the parameters from the objects, evaluates the network, and stores the results in the objects.
+        With <incremental>, only the changes that were made via set_i_in() and set_v_out() since the last update
+        are evaluated, i.e. only the components upstream of the changed elements, plus the sinks of changed outputs.
+        """
+        if incremental and self.state is not None:
+            self._update_dirty()
+            return self.state
+        self._dirty.clear()
+        self._gather()
+        self.state = self._solve()
+        self._write_back(self.state)
+        return self.state
+
+
+    def set_i_in(self, load: "PowerComponent|PowerInput|str", i_in: float):
+        """
+        Changes the current of a load (or of an input of a multi-input load), and marks the affected components for update(incremental=True).
+        Like setting PowerInput.i_in, this changes the parameter of the object, i.e. also for later updates of the object model.
+        """
+        if isinstance(load, str):
+            load = self.find(load)
+        input = load._get_input() if isinstance(load, PowerComponent) else load
+        n = self.index(input)
+        if self.comp_kind[self.in_comp[n]] != KIND_GENERIC:
+            raise ValueError(f'The input current of <{input.full_name()}> is calculated, and cannot be changed')
+        input.i_in = i_in
+        if self.state is None:
+            return
+        self.i_in_fixed[n] = self.state.i_in[n] = i_in
+        self._mark_input_dirty(n)
+
+
+    def set_v_out(self, output: "PowerComponent|PowerOutput|str", v_out: float):
+        """Changes the voltage of an output, and marks the affected components for update(incremental=True)"""
+        if isinstance(output, str):
+            output = self.find(output)
+        output = output._get_output() if isinstance(output, PowerComponent) else output
+        o = self.index(output)
+        output.v_out = v_out
+        if self.state is None:
+            return
+        self.v_out[o] = v_out
+        self._dirty.add(int(self.out_comp[o]))
+        for n in self.out_sink_index[self.out_sink_ptr[o]:self.out_sink_ptr[o+1]]:
+            self.state.v_in[n] = v_out
+            self._dirty.add(int(self.in_comp[n]))
+
+
+    def _mark_input_dirty(self, n: int):
+        """The current of input <n> has changed; its component and the driving component must be updated"""
+        self._dirty.add(int(self.in_comp[n]))
+        if self.in_src[n] >= 0:
+            self._dirty.add(int(self.out_comp[self.in_src[n]]))
+
+
+    def _update_dirty(self):
+        """Re-evaluates all dirty components, deepest level first, and propagates changed input currents upstream"""
+        state = self.state
+        queue = [(-int(self.comp_level[c]), c) for c in self._dirty]
+        heapq.heapify(queue)
+        done = set()
+        while len(queue) > 0:
+            _, c = heapq.heappop(queue)
+            if c in done:
+                continue
+            done.add(c)
+            component = self.components[c]
+
+            for o in range(self.comp_out_ptr[c], self.comp_out_ptr[c+1]):
+                i_out = float(np.sum(state.i_in[self.out_sink_index[self.out_sink_ptr[o]:self.out_sink_ptr[o+1]]]))
+                state.i_out[o], state.p_out[o] = i_out, abs(self.v_out[o] * i_out)
+                self.outputs[o].i_out_calc, self.outputs[o].p_out_calc = i_out, float(state.p_out[o])
+
+            kind, k = self.comp_kind[c], self._converter_pos[c]
+            n = self.comp_in_ptr[c]
+            if kind == KIND_LDO:
+                o = self.ldo_out[k]
+                i_in = state.i_out[o] + self.ldo_i_gnd[k]
+                state.v_drop[k] = component.v_drop_calc = float(self.v_in_nom[n] - self.v_out[o])
+            elif kind == KIND_DCDC:
+                o = self.dcdc_out[k]
+                curve = self.dcdc_curves[k]
+                surface = isinstance(curve, EfficiencySurface)
+                v_in = self._source_voltage(n)
+                # (see _solve())
+                for _ in range(MAX_ITERATIONS if surface and self.r_series[n] > 0 else 1):
+                    if curve is None:
+                        state.eff_pct[k] = 100.0
+                    else:
+                        state.eff_pct[k] = float(curve(state.i_out[o], v_in) if surface else curve(state.i_out[o]))
+                    p_conv = state.p_out[o] / (state.eff_pct[k] / 100)
+                    if self.r_series[n] == 0:
+                        break
+                    v_in, v_prev = float(_series_voltage(self._source_voltage(n), self.r_series[n], self.dcdc_i_gnd[k], p_conv)), v_in
+                    if not abs(v_in - v_prev) > 1e-12 * abs(v_in):
+                        break
+                component.eff_pct_calc = float(state.eff_pct[k])
+                i_in = self.dcdc_i_gnd[k] + p_conv / v_in
+            if kind != KIND_GENERIC and i_in != state.i_in[n]:
+                state.i_in[n] = i_in
+                if self.in_src[n] >= 0:
+                    p = int(self.out_comp[self.in_src[n]])
+                    heapq.heappush(queue, (-int(self.comp_level[p]), p))
+
+            for n in range(self.comp_in_ptr[c], self.comp_in_ptr[c+1]):
+                if self.r_series[n] > 0:
+                    state.v_in[n] = self._source_voltage(n) - self.r_series[n] * state.i_in[n]
+                state.p_in[n] = abs(state.v_in[n] * state.i_in[n])
+                input = self.inputs[n]
+                input.v_in_actual, input.i_in, input.p_in_calc = float(state.v_in[n]), float(state.i_in[n]), float(state.p_in[n])
+
+            p_in = float(np.sum(state.p_in[self.comp_in_ptr[c]:self.comp_in_ptr[c+1]]))
+            p_out = float(np.sum(state.p_out[self.comp_out_ptr[c]:self.comp_out_ptr[c+1]]))
+            p_diss = p_in - p_out
+            t_j = PowerConfig.t_ambient + (0 if np.isnan(self.r_th_ja[c]) else p_diss * self.r_th_ja[c])
+            state.comp_p_in[c], state.comp_p_out[c], state.p_diss[c], state.t_j[c] = p_in, p_out, p_diss, t_j
+            component.p_in_calc, component.p_out_calc, component.p_diss_calc, component.t_j_calc = p_in, p_out, p_diss, float(t_j)
+
+        self._dirty.clear()
+
+
+    def check(self, raise_severe_errors: bool = False) -> bool:
+        """Like PowerComponent.check(), but for the whole compiled network at once; returns True if no element has any warnings"""
+        self._write_warnings(self.update(), raise_severe_errors)
+        return all(element.ok() for element in self.components + self.inputs + self.outputs)
+
+
+    def evaluate_scenarios(self, loads: "list[PowerComponent|PowerInput|str]", i_in: "np.ndarray") -> "NetworkState":
+        """
+        Evaluates many operating points at once, without modifying the objects.
+        <loads> are the loads (or inputs of multi-input loads, or their names) whose currents vary, and <i_in> is a matrix
+        of their currents, with one row per scenario and one column per load. All other parameters are
+        read from the objects. Each array of the returned state has one row per scenario.
+        """
+        self._gather()
+        i_in = np.asarray(i_in, dtype=np.float64)
+        if i_in.ndim != 2 or i_in.shape[1] != len(loads):
+            raise ValueError(f'Expected a matrix of currents with {len(loads)} columns')
+        columns = self._load_columns(loads)
+        i_in_fixed = np.repeat(self.i_in_fixed[np.newaxis,:], len(i_in), axis=0)
+        i_in_fixed[:, columns] = i_in
+        return self._solve(i_in_fixed=i_in_fixed)
+
+
+    def _load_columns(self, loads: "list[PowerComponent|PowerInput|str]") -> "list[int]":
+        """Returns the positions of the inputs of the given loads, whose currents are to be varied"""
+        loads = [self.find(l) if isinstance(l, str) else l for l in loads]
+        columns = [self.index(l._get_input() if isinstance(l, PowerComponent) else l) for l in loads]
+        fixed = self.comp_kind[self.in_comp[columns]] == KIND_GENERIC
+        if not np.all(fixed):
+            raise ValueError(f'The input current of <{loads[np.flatnonzero(~fixed)[0]]}> is calculated, and cannot be varied')
+        return columns
+
+
+    def evaluate_intervals(self, i_in: "dict|None" = None, v_out: "dict|None" = None, i_gnd: "dict|None" = None,
+            r_th_ja: "dict|None" = None) -> "IntervalState":
+        """
+        Evaluates the network once with interval arithmetic, without modifying the objects, and returns bounds that
+        enclose every calculated value (see IntervalState). Each of <i_in> (of loads), <v_out> (of outputs), <i_gnd> (of
+        converters) and <r_th_ja> (of components) maps elements (or their names) to a range (minimum, maximum); all other
+        parameters are read from the objects. The resulting input voltage ranges are checked against v_in_min/v_in_max.
+        """
+        from .interval import evaluate_intervals
+        return evaluate_intervals(self, i_in, v_out, i_gnd, r_th_ja)
+
+
+    def scenarios_ok(self, state: "NetworkState") -> "np.ndarray":
+        """Returns, for each scenario of the given state, whether all limits are met"""
+        result = np.ones(state.p_diss.shape[:-1], dtype=bool)
+        for _, _, mask, _ in self._violations(state):
+            result &= ~np.any(mask, axis=-1)
+        return result
+
+
+    def apply(self, state: "NetworkState", scenario: "int|None" = None, raise_severe_errors: bool = False) -> bool:
+        """
+        Stores the calculated values and warnings of the given state (or of one of its scenarios) in the objects, e.g. in order
+        to create a spreadsheet of that scenario; returns True if no element has any warnings.
+        The currents of loads are parameters, but they are overwritten with the currents of the state as well, so that the
+        objects describe that state; later updates of the object model use these currents. Use get_load_currents() and
+        set_load_currents() to keep the original ones.
+        """
+        if scenario is not None:
+            state = state.scenario(scenario)
+        self._write_back(state)
+        self._write_warnings(state, raise_severe_errors)
+        return all(element.ok() for element in self.components + self.inputs + self.outputs)
+
+
+    def get_load_currents(self) -> "list[float]":
+        """Returns the currents of all loads (i.e. the inputs whose current is a parameter, not calculated), e.g. before apply()"""
+        return [self.inputs[n].i_in for n in self._load_inputs]
+
+
+    def set_load_currents(self, i_in: "list[float]"):
+        """Sets the currents of all loads, as returned by get_load_currents(), e.g. in order to undo apply()"""
+        for n, i in zip(self._load_inputs, i_in):
+            self.inputs[n].i_in = i
+
+
+
+def _series_voltage(v_src: "np.ndarray", r_series: "np.ndarray", i_gnd: "np.ndarray", p_conv: "np.ndarray") -> "np.ndarray":
+    """
+    Returns the input voltage of converters that draw <i_gnd> plus the current to convert the power <p_conv> through a
+    series resistance, i.e. the root of v_in^2 - (v_src - r_series*i_gnd)*v_in + r_series*p_conv = 0 with the larger
+    magnitude (the stable operating point); NaN where there is none, i.e. where the input voltage collapses
+    """
+    b = v_src - r_series * i_gnd
+    with np.errstate(invalid='ignore'):
+        return (b + np.copysign(np.sqrt(b*b - 4 * r_series * p_conv), b)) / 2
+
+
+def _segment_sum(values: "np.ndarray", index: "np.ndarray", ptr: "np.ndarray") -> "np.ndarray":
+    """Returns the sums of values[..., index[ptr[k]:ptr[k+1]]] for every segment k, along the last axis"""
+    result = np.zeros(values.shape[:-1] + (len(ptr)-1,))
+    if len(index) == 0:
+        return result
+    non_empty = ptr[1:] > ptr[:-1]
+    result[..., non_empty] = np.add.reduceat(values[..., index], ptr[:-1][non_empty], axis=-1)
+    return result
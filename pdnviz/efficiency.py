@@ -0,0 +1,189 @@
+from .power_base import PowerConfig
+import itertools
+import numpy as np
+
+
+
+class EfficiencyCurve:
+    """
+    Efficiency (in %) over output current, linearly interpolated between the given points, and linearly
+    extrapolated beyond them. Use EfficiencyCurve.get() to obtain curves; identical curves (e.g. of all
+    instances of the same part) are compiled only once, and shared.
+    """
+
+    _cache = {} # type: dict[tuple,EfficiencyCurve]
+
+
+    def __init__(self, i_out: "list[float]", eff_pct: "list[float]"):
+        if len(i_out) != len(eff_pct) or len(i_out) < 1:
+            raise ValueError('Expected the same number of currents and efficiencies, and at least one point')
+        order = np.argsort(i_out, kind='stable')
+        self.i_out = np.asarray(i_out, dtype=np.float64)[order]
+        self.eff_pct = np.asarray(eff_pct, dtype=np.float64)[order]
+        if len(self.i_out) > 1:
+            self._slopes = np.diff(self.eff_pct) / np.diff(self.i_out)
+        else:
+            self._slopes = np.zeros(1)
+        self.i_out.flags.writeable = self.eff_pct.flags.writeable = self._slopes.flags.writeable = False
+
+
+    def __repr__(self) -> str:
+        return f'<EfficiencyCurve({len(self.i_out)} points)>'
+
+
+    @staticmethod
+    def get(eff_pct_over_i_out: "dict[float,float]") -> "EfficiencyCurve|None":
+        """Returns the (shared) curve for the given points, or None if there are no points"""
+        if len(eff_pct_over_i_out) == 0:
+            return None
+        key = tuple(sorted(eff_pct_over_i_out.items()))
+        curve = EfficiencyCurve._cache.get(key)
+        if curve is None:
+            curve = EfficiencyCurve([i for i,_ in key], [e for _,e in key])
+            EfficiencyCurve._cache[key] = curve
+        return curve
+
+
+    def __call__(self, i_out: "float|np.ndarray") -> "np.ndarray":
+        """Returns the efficiency in % at the given output current(s)"""
+        i_out = np.asarray(i_out, dtype=np.float64)
+        segment = np.clip(np.searchsorted(self.i_out, i_out, side='right') - 1, 0, len(self._slopes) - 1)
+        return self.eff_pct[segment] + (i_out - self.i_out[segment]) * self._slopes[segment]
+
+
+
+class EfficiencySurface:
+    """
+    Efficiency (in %) over output current and input voltage, and optionally ambient temperature, given on a grid. It is
+    multilinearly interpolated within each cell of the grid, and linearly extrapolated beyond it (like EfficiencyCurve).
+    Use EfficiencySurface.get(), .from_curves() or .load() to obtain surfaces; identical grids (e.g. of all instances
+    of the same part) are compiled only once, and shared.
+    """
+
+    _cache = {} # type: dict[tuple,EfficiencySurface]
+    _files = {} # type: dict[tuple[str,int],EfficiencySurface]
+
+
+    def __init__(self, i_out: "list[float]", v_in: "list[float]", eff_pct: "np.ndarray", t_ambient: "list[float]|None" = None):
+        axes = [i_out, v_in] + ([] if t_ambient is None else [t_ambient])
+        axes = [np.asarray(axis, dtype=np.float64) for axis in axes]
+        eff_pct = np.asarray(eff_pct, dtype=np.float64)
+        if eff_pct.shape != tuple(len(axis) for axis in axes) or min(eff_pct.shape) < 1:
+            raise ValueError(f'Expected efficiencies of shape {tuple(len(axis) for axis in axes)}, with at least one point per axis')
+        for dim, axis in enumerate(axes):
+            order = np.argsort(axis, kind='stable')
+            if np.any(np.diff(axis[order]) == 0):
+                raise ValueError('The points of each axis must be unique')
+            axes[dim], eff_pct = axis[order], np.take(eff_pct, order, axis=dim)
+        self.axes = tuple(axes) # type: tuple[np.ndarray,...]
+        self.eff_pct = eff_pct
+        for array in self.axes + (self.eff_pct,):
+            array.flags.writeable = False
+
+
+    def __repr__(self) -> str:
+        return f'<EfficiencySurface({" x ".join(str(len(axis)) for axis in self.axes)} points)>'
+
+
+    @property
+    def i_out(self) -> "np.ndarray":
+        return self.axes[0]
+
+
+    @property
+    def v_in(self) -> "np.ndarray":
+        return self.axes[1]
+
+
+    @property
+    def t_ambient(self) -> "np.ndarray|None":
+        return self.axes[2] if len(self.axes) > 2 else None
+
+
+    @staticmethod
+    def get(i_out: "list[float]", v_in: "list[float]", eff_pct: "np.ndarray", t_ambient: "list[float]|None" = None) -> "EfficiencySurface":
+        """
+        Returns the (shared) surface for the given grid; <eff_pct> has one row per output current and one column per input
+        voltage (and, with <t_ambient>, a third axis for the ambient temperature)
+        """
+        surface = EfficiencySurface(i_out, v_in, eff_pct, t_ambient)
+        return EfficiencySurface._cache.setdefault(surface.key(), surface)
+
+
+    def key(self) -> tuple:
+        """Returns a hashable representation of the grid"""
+        return (tuple(tuple(axis.tolist()) for axis in self.axes), tuple(self.eff_pct.ravel().tolist()))
+
+
+    @staticmethod
+    def from_curves(eff_pct_over_i_out_by_v_in: "dict[float,dict[float,float]]") -> "EfficiencySurface":
+        """
+        Returns the (shared) surface for efficiency curves over output current at several input voltages (e.g. as given in
+        a datasheet), as {v_in: {i_out: eff_pct}}. The curves do not need to share their currents; each one is evaluated
+        at the currents of all curves.
+        """
+        if len(eff_pct_over_i_out_by_v_in) == 0:
+            raise ValueError('Expected at least one curve')
+        v_in = sorted(eff_pct_over_i_out_by_v_in)
+        curves = [EfficiencyCurve.get(eff_pct_over_i_out_by_v_in[v]) for v in v_in]
+        if any(curve is None for curve in curves):
+            raise ValueError('Expected at least one point per curve')
+        i_out = np.unique(np.concatenate([curve.i_out for curve in curves]))
+        return EfficiencySurface.get(i_out, v_in, np.stack([curve(i_out) for curve in curves], axis=1))
+
+
+    @staticmethod
+    def load(path: str, delimiter: str = ',') -> "EfficiencySurface":
+        """
+        Returns the (shared) surface from a CSV file; each file is only read once, unless it was modified. The first line
+        holds the column names "i_out", "v_in", "eff_pct" and optionally "t_ambient"; each following line is one point,
+        and the points must form a complete grid (in any order).
+        """
+        import os
+        key = (os.path.abspath(path), os.stat(path).st_mtime_ns)
+        if key not in EfficiencySurface._files:
+            with open(path, newline='') as file:
+                header = [name.strip() for name in file.readline().rstrip('\r\n').split(delimiter)]
+                values = np.loadtxt(file, delimiter=delimiter, ndmin=2, dtype=np.float64)
+            names = ['i_out', 'v_in', 'eff_pct'] + (['t_ambient'] if 't_ambient' in header else [])
+            missing = [name for name in names if name not in header]
+            if len(missing) > 0:
+                raise ValueError(f'The file has no column "{missing[0]}"')
+            columns = { name: values[:, header.index(name)] for name in names }
+            axes = [np.unique(columns[name]) for name in names if name != 'eff_pct']
+            positions = tuple(np.searchsorted(axis, columns[name]) for axis, name in zip(axes, [n for n in names if n != 'eff_pct']))
+            eff_pct = np.full(tuple(len(axis) for axis in axes), np.nan)
+            eff_pct[positions] = columns['eff_pct']
+            if np.any(np.isnan(eff_pct)) or len(values) != eff_pct.size:
+                raise ValueError(f'The points in "{path}" do not form a complete grid')
+            EfficiencySurface._files[key] = EfficiencySurface.get(*axes[:2], eff_pct, axes[2] if len(axes) > 2 else None)
+        return EfficiencySurface._files[key]
+
+
+    def __call__(self, i_out: "float|np.ndarray", v_in: "float|np.ndarray", t_ambient: "float|np.ndarray|None" = None) -> "np.ndarray":
+        """
+        Returns the efficiency in % at the given output current(s) and input voltage(s), and ambient temperature(s)
+        (default: PowerConfig.t_ambient; ignored if the surface has no temperature axis); all arguments are broadcast
+        """
+        coordinates = [i_out, v_in]
+        if len(self.axes) > 2:
+            coordinates.append(PowerConfig.t_ambient if t_ambient is None else t_ambient)
+        coordinates = np.broadcast_arrays(*[np.asarray(x, dtype=np.float64) for x in coordinates])
+        # the lower point of the cell and the fraction within it, along each axis; a single point spans a cell of its own
+        cells = []
+        for axis, x in zip(self.axes, coordinates):
+            if len(axis) == 1:
+                cells.append((np.zeros(x.shape, dtype=np.int64), np.zeros(x.shape), 0))
+                continue
+            lower = np.clip(np.searchsorted(axis, x, side='right') - 1, 0, len(axis) - 2)
+            cells.append((lower, (x - axis[lower]) / (axis[lower+1] - axis[lower]), 1))
+        result = np.zeros(coordinates[0].shape)
+        for corner in itertools.product([0, 1], repeat=len(self.axes)):
+            if any(upper > step for upper, (_, _, step) in zip(corner, cells)):
+                continue
+            weight = np.ones(coordinates[0].shape)
+            for upper, (_, fraction, step) in zip(corner, cells):
+                if step > 0:
+                    weight = weight * (fraction if upper else 1 - fraction)
+            result = result + weight * self.eff_pct[tuple(lower + upper for upper, (lower, _, _) in zip(corner, cells))]
+        return result
@@ -1,47 +1,44 @@
 from .power_base import *
 from .power_component import PowerComponent
-from .systools import get_tempfile_path, ensure_directories
+from .systools import get_tempfile_path, ensure_directories, open_file
 from .formatting import si_prefixed
-from graphviz import Digraph
+from .cache import DiskCache, get_cache
+from .hooks import module_imported
+import os, shutil
 
 
 
 class PowerGraph:
 
 
-    def __init__(self, root_component: "PowerComponent", grouped: bool = False, dissipation: bool = False, engine: str = None):
+    def __init__(self, root_component: "PowerComponent", grouped: bool = False, dissipation: bool = False, engine: str = None, cache: "bool|None" = None):
+        """
+        Creates a graph of the network below <root_component>. With <cache> (default: PowerConfig.cache_results), the
+        calculated values are loaded from the result cache if possible (see PowerComponent.check()).
+        """
         
         if engine is None: engine = 'dot'
         
         self.root, self.groups, self.dissipation, self.engine = root_component, grouped, dissipation, engine
+        self._graph = None # type: Source
 
-        self._rendered_components = []
-        self._component_clusters = {}
-        self._pdiss_start_nodes = {}
-        self._pdiss_end_nodes = {}
-        self._input_nodes = {}
-        self._output_nodes = {}
-        for i_c,component in enumerate(root_component.get_all_components()):
-            self._component_clusters[component] = f'cluster_Component{i_c}'
-            self._pdiss_start_nodes[component] = f'node_PDiss{i_c}Start'
-            self._pdiss_end_nodes[component] = f'node_PDiss{i_c}End'
-            for i_i,input in enumerate(component._inputs):
-                self._input_nodes[input] = f'node_Component{i_c}Input{i_i}'
-            for i_o,output in enumerate(component._outputs):
-                self._output_nodes[output] = f'node_Component{i_c}Output{i_o}'
+        root_component._update_cached(cache)
+        self.source = self._generate()
 
-        self._group_clusters = {}
-        for i_g,group in enumerate(root_component.get_all_groups()):
-            self._group_clusters[group] = f'cluster_Group{i_g}'
-        
-        root_component.update()
-        self._generate()
+
+    @property
+    def graph(self) -> "Source":
+        """The graph as a graphviz object"""
+        if self._graph is None:
+            from graphviz import Source
+            self._graph = Source(self.source, engine=self.engine)
+        return self._graph
 
     
     def save(self, path: str, makedirs: bool = True, view: bool = False):
         if makedirs:
             ensure_directories(path, is_filename=True)
-        self.graph.render(filename=path+'.gv', outfile=path, engine=self.engine, view=view, cleanup=True)
+        self._render(path, view)
     
 
     def save_dot(self, path, makedirs: bool = True):
@@ -52,71 +49,107 @@ class PowerGraph:
     
     def view(self, format: str = 'pdf') -> str:
         path = get_tempfile_path()
-        dotfile = path + '.gv'
         outfile = path + '.' + format
-        self.graph.render(filename=dotfile, outfile=outfile, engine=self.engine, view=True, cleanup=True)
+        self._render(outfile, True)
         return outfile
 
-    
-    def _component(self, graph: Digraph, component: PowerComponent):
 
-        if component in self._rendered_components:
+    def _render(self, outfile: str, view: bool):
+        """Renders the graph, or copies the file from the render cache if the same graph was rendered before"""
+
+        format = os.path.splitext(outfile)[1][1:].lower()
+        cache = get_cache('render') if format != '' else None
+        if cache is None:
+            self.graph.render(filename=outfile+'.gv', outfile=outfile, engine=self.engine, view=view, cleanup=True)
             return
-        self._rendered_components.append(component)
-
-        def make_comp(parent):
-            
-            with parent.subgraph(name=self._component_clusters[component]) as component_cluster:
-                
-                component_cluster.attr(shape='box', style='rounded,bold,filled', fillcolor='LightSteelBlue')
-                component_cluster.attr(label=component.name)
-
-                for input in component._inputs:
-                    component_cluster.attr('node', shape='box', style='filled', fillcolor='BurlyWood')
-                    component_cluster.node(self._input_nodes[input], label=input.name)
-                for output in component._outputs:
-                    component_cluster.attr('node', shape='box', style='filled', fillcolor='DarkOrange')
-                    component_cluster.node(self._output_nodes[output], label=output.name)
-        
-                if self.dissipation and component.p_diss_calc > 0:
-                    
-                    component_cluster.attr('node', shape='point')
-                    component_cluster.node(self._pdiss_start_nodes[component])
-                    
-                    graph.attr('node', shape='point')
-                    graph.node(self._pdiss_end_nodes[component])
-                    
-                    graph.attr('edge', label='')
-                    graph.attr('edge', headlabel=f'{si_prefixed(component.p_diss_calc,"W")}')
-                    graph.edge(self._pdiss_start_nodes[component], self._pdiss_end_nodes[component], ltail=self._component_clusters[component])
 
-        if self.groups:
-            with graph.subgraph(name=self._group_clusters[component.group]) as group_cluster:
-                group_cluster.attr(shape='box', style='dashed')
-                group_cluster.attr(label=component.group)
-                make_comp(group_cluster)
+        key = DiskCache.key(self.source, self.engine, format)
+        cached = cache.get(key, '.'+format)
+        if cached is not None:
+            shutil.copyfile(cached, outfile)
         else:
-            make_comp(graph)
-
+            self.graph.render(filename=outfile+'.gv', outfile=outfile, engine=self.engine, cleanup=True)
+            cache.put(key, outfile, '.'+format)
+        if view:
+            open_file(outfile)
 
-    def _recurse(self, graph: Digraph, component: PowerComponent):
-
-        self._component(graph, component)
-
-        for output in component._outputs:
-            for input in output._sinks:
-                subcomponent = input.parent
-
-                self._recurse(graph, subcomponent)
-                
-                graph.attr('edge', label=f'{si_prefixed(input.i_in,"A")}\n{si_prefixed(input.p_in_calc,"W")}')
-                graph.attr('edge', headlabel=si_prefixed(input.v_in_actual,'V'))
-                graph.edge(self._output_nodes[output], self._input_nodes[input])
     
+    @staticmethod
+    def _quote(text: str) -> str:
+        return '"' + text.replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+    def _generate(self) -> str:
+        """
+        Returns the DOT source. Every component and connection is visited exactly once (multi-input components are
+        only entered from their first source), so the run time is linear in the size of the network.
+        """
+
+        topology = self.root.get_topology()
+        q = self._quote
+        lines = ['digraph pdn_graph {', '\tedge [fontsize=8]']
+        group_lines = {group: [] for group in topology.groups} # type: dict[str,list[str]]
+        indent = '\t\t' if self.groups else '\t'
+
+        def add_component(component: PowerComponent):
+            i_c = topology.component_index[component]
+            body = group_lines[component.group] if self.groups else lines
+            body.append(f'{indent}subgraph cluster_Component{i_c} {{')
+            body.append(f'{indent}\tfillcolor=LightSteelBlue shape=box style="rounded,bold,filled"')
+            body.append(f'{indent}\tlabel={q(component.name)}')
+            for i_i,input in enumerate(component._inputs):
+                body.append(f'{indent}\tnode_Component{i_c}Input{i_i} [label={q(input.name)} fillcolor=BurlyWood shape=box style=filled]')
+            for i_o,output in enumerate(component._outputs):
+                body.append(f'{indent}\tnode_Component{i_c}Output{i_o} [label={q(output.name)} fillcolor=DarkOrange shape=box style=filled]')
+            if self.dissipation and component.p_diss_calc > 0:
+                body.append(f'{indent}\tnode_PDiss{i_c}Start [shape=point]')
+                lines.append(f'\tnode_PDiss{i_c}End [shape=point]')
+                lines.append(f'\tnode_PDiss{i_c}Start -> node_PDiss{i_c}End [label="" headlabel={q(si_prefixed(component.p_diss_calc,"W"))} ltail=cluster_Component{i_c}]')
+            body.append(f'{indent}}}')
+
+        def connections(component: PowerComponent):
+            i_c = topology.component_index[component]
+            for i_o,output in enumerate(component._outputs):
+                for input in output._sinks:
+                    yield f'node_Component{i_c}Output{i_o}', input
+
+        def add_edge(output_node: str, input: "PowerInput"):
+            i_c = topology.component_index[input.parent]
+            label = f'{si_prefixed(input.i_in,"A")}\n{si_prefixed(input.p_in_calc,"W")}'
+            lines.append(f'\t{output_node} -> node_Component{i_c}Input{input.parent._inputs.index(input)} [label={q(label)} headlabel={q(si_prefixed(input.v_in_actual,"V"))}]')
+
+        # depth-first, so that the statements appear in the same order as the components in the network; each edge
+        #   is added after the sub-tree that it leads to
+        visited = {self.root}
+        add_component(self.root)
+        stack = [(connections(self.root), None)]
+        while len(stack) > 0:
+            downstream, edge = stack[-1]
+            connection = next(downstream, None)
+            if connection is None:
+                stack.pop()
+                if edge is not None:
+                    add_edge(*edge)
+            elif connection[1].parent in visited:
+                add_edge(*connection)
+            else:
+                visited.add(connection[1].parent)
+                add_component(connection[1].parent)
+                stack.append((connections(connection[1].parent), connection))
+
+        if self.groups:
+            for i_g,group in enumerate(topology.groups):
+                if len(group_lines[group]) < 1:
+                    continue
+                lines.append(f'\tsubgraph cluster_Group{i_g} {{')
+                lines.append('\t\tshape=box style=dashed')
+                if group is not None:
+                    lines.append(f'\t\tlabel={q(group)}')
+                lines.extend(group_lines[group])
+                lines.append('\t}')
+        lines.append('}')
+        return '\n'.join(lines) + '\n'
 
-    def _generate(self):
 
-        self.graph = Digraph('pdn_graph')
-        self.graph.attr('edge', fontsize='8')
 
-        self._recurse(self.graph, self.root)
+module_imported(__name__) # installs the hooks of an instrumentation that was started before this import
@@ -0,0 +1,83 @@
+"""
+Wraps methods of classes while a tool (e.g. Instrumentation or Tracer) is active. Several tools may wrap the same
+method at the same time, and each one can remove its wrappers at any time, in any order: the wrappers of each method
+are kept in a list, and the method is rebuilt from the original function whenever that list changes.
+"""
+
+import sys
+
+
+
+# (class, method) -> (original function, [(hooks, wrapper)]), for every method that is currently wrapped
+_wrapped = {} # type: dict[tuple[type,str],tuple[object,list[tuple[MethodHooks,callable]]]]
+
+# module -> [(hooks, class name, method, wrapper)], for modules that were not imported yet when the wrappers were added
+_pending = {} # type: dict[str,list[tuple[MethodHooks,str,str,callable]]]
+
+
+
+def subclasses(cls: type) -> "list[type]":
+    """Returns the class and all of its (direct and indirect) subclasses"""
+    result, pending = [], [cls]
+    while len(pending) > 0:
+        cls = pending.pop()
+        if cls not in result:
+            result.append(cls)
+            pending.extend(cls.__subclasses__())
+    return result
+
+
+def module_imported(module: str):
+    """Installs the wrappers that are pending for the given module; modules with hooked classes call this when they are imported"""
+    for hooks, cls, method, wrapper in _pending.pop(module, []):
+        hooks.wrap(getattr(sys.modules[module], cls), method, wrapper)
+
+
+def _install(cls: type, method: str):
+    original, wrappers = _wrapped[(cls, method)]
+    function = original
+    for _, wrapper in wrappers:
+        function = wrapper(function)
+    setattr(cls, method, function)
+    if len(wrappers) == 0:
+        del _wrapped[(cls, method)]
+
+
+
+class MethodHooks:
+    """The wrappers of one tool"""
+
+
+    def __init__(self):
+        self._methods = [] # type: list[tuple[type,str]]
+
+
+    def wrap(self, cls: type, method: str, wrapper: "callable[[callable],callable]"):
+        """Wraps a method that <cls> defines itself; wrapper(function) returns the replacement of the function"""
+        if (cls, method) not in _wrapped:
+            _wrapped[(cls, method)] = (cls.__dict__[method], [])
+        _wrapped[(cls, method)][1].append((self, wrapper))
+        self._methods.append((cls, method))
+        _install(cls, method)
+
+
+    def wrap_when_imported(self, module: str, cls: str, method: str, wrapper: "callable[[callable],callable]"):
+        """Like wrap(), for a class of a module that is only imported when it is used (e.g. because of its dependencies)"""
+        if module in sys.modules:
+            self.wrap(getattr(sys.modules[module], cls), method, wrapper)
+        else:
+            _pending.setdefault(module, []).append((self, cls, method, wrapper))
+
+
+    def remove(self):
+        """Removes all wrappers of this tool, and restores the methods that are not wrapped by any other tool"""
+        for module, pending in list(_pending.items()):
+            pending[:] = [p for p in pending if p[0] is not self]
+            if len(pending) == 0:
+                del _pending[module]
+        for cls, method in reversed(self._methods):
+            if (cls, method) in _wrapped:
+                wrappers = _wrapped[(cls, method)][1]
+                wrappers[:] = [w for w in wrappers if w[0] is not self]
+                _install(cls, method)
+        self._methods = []
@@ -0,0 +1,158 @@
+from .power_component import PowerComponent
+from .hooks import MethodHooks, subclasses
+from dataclasses import dataclass
+import functools, time
+
+
+
+@dataclass
+class PhaseStats:
+    """Number of (outermost) calls of a phase, and the wall time spent in them"""
+    calls: int = 0
+    seconds: float = 0.0
+
+
+
+class Instrumentation:
+    """
+    Counts how often each component is updated, measures the wall time of each phase (update, check, hierarchy,
+    spreadsheet tables, graph generation), and records the number of rows of each exported table:
+
+        with Instrumentation() as stats:
+            PowerSpreadsheet(pdn).save('pdn.xlsx')
+        print(stats.report())
+
+    The hooks are only installed while an instrumentation is active, so there is no overhead otherwise. Nested calls
+    of the same phase (e.g. the recursive updates of downstream components) are only timed once.
+    """
+
+    _active = None # type: Instrumentation|None
+
+    # phase -> (module, class, method); modules that are not imported yet are hooked when they are imported
+    PHASES = {
+        'update': ('.power_component', 'PowerComponent', 'update'),
+        'check': ('.power_component', 'PowerComponent', 'check'),
+        'hierarchy': ('.power_component', 'PowerComponent', 'get_hierarchy'),
+        'spreadsheet.drawn': ('.spreadsheet', 'PowerSpreadsheet', '_add_drawn_power_table'),
+        'spreadsheet.hierarchy': ('.spreadsheet', 'PowerSpreadsheet', '_add_hierarchy_table'),
+        'spreadsheet.dissipation': ('.spreadsheet', 'PowerSpreadsheet', '_add_dissipation_table'),
+        'spreadsheet.sourced': ('.spreadsheet', 'PowerSpreadsheet', '_add_sourced_power_table'),
+        'spreadsheet.save': ('.spreadsheet', 'PowerSpreadsheet', '_save'),
+        'graph': ('.graph', 'PowerGraph', '_generate'),
+    }
+
+
+    def __init__(self):
+        self.update_counts = {} # type: dict[PowerComponent,int]
+        self.phases = {phase: PhaseStats() for phase in Instrumentation.PHASES} # type: dict[str,PhaseStats]
+        self.table_rows = {} # type: dict[str,int]
+        self._hooks = MethodHooks()
+        self._updating = [] # type: list[PowerComponent]
+        self._depth = {phase: 0 for phase in Instrumentation.PHASES} # type: dict[str,int]
+
+
+    def __enter__(self) -> "Instrumentation":
+        self.start()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+    def start(self):
+        if Instrumentation._active is not None:
+            raise RuntimeError('Another instrumentation is already active')
+        Instrumentation._active = self
+        try:
+            for phase, (module, cls, method) in Instrumentation.PHASES.items():
+                if phase == 'update':
+                    # components may override update(), so each implementation must be counted
+                    for subclass in subclasses(PowerComponent):
+                        if 'update' in subclass.__dict__:
+                            self._hooks.wrap(subclass, 'update', functools.partial(self._counted, phase=phase))
+                else:
+                    self._hooks.wrap_when_imported(__package__ + module, cls, method, functools.partial(self._timed, phase=phase))
+            self._hooks.wrap_when_imported(__package__ + '.spreadsheet', 'PowerSpreadsheet', '_newtable', self._table)
+        except BaseException:
+            self.stop()
+            raise
+
+
+    def stop(self):
+        self._hooks.remove()
+        if Instrumentation._active is self:
+            Instrumentation._active = None
+
+
+    @property
+    def total_updates(self) -> int:
+        return sum(self.update_counts.values())
+
+
+    def as_dict(self) -> dict:
+        """Returns all results as plain data (e.g. to store them as JSON); components are identified by their names"""
+        return dict(
+            update_counts={component.name: count for component, count in self.update_counts.items()},
+            phases={phase: dict(calls=stats.calls, seconds=stats.seconds) for phase, stats in self.phases.items() if stats.calls > 0},
+            table_rows=dict(self.table_rows),
+        )
+
+
+    def report(self, max_components: int = 10) -> str:
+        """Returns a human-readable summary, including the <max_components> most frequently updated components"""
+        lines = ['Phase                     Calls      Time']
+        for phase, stats in self.phases.items():
+            if stats.calls > 0:
+                lines.append(f'{phase:24} {stats.calls:6} {stats.seconds*1e3:9.1f} ms')
+        lines.append(f'Component updates: {self.total_updates} of {len(self.update_counts)} components')
+        for component, count in sorted(self.update_counts.items(), key=lambda item: -item[1])[:max_components]:
+            lines.append(f'    {count:6}x {component.name}')
+        if len(self.table_rows) > 0:
+            lines.append('Table rows:')
+            for table, rows in self.table_rows.items():
+                lines.append(f'    {rows:6} {table}')
+        return '\n'.join(lines)
+
+
+    def _timed(self, function, phase: str):
+        stats = self.phases[phase]
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if self._depth[phase] > 0:
+                return function(*args, **kwargs)
+            self._depth[phase] += 1
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats.seconds += time.perf_counter() - start
+                stats.calls += 1
+                self._depth[phase] -= 1
+        return wrapper
+
+
+    def _counted(self, function, phase: str):
+        timed = self._timed(function, phase)
+        @functools.wraps(function)
+        def wrapper(component: PowerComponent, *args, **kwargs):
+            # an overridden update() that calls super().update() is still a single update
+            if len(self._updating) > 0 and self._updating[-1] is component:
+                return function(component, *args, **kwargs)
+            self.update_counts[component] = self.update_counts.get(component, 0) + 1
+            self._updating.append(component)
+            try:
+                return timed(component, *args, **kwargs)
+            finally:
+                self._updating.pop()
+        return wrapper
+
+
+    def _table(self, function):
+        @functools.wraps(function)
+        def wrapper(spreadsheet, sheet, ref, name, *args, **kwargs):
+            from openpyxl.utils import range_boundaries
+            _, min_row, _, max_row = range_boundaries(ref)
+            self.table_rows[name] = max_row - min_row # without the header
+            return function(spreadsheet, sheet, ref, name, *args, **kwargs)
+        return wrapper
@@ -0,0 +1,427 @@
+from .power_base import PowerConfig
+from .compiled import CompiledNetwork, NetworkState, _segment_sum, _series_voltage
+from .efficiency import EfficiencyCurve, EfficiencySurface
+from .power_converters import MAX_ITERATIONS
+from dataclasses import fields
+import functools, weakref
+import numpy as np
+
+
+
+def _mul(a_lo: "np.ndarray", a_hi: "np.ndarray", b_lo: "np.ndarray", b_hi: "np.ndarray") -> "tuple[np.ndarray,np.ndarray]":
+    with np.errstate(invalid='ignore'):
+        products = [a_lo * b_lo, a_lo * b_hi, a_hi * b_lo, a_hi * b_hi]
+    # fmin/fmax ignore the NaNs of 0*inf
+    return np.fmin(np.fmin(products[0], products[1]), np.fmin(products[2], products[3])), \
+        np.fmax(np.fmax(products[0], products[1]), np.fmax(products[2], products[3]))
+
+
+def _div(a_lo: "np.ndarray", a_hi: "np.ndarray", b_lo: "np.ndarray", b_hi: "np.ndarray") -> "tuple[np.ndarray,np.ndarray]":
+    excludes_zero = (b_lo > 0) | (b_hi < 0)
+    with np.errstate(divide='ignore'):
+        r_lo = np.where(excludes_zero, 1 / b_hi, -np.inf)
+        r_hi = np.where(excludes_zero, 1 / b_lo, np.inf)
+    return _mul(a_lo, a_hi, r_lo, r_hi)
+
+
+def _abs(lo: "np.ndarray", hi: "np.ndarray") -> "tuple[np.ndarray,np.ndarray]":
+    return np.where(lo > 0, lo, np.where(hi < 0, -hi, 0)), np.maximum(np.abs(lo), np.abs(hi))
+
+
+
+# curve -> (points at which the functions below may have an extremum, their values); dropped with the curve
+_curve_points = weakref.WeakKeyDictionary() # type: weakref.WeakKeyDictionary[EfficiencyCurve,dict[str,tuple[np.ndarray,np.ndarray]]]
+
+_CURVE_FUNCTIONS = {
+    'eff': lambda curve, i: curve(i),
+    # converted power per output power (in %), i.e. the input power is |v_out|*q(i_out)
+    'q': lambda curve, i: 100 * np.abs(i) / curve(i),
+    # loss per output voltage, i.e. the dissipated power is |v_out|*h(i_out)
+    'h': lambda curve, i: np.abs(i) * (100 / curve(i) - 1),
+}
+
+
+def _points(curve: EfficiencyCurve, function: str) -> "tuple[np.ndarray,np.ndarray]":
+    """Returns the points at which the function may have a local extremum, and the values of the function there"""
+    cache = _curve_points.setdefault(curve, {})
+    if function not in cache:
+        points = [curve.i_out, [0.0]]
+        if function == 'h':
+            # on each segment (eff = a + s*i), h is extremal where (a + s*i)^2 = 100*a
+            a = curve.eff_pct[:len(curve._slopes)] - curve._slopes * curve.i_out[:len(curve._slopes)]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                critical = (np.sqrt(100 * a) - a) / curve._slopes
+            points.append(critical[np.isfinite(critical)])
+        points = np.unique(np.concatenate(points))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cache[function] = (points, _CURVE_FUNCTIONS[function](curve, points))
+    return cache[function]
+
+
+def _curve_range(curve: EfficiencyCurve, function: str, lo: "np.ndarray", hi: "np.ndarray") -> "tuple[np.ndarray,np.ndarray]":
+    """Returns the exact range of a function of the efficiency curve over the interval [lo, hi] of the output current"""
+    points, values = _points(curve, function)
+    f = _CURVE_FUNCTIONS[function]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        f_lo, f_hi = f(curve, lo), f(curve, hi)
+    inside = (points >= lo[..., np.newaxis]) & (points <= hi[..., np.newaxis])
+    # the curve cannot be evaluated at an infinite current
+    unbounded = ~np.isfinite(lo) | ~np.isfinite(hi)
+    return np.where(unbounded, -np.inf, np.fmin(np.fmin(f_lo, f_hi), np.where(inside, values, np.inf).min(axis=-1))), \
+        np.where(unbounded, np.inf, np.fmax(np.fmax(f_lo, f_hi), np.where(inside, values, -np.inf).max(axis=-1)))
+
+
+
+def _surface_range(surface: EfficiencySurface, i_lo: "np.ndarray", i_hi: "np.ndarray", v_lo: "np.ndarray", v_hi: "np.ndarray") -> "tuple[np.ndarray,np.ndarray]":
+    """
+    Returns the exact range of the efficiency surface over the box [i_lo, i_hi] x [v_lo, v_hi] (at PowerConfig.t_ambient);
+    the surface is multilinear within each cell, so its extrema are at the corners of the box or where the box meets the grid
+    """
+    candidates, inside = [], []
+    for axis, lo, hi in [(surface.i_out, i_lo, i_hi), (surface.v_in, v_lo, v_hi)]:
+        points = np.broadcast_to(axis, lo.shape + axis.shape)
+        candidates.append(np.concatenate([lo[..., np.newaxis], hi[..., np.newaxis], points], axis=-1))
+        inside.append(np.concatenate([np.ones(lo.shape + (2,), dtype=bool), (points > lo[..., np.newaxis]) & (points < hi[..., np.newaxis])], axis=-1))
+    with np.errstate(invalid='ignore'):
+        values = surface(candidates[0][..., :, np.newaxis], candidates[1][..., np.newaxis, :])
+    inside = inside[0][..., :, np.newaxis] & inside[1][..., np.newaxis, :]
+    axes = (-2, -1)
+    # the surface cannot be evaluated at an infinite current or voltage
+    unbounded = ~np.isfinite(i_lo) | ~np.isfinite(i_hi) | np.isinf(v_lo) | np.isinf(v_hi)
+    return np.where(unbounded, -np.inf, np.where(inside, values, np.inf).min(axis=axes)), \
+        np.where(unbounded, np.inf, np.where(inside, values, -np.inf).max(axis=axes))
+
+
+def _series_range(v_src_lo: "np.ndarray", v_src_hi: "np.ndarray", r_series: "np.ndarray", i_gnd_lo: "np.ndarray", i_gnd_hi: "np.ndarray",
+        p_conv_lo: "np.ndarray", p_conv_hi: "np.ndarray") -> "tuple[np.ndarray,np.ndarray]":
+    """
+    Returns the range of the input voltage of DC/DC converters with a series resistance (see _series_voltage()); its
+    magnitude grows with the magnitude of the source voltage, and shrinks with the power. Where the voltage may collapse,
+    the range is unbounded; where it certainly collapses, it is NaN (like the value).
+    """
+    with np.errstate(invalid='ignore'):
+        b_lo, b_hi = v_src_lo - r_series * i_gnd_hi, v_src_hi - r_series * i_gnd_lo
+        positive, negative = b_lo > 0, b_hi < 0
+        lo = np.where(positive, _series_voltage(b_lo, r_series, 0, p_conv_hi), _series_voltage(b_lo, r_series, 0, p_conv_lo))
+        hi = np.where(positive, _series_voltage(b_hi, r_series, 0, p_conv_lo), _series_voltage(b_hi, r_series, 0, p_conv_hi))
+    collapsed = np.where(positive, np.isnan(hi), negative & np.isnan(lo))
+    lo = np.where(positive | negative, np.where(np.isnan(lo), -np.inf, lo), -np.inf)
+    hi = np.where(positive | negative, np.where(np.isnan(hi), np.inf, hi), np.inf)
+    return np.where(collapsed, np.nan, lo), np.where(collapsed, np.nan, hi)
+
+
+def _bounds(network: CompiledNetwork, i_in_lo: "np.ndarray", i_in_hi: "np.ndarray", v_out_lo: "np.ndarray", v_out_hi: "np.ndarray",
+        ldo_i_gnd: "tuple[np.ndarray,np.ndarray]|None" = None, dcdc_i_gnd: "tuple[np.ndarray,np.ndarray]|None" = None,
+        r_th_ja: "tuple[np.ndarray,np.ndarray]|None" = None) -> "tuple[NetworkState,NetworkState]":
+    """
+    Evaluates the network with interval arithmetic, for the given ranges of the fixed input currents and of the output
+    voltages (and optionally of the ground currents and thermal resistances, as (lower, upper) tuples), and returns a
+    lower and an upper bound of every calculated value. All other parameters are read from the network (see
+    CompiledNetwork._gather()). Leading axes are treated as independent scenarios, like in _solve().
+    For ranges of zero width, the bounds are the values of _solve().
+    """
+
+    if ldo_i_gnd is None: ldo_i_gnd = (network.ldo_i_gnd, network.ldo_i_gnd)
+    if dcdc_i_gnd is None: dcdc_i_gnd = (network.dcdc_i_gnd, network.dcdc_i_gnd)
+    if r_th_ja is None: r_th_ja = (network.r_th_ja, network.r_th_ja)
+    batch = np.broadcast_shapes(*[np.shape(p)[:-1] for p in [i_in_lo, i_in_hi, v_out_lo, v_out_hi, *ldo_i_gnd, *dcdc_i_gnd, *r_th_ja]])
+    ldo_i_gnd = [np.broadcast_to(g, batch + (len(network.ldos),)) for g in ldo_i_gnd]
+    dcdc_i_gnd = [np.broadcast_to(g, batch + (len(network.dcdcs),)) for g in dcdc_i_gnd]
+    n_in, n_out = len(network.inputs), len(network.outputs)
+    v_out_lo, v_out_hi = np.broadcast_to(v_out_lo, batch + (n_out,)), np.broadcast_to(v_out_hi, batch + (n_out,))
+    i_in_lo, i_in_hi = np.broadcast_to(i_in_lo, batch + (n_in,)).copy(), np.broadcast_to(i_in_hi, batch + (n_in,)).copy()
+    i_out_lo, i_out_hi = np.zeros(batch + (n_out,)), np.zeros(batch + (n_out,))
+    v_src_lo = np.broadcast_to(network._source_voltages(v_out_lo), batch + (n_in,))
+    v_src_hi = np.broadcast_to(network._source_voltages(v_out_hi), batch + (n_in,))
+    v_in_lo, v_in_hi = v_src_lo.copy(), v_src_hi.copy()
+    series, r_series = network.r_series > 0, network.r_series
+    if network._has_series:
+        with np.errstate(invalid='ignore'):
+            v_in_lo = np.where(series, v_src_lo - r_series * i_in_hi, v_src_lo)
+            v_in_hi = np.where(series, v_src_hi - r_series * i_in_lo, v_src_hi)
+    v_drop_lo, v_drop_hi = np.full(batch + (len(network.ldos),), np.nan), np.full(batch + (len(network.ldos),), np.nan)
+    eff_lo, eff_hi = np.full(batch + (len(network.dcdcs),), 100.0), np.full(batch + (len(network.dcdcs),), 100.0)
+    # converted power per output power of the DC/DC converters, and their loss per output voltage (see _CURVE_FUNCTIONS)
+    q_lo, q_hi = np.zeros(batch + (len(network.dcdcs),)), np.zeros(batch + (len(network.dcdcs),))
+    h_lo, h_hi = np.zeros(batch + (len(network.dcdcs),)), np.zeros(batch + (len(network.dcdcs),))
+    v_look_lo, v_look_hi = np.full(batch + (len(network.dcdcs),), np.nan), np.full(batch + (len(network.dcdcs),), np.nan)
+
+    for level, curve_groups in zip(network._levels, network._dcdc_curve_groups):
+
+        i_out_lo[..., level.outputs] = _segment_sum(i_in_lo, level.sink_index, level.sink_ptr)
+        i_out_hi[..., level.outputs] = _segment_sum(i_in_hi, level.sink_index, level.sink_ptr)
+
+        ldo_in, ldo_out = network.ldo_in[level.ldos], network.ldo_out[level.ldos]
+        i_in_lo[..., ldo_in] = i_out_lo[..., ldo_out] + ldo_i_gnd[0][..., level.ldos]
+        i_in_hi[..., ldo_in] = i_out_hi[..., ldo_out] + ldo_i_gnd[1][..., level.ldos]
+        v_drop_lo[..., level.ldos] = network.v_in_nom[ldo_in] - v_out_hi[..., ldo_out]
+        v_drop_hi[..., level.ldos] = network.v_in_nom[ldo_in] - v_out_lo[..., ldo_out]
+
+        dcdc_in, dcdc_out = network.dcdc_in[level.dcdcs], network.dcdc_out[level.dcdcs]
+        # the range of the input voltage at which efficiency surfaces are evaluated; across a series resistance, it lies
+        #   between (v_src - r_series*i_gnd)/2 and v_src - r_series*i_gnd (see _series_voltage()), and is narrowed below
+        v_look_lo[..., level.dcdcs], v_look_hi[..., level.dcdcs] = v_src_lo[..., dcdc_in], v_src_hi[..., dcdc_in]
+        iterate = network._has_series and network._has_surfaces
+        if iterate:
+            with np.errstate(invalid='ignore'):
+                b_lo = v_src_lo[..., dcdc_in] - r_series[dcdc_in] * dcdc_i_gnd[1][..., level.dcdcs]
+                b_hi = v_src_hi[..., dcdc_in] - r_series[dcdc_in] * dcdc_i_gnd[0][..., level.dcdcs]
+            v_look_lo[..., level.dcdcs] = np.where(series[dcdc_in], np.minimum(b_lo, b_lo / 2), v_look_lo[..., level.dcdcs])
+            v_look_hi[..., level.dcdcs] = np.where(series[dcdc_in], np.maximum(b_hi, b_hi / 2), v_look_hi[..., level.dcdcs])
+        for _ in range(MAX_ITERATIONS if iterate else 1):
+            q_lo[..., level.dcdcs], q_hi[..., level.dcdcs] = _abs(i_out_lo[..., dcdc_out], i_out_hi[..., dcdc_out])
+            for curve, ks in curve_groups:
+                lo, hi = i_out_lo[..., network.dcdc_out[ks]], i_out_hi[..., network.dcdc_out[ks]]
+                if isinstance(curve, EfficiencySurface):
+                    eff_lo[..., ks], eff_hi[..., ks] = _surface_range(curve, lo, hi, v_look_lo[..., ks], v_look_hi[..., ks])
+                    # q = |i_out| * 100/eff, h = |i_out| * (100/eff - 1), where i_out and eff are treated as independent
+                    with np.errstate(divide='ignore'):
+                        inverse = 100 / eff_hi[..., ks], 100 / eff_lo[..., ks]
+                    q_lo[..., ks], q_hi[..., ks] = _mul(*_abs(lo, hi), *inverse)
+                    h_lo[..., ks], h_hi[..., ks] = _mul(*_abs(lo, hi), inverse[0] - 1, inverse[1] - 1)
+                else:
+                    eff_lo[..., ks], eff_hi[..., ks] = _curve_range(curve, 'eff', lo, hi)
+                    q_lo[..., ks], q_hi[..., ks] = _curve_range(curve, 'q', lo, hi)
+                    h_lo[..., ks], h_hi[..., ks] = _curve_range(curve, 'h', lo, hi)
+                # an extrapolated curve may reach zero efficiency, where q and h have a pole
+                pole = eff_lo[..., ks] <= 0
+                q_lo[..., ks], q_hi[..., ks] = np.where(pole, -np.inf, q_lo[..., ks]), np.where(pole, np.inf, q_hi[..., ks])
+                h_lo[..., ks], h_hi[..., ks] = np.where(pole, -np.inf, h_lo[..., ks]), np.where(pole, np.inf, h_hi[..., ks])
+            p_conv = _mul(*_abs(v_out_lo[..., dcdc_out], v_out_hi[..., dcdc_out]), q_lo[..., level.dcdcs], q_hi[..., level.dcdcs])
+            if not network._has_series:
+                break
+            v_series = _series_range(v_src_lo[..., dcdc_in], v_src_hi[..., dcdc_in], r_series[dcdc_in],
+                dcdc_i_gnd[0][..., level.dcdcs], dcdc_i_gnd[1][..., level.dcdcs], *p_conv)
+            if not iterate:
+                break
+            # both ranges enclose the input voltage, so does their intersection (fmin/fmax ignore a collapsed voltage)
+            previous = v_look_lo[..., level.dcdcs], v_look_hi[..., level.dcdcs]
+            v_look_lo[..., level.dcdcs] = np.where(series[dcdc_in], np.fmax(previous[0], v_series[0]), previous[0])
+            v_look_hi[..., level.dcdcs] = np.where(series[dcdc_in], np.fmin(previous[1], v_series[1]), previous[1])
+            if np.allclose(v_look_lo[..., level.dcdcs], previous[0], rtol=1e-12, atol=0, equal_nan=True) and \
+                    np.allclose(v_look_hi[..., level.dcdcs], previous[1], rtol=1e-12, atol=0, equal_nan=True):
+                break
+        if network._has_series:
+            v_in_lo[..., dcdc_in] = np.where(series[dcdc_in], v_series[0], v_in_lo[..., dcdc_in])
+            v_in_hi[..., dcdc_in] = np.where(series[dcdc_in], v_series[1], v_in_hi[..., dcdc_in])
+        i_conv = _div(*p_conv, v_in_lo[..., dcdc_in], v_in_hi[..., dcdc_in])
+        i_in_lo[..., dcdc_in] = dcdc_i_gnd[0][..., level.dcdcs] + i_conv[0]
+        i_in_hi[..., dcdc_in] = dcdc_i_gnd[1][..., level.dcdcs] + i_conv[1]
+
+        if network._has_series:
+            # the drop across the series resistance; for DC/DC converters, this also narrows the range from above
+            s, r = series[ldo_in], r_series[ldo_in]
+            with np.errstate(invalid='ignore'):
+                drop = r * i_in_hi[..., ldo_in], r * i_in_lo[..., ldo_in]
+            v_in_lo[..., ldo_in] = np.where(s, v_src_lo[..., ldo_in] - drop[0], v_in_lo[..., ldo_in])
+            v_in_hi[..., ldo_in] = np.where(s, v_src_hi[..., ldo_in] - drop[1], v_in_hi[..., ldo_in])
+            s, r = series[dcdc_in], r_series[dcdc_in]
+            with np.errstate(invalid='ignore'):
+                drop = r * i_in_hi[..., dcdc_in], r * i_in_lo[..., dcdc_in]
+            v_in_lo[..., dcdc_in] = np.where(s, np.maximum(v_in_lo[..., dcdc_in], v_src_lo[..., dcdc_in] - drop[0]), v_in_lo[..., dcdc_in])
+            v_in_hi[..., dcdc_in] = np.where(s, np.minimum(v_in_hi[..., dcdc_in], v_src_hi[..., dcdc_in] - drop[1]), v_in_hi[..., dcdc_in])
+
+    p_in_lo, p_in_hi = _abs(*_mul(v_in_lo, v_in_hi, i_in_lo, i_in_hi))
+    p_out_lo, p_out_hi = _abs(*_mul(v_out_lo, v_out_hi, i_out_lo, i_out_hi))
+    inputs, outputs = np.arange(n_in), np.arange(n_out)
+    comp_p_in_lo, comp_p_in_hi = _segment_sum(p_in_lo, inputs, network.comp_in_ptr), _segment_sum(p_in_hi, inputs, network.comp_in_ptr)
+    comp_p_out_lo, comp_p_out_hi = _segment_sum(p_out_lo, outputs, network.comp_out_ptr), _segment_sum(p_out_hi, outputs, network.comp_out_ptr)
+    with np.errstate(invalid='ignore'):
+        p_diss_lo, p_diss_hi = comp_p_in_lo - comp_p_out_hi, comp_p_in_hi - comp_p_out_lo
+    # inf - inf, i.e. unbounded
+    p_diss_lo, p_diss_hi = np.where(np.isnan(p_diss_lo), -np.inf, p_diss_lo), np.where(np.isnan(p_diss_hi), np.inf, p_diss_hi)
+
+    # the generic bounds of the converters are loose, as the input and output power depend on the same current; for
+    #   positive currents, their dissipation can also be written such that each current only appears once
+    ldos, ldo_in, ldo_out = network.ldos, network.ldo_in, network.ldo_out
+    av_in, av_out = _abs(v_in_lo[..., ldo_in], v_in_hi[..., ldo_in]), _abs(v_out_lo[..., ldo_out], v_out_hi[..., ldo_out])
+    drop = _mul(av_in[0] - av_out[1], av_in[1] - av_out[0], i_out_lo[..., ldo_out], i_out_hi[..., ldo_out])
+    gnd = _mul(av_in[0], av_in[1], *ldo_i_gnd)
+    valid = (i_out_lo[..., ldo_out] >= 0) & (ldo_i_gnd[0] >= 0)
+    p_diss_lo[..., ldos] = np.where(valid, np.maximum(p_diss_lo[..., ldos], drop[0] + gnd[0]), p_diss_lo[..., ldos])
+    p_diss_hi[..., ldos] = np.where(valid, np.minimum(p_diss_hi[..., ldos], drop[1] + gnd[1]), p_diss_hi[..., ldos])
+
+    dcdcs, dcdc_in, dcdc_out = network.dcdcs, network.dcdc_in, network.dcdc_out
+    loss = _mul(*_abs(v_out_lo[..., dcdc_out], v_out_hi[..., dcdc_out]), h_lo, h_hi)
+    gnd = _mul(v_in_lo[..., dcdc_in], v_in_hi[..., dcdc_in], *dcdc_i_gnd)
+    valid = (v_in_lo[..., dcdc_in] > 0) & (i_in_lo[..., dcdc_in] >= 0) & (i_out_lo[..., dcdc_out] >= 0)
+    p_diss_lo[..., dcdcs] = np.where(valid, np.maximum(p_diss_lo[..., dcdcs], loss[0] + gnd[0]), p_diss_lo[..., dcdcs])
+    p_diss_hi[..., dcdcs] = np.where(valid, np.minimum(p_diss_hi[..., dcdcs], loss[1] + gnd[1]), p_diss_hi[..., dcdcs])
+
+    t_j = _mul(p_diss_lo, p_diss_hi, *[np.where(np.isnan(r), 0, r) for r in r_th_ja])
+
+    return (
+        NetworkState(v_in_lo, i_in_lo, p_in_lo, i_out_lo, p_out_lo, comp_p_in_lo, comp_p_out_lo, p_diss_lo, PowerConfig.t_ambient + t_j[0], v_drop_lo, eff_lo),
+        NetworkState(v_in_hi, i_in_hi, p_in_hi, i_out_hi, p_out_hi, comp_p_in_hi, comp_p_out_hi, p_diss_hi, PowerConfig.t_ambient + t_j[1], v_drop_hi, eff_hi),
+    )
+
+
+
+"""Relative margin by which evaluate_intervals() widens all bounds, to enclose the rounding errors of the evaluation"""
+ROUNDING_MARGIN = 1e-12
+
+
+def _round_outward(lo: NetworkState, hi: NetworkState, r_th_ja: "tuple[np.ndarray,np.ndarray]") -> "tuple[NetworkState,NetworkState]":
+    """
+    Widens the bounds by ROUNDING_MARGIN of the magnitude of each value; the dissipated power by that of the input and
+    output power it is the difference of, and the junction temperature accordingly
+    """
+    def magnitude(*values: "np.ndarray") -> "np.ndarray":
+        # (NaN and infinite values need no margin)
+        result = functools.reduce(np.fmax, [np.abs(v) for v in values])
+        return np.where(np.isfinite(result), result, 0)
+
+    widened_lo, widened_hi = {}, {}
+    for field in [f.name for f in fields(NetworkState)]:
+        lo_value, hi_value = getattr(lo, field), getattr(hi, field)
+        scale = magnitude(lo_value, hi_value)
+        if field == 'p_diss':
+            scale = np.maximum(scale, magnitude(hi.comp_p_in, hi.comp_p_out))
+        elif field == 't_j':
+            # (from the widened dissipation, which precedes it)
+            t_j = _mul(widened_lo['p_diss'], widened_hi['p_diss'], *[np.where(np.isnan(r), 0, r) for r in r_th_ja])
+            lo_value, hi_value = PowerConfig.t_ambient + t_j[0], PowerConfig.t_ambient + t_j[1]
+            scale = magnitude(lo_value, hi_value)
+        widened_lo[field], widened_hi[field] = lo_value - ROUNDING_MARGIN * scale, hi_value + ROUNDING_MARGIN * scale
+    return NetworkState(**widened_lo), NetworkState(**widened_hi)
+
+
+
+class IntervalState:
+    """
+    Bounds of every calculated value, as returned by CompiledNetwork.evaluate_intervals(); <lo> and <hi> are NetworkStates
+    with the lower and upper bounds. Every combination of parameters within their ranges is enclosed, but as dependencies
+    between values are not tracked, the bounds may be wider than the exact envelope. The arithmetic itself is not rounded
+    outward; instead, the bounds are widened by ROUNDING_MARGIN (relative), which encloses the rounding errors unless large
+    values cancel out (e.g. currents of opposite sign).
+    """
+
+    # kind of element -> calculated attribute of the objects -> field of NetworkState
+    _VALUES = dict(
+        input=dict(v_in_actual='v_in', i_in='i_in', p_in_calc='p_in'),
+        output=dict(i_out_calc='i_out', p_out_calc='p_out'),
+        component=dict(p_in_calc='comp_p_in', p_out_calc='comp_p_out', p_diss_calc='p_diss', t_j_calc='t_j', v_drop_calc='v_drop', eff_pct_calc='eff_pct'),
+    )
+
+
+    def __init__(self, network: CompiledNetwork, lo: NetworkState, hi: NetworkState, v_src: "tuple[np.ndarray,np.ndarray]"):
+        self.network, self.lo, self.hi = network, lo, hi
+        # the range of the voltage that drives each input, i.e. before the series resistance
+        self._v_src = v_src
+
+
+    def __repr__(self) -> str:
+        return f'<IntervalState({self.network.root.name})>'
+
+
+    def range(self, element: "PowerComponent|PowerInput|PowerOutput|str", value: str) -> "tuple[float,float]":
+        """Returns the bounds of a calculated <value> (e.g. 'p_diss_calc' or 'i_out_calc') of an element (or of its name)"""
+        from .power_component import PowerComponent, PowerInput
+        network = self.network
+        if isinstance(element, str):
+            element = network.find(element)
+        kind = 'component' if isinstance(element, PowerComponent) else 'input' if isinstance(element, PowerInput) else 'output'
+        if value not in IntervalState._VALUES[kind]:
+            raise ValueError(f'Unknown value "{value}" of an {kind}, expected one of {list(IntervalState._VALUES[kind])}')
+        field, index = IntervalState._VALUES[kind][value], network.index(element)
+        if field in ['v_drop', 'eff_pct']:
+            positions = network.ldos if field == 'v_drop' else network.dcdcs
+            if index not in positions:
+                raise ValueError(f'<{element.name}> has no value "{value}"')
+            index = int(np.flatnonzero(positions == index)[0])
+        return float(getattr(self.lo, field)[index]), float(getattr(self.hi, field)[index])
+
+
+    def violations(self) -> "list[tuple[PowerComponent|PowerInput|PowerOutput,str,bool]]":
+        """
+        Returns each limit that may be violated as (element, warning, certain); <certain> tells whether it is violated for
+        all parameters within their ranges
+        """
+        network, lo, hi = self.network, self.lo, self.hi
+        nom_only = np.isnan(network.v_in_min) & np.isnan(network.v_in_max) & network.has_v_in_nom
+        drop_exceeded = np.zeros(len(network.components), dtype=bool)
+        drop_exceeded[network.ldos] = network.v_in_nom[network.ldo_in] < network.ldo_v_drop_min
+        has_r_th_ja = ~np.isnan(network.r_th_ja)
+        v_src_lo, v_src_hi = self._v_src
+        series = (network.r_series > 0) & np.isin(np.arange(len(network.inputs)), network.dcdc_in)
+        # (elements, warning, possibly violated, certainly violated), like CompiledNetwork._violations()
+        checks = [
+            (network.inputs, 'Min. input voltage exceeded', lo.v_in < network.v_in_min, hi.v_in < network.v_in_min),
+            (network.inputs, 'Max. input voltage exceeded', hi.v_in > network.v_in_max, lo.v_in > network.v_in_max),
+            (network.inputs, 'Nom. input voltage violated', nom_only & ((v_src_lo != network.v_in_nom) | (v_src_hi != network.v_in_nom)),
+                nom_only & ((v_src_lo > network.v_in_nom) | (v_src_hi < network.v_in_nom))),
+            (network.inputs, 'Input voltage collapses across the series resistance', series & (np.isnan(hi.v_in) | np.isinf(lo.v_in) | np.isinf(hi.v_in)),
+                series & np.isnan(hi.v_in)),
+            (network.outputs, 'Max. output power exceeded', hi.p_out > network.out_p_out_max, lo.p_out > network.out_p_out_max),
+            (network.outputs, 'Max. output current exceeded', hi.i_out > network.i_out_max, lo.i_out > network.i_out_max),
+            (network.components, 'Max. output power exceeded', hi.comp_p_out > network.p_out_max, lo.comp_p_out > network.p_out_max),
+            (network.components, 'Max. dissipated power exceeded', hi.p_diss > network.p_diss_max, lo.p_diss > network.p_diss_max),
+            (network.components, 'Max. junction temperature exceeded', has_r_th_ja & (hi.t_j > network.t_j_max), has_r_th_ja & (lo.t_j > network.t_j_max)),
+            (network.components, 'Min. voltage drop exceeded', drop_exceeded, drop_exceeded),
+        ]
+        result = []
+        for elements, msg, possible, certain in checks:
+            for n in np.flatnonzero(possible):
+                result.append((elements[n], msg, bool(certain[n])))
+        return result
+
+
+    def report(self) -> str:
+        """Returns a human-readable list of the limits that are (or may be) violated"""
+        violations = self.violations()
+        certain = [v for v in violations if v[2]]
+        lines = [f'{len(certain)} limits are violated, {len(violations) - len(certain)} more may be violated']
+        for element, msg, is_certain in sorted(violations, key=lambda v: not v[2]):
+            lines.append(f'    {"violated" if is_certain else "may be violated":16} {element}: {msg}')
+        return '\n'.join(lines)
+
+
+
+def evaluate_intervals(network: CompiledNetwork, i_in: "dict|None" = None, v_out: "dict|None" = None, i_gnd: "dict|None" = None,
+        r_th_ja: "dict|None" = None) -> IntervalState:
+    """See CompiledNetwork.evaluate_intervals()"""
+    from .power_component import PowerComponent
+    network._gather()
+
+    def ranges(given: "dict|None", nominal: "np.ndarray", index: "callable") -> "tuple[np.ndarray,np.ndarray]":
+        lo, hi = nominal.copy(), nominal.copy()
+        for element, (minimum, maximum) in (given or {}).items():
+            if minimum > maximum:
+                raise ValueError(f'The minimum of <{element}> must not be greater than its maximum')
+            n = index(element)
+            lo[n], hi[n] = minimum, maximum
+        return lo, hi
+
+    def component(element: "PowerComponent|str") -> int:
+        if isinstance(element, str):
+            element = network.find(element)
+        if not isinstance(element, PowerComponent):
+            raise TypeError(f'Expected a component, got <{element}>')
+        return network.index(element)
+
+    def output(element: "PowerComponent|PowerOutput|str") -> int:
+        if isinstance(element, str):
+            element = network.find(element)
+        return network.index(element._get_output() if isinstance(element, PowerComponent) else element)
+
+    def converter(element: "PowerComponent|str", positions: "np.ndarray") -> int:
+        c = component(element)
+        if c not in positions:
+            raise ValueError(f'<{network.components[c].name}> has no ground current')
+        return int(np.flatnonzero(positions == c)[0])
+
+    def thermal(element: "PowerComponent|str") -> int:
+        c = component(element)
+        if np.isnan(network.r_th_ja[c]):
+            raise ValueError(f'<{network.components[c].name}> has no thermal resistance')
+        return c
+
+    i_in_lo, i_in_hi = ranges(i_in, network.i_in_fixed, lambda element: network._load_columns([element])[0])
+    v_out_lo, v_out_hi = ranges(v_out, network.v_out, output)
+    ldo_i_gnd = ranges({e: r for e, r in (i_gnd or {}).items() if component(e) in network.ldos}, network.ldo_i_gnd,
+        lambda element: converter(element, network.ldos))
+    dcdc_i_gnd = ranges({e: r for e, r in (i_gnd or {}).items() if component(e) not in network.ldos}, network.dcdc_i_gnd,
+        lambda element: converter(element, network.dcdcs))
+    r_th_ja = ranges(r_th_ja, network.r_th_ja, thermal)
+    lo, hi = _round_outward(*_bounds(network, i_in_lo, i_in_hi, v_out_lo, v_out_hi, ldo_i_gnd, dcdc_i_gnd, r_th_ja), r_th_ja)
+    return IntervalState(network, lo, hi, (network._source_voltages(v_out_lo), network._source_voltages(v_out_hi)))
@@ -0,0 +1,267 @@
+from .power_component import PowerComponent, PowerInput, PowerOutput
+from .compiled import CompiledNetwork, KIND_GENERIC, KIND_DCDC
+import numpy as np
+
+
+
+class Tolerance:
+    """
+    The distribution of a parameter around its nominal value. Use Tolerance.normal() or Tolerance.uniform(); by default,
+    the deviation is relative to the nominal value (e.g. 0.05 means 5%), with <absolute>, it is in the unit of the parameter.
+    """
+
+
+    def __init__(self, distribution: str, width: float, absolute: bool = False):
+        if distribution not in ['normal', 'uniform']:
+            raise ValueError(f'Unknown distribution "{distribution}"')
+        if width < 0:
+            raise ValueError('The width of a tolerance must not be negative')
+        self.distribution, self.width, self.absolute = distribution, width, absolute
+
+
+    def __repr__(self) -> str:
+        return f'<Tolerance({self.distribution}, {self.width:g}{"" if self.absolute else " rel."})>'
+
+
+    @staticmethod
+    def normal(sigma: float, absolute: bool = False) -> "Tolerance":
+        """Normal distribution with the standard deviation <sigma>"""
+        return Tolerance('normal', sigma, absolute)
+
+
+    @staticmethod
+    def uniform(half_width: float, absolute: bool = False) -> "Tolerance":
+        """Uniform distribution between nominal-<half_width> and nominal+<half_width>"""
+        return Tolerance('uniform', half_width, absolute)
+
+
+    def sample(self, nominal: "np.ndarray", rng: "np.random.Generator", samples: int) -> "np.ndarray":
+        """Returns a matrix with one row per sample, and one column per nominal value"""
+        shape = (samples, len(nominal))
+        if self.distribution == 'normal':
+            deviation = rng.normal(0, self.width, shape)
+        else:
+            deviation = rng.uniform(-self.width, self.width, shape)
+        if self.absolute:
+            return nominal + deviation
+        return nominal * (1 + deviation)
+
+
+
+class MonteCarloResult:
+    """
+    The results of MonteCarlo.run(). The sample matrices have one row per sample, and one column per component (<p_diss>,
+    <t_j>) or output (<i_out>, <p_out>), in the order of CompiledNetwork.components and .outputs; they are stored in single
+    precision to save memory. <ok> tells for each sample whether all limits are met.
+    """
+
+
+    def __init__(self, network: CompiledNetwork, samples: int):
+        self.network, self.samples = network, samples
+        self.p_diss = np.empty((samples, len(network.components)), dtype=np.float32)
+        self.t_j = np.empty((samples, len(network.components)), dtype=np.float32)
+        self.i_out = np.empty((samples, len(network.outputs)), dtype=np.float32)
+        self.p_out = np.empty((samples, len(network.outputs)), dtype=np.float32)
+        self.ok = np.empty(samples, dtype=bool)
+        self._failures = [] # type: list[tuple[list,str,np.ndarray]]
+        self._element_failures = [] # type: list[tuple[list,np.ndarray]]
+
+
+    def __repr__(self) -> str:
+        return f'<MonteCarloResult({self.samples} samples, P(fail)={self.failure_probability():.4g})>'
+
+
+    def percentile(self, quantity: str, q: "float|list[float]") -> "np.ndarray":
+        """
+        Returns the <q>-th percentile(s) of a <quantity> ('p_diss', 't_j', 'i_out' or 'p_out') for each component or output;
+        with a list of percentiles, the result has one row per percentile
+        """
+        if quantity not in ['p_diss', 't_j', 'i_out', 'p_out']:
+            raise ValueError(f'Unknown quantity "{quantity}"')
+        return np.percentile(getattr(self, quantity), q, axis=0)
+
+
+    def failure_probability(self, element: "PowerComponent|PowerOutput|PowerInput|str|None" = None) -> float:
+        """Returns the fraction of samples that violate any limit (of the given element, or of the whole network)"""
+        if element is None:
+            return float(1 - np.mean(self.ok)) if self.samples > 0 else 0.0
+        if isinstance(element, str):
+            element = self.network.find(element)
+        for elements, counts in self._element_failures:
+            for n in np.flatnonzero(counts):
+                if elements[n] is element:
+                    return float(counts[n] / self.samples)
+        return 0.0
+
+
+    def failures(self) -> "list[tuple[PowerComponent|PowerInput|PowerOutput,str,float]]":
+        """Returns each violated limit as (element, warning, probability), the most probable ones first"""
+        result = []
+        for elements, msg, counts in self._failures:
+            for n in np.flatnonzero(counts):
+                result.append((elements[n], msg, float(counts[n] / self.samples)))
+        return sorted(result, key=lambda failure: -failure[2])
+
+
+    def report(self, max_rows: int = 20) -> str:
+        """Returns a human-readable summary: the most probable violations, and percentiles of the hottest components"""
+        lines = [f'{self.samples} samples, P(any limit violated) = {self.failure_probability()*100:.3g}%']
+        failures = self.failures()
+        if len(failures) > 0:
+            lines.append('Violations:')
+            for element, msg, p in failures[:max_rows]:
+                lines.append(f'    {p*100:7.3g}%  {element}: {msg}')
+        if self.samples > 0 and len(self.network.components) > 0:
+            lines.append(f'    {"Component":24} {"P_diss 50%":>12} {"P_diss 99%":>12} {"T_j 50%":>10} {"T_j 99%":>10}')
+            p_diss, t_j = self.percentile('p_diss', [50, 99]), self.percentile('t_j', [50, 99])
+            for c in np.argsort(-t_j[1], kind='stable')[:max_rows]:
+                lines.append(f'    {self.network.components[c].name:24} {p_diss[0,c]:10.4g} W {p_diss[1,c]:10.4g} W {t_j[0,c]:7.4g} °C {t_j[1,c]:7.4g} °C')
+        return '\n'.join(lines)
+
+
+
+class MonteCarlo:
+    """
+    Evaluates a network for many random variations of its parameters in a few vectorized passes:
+
+        mc = MonteCarlo(pdn)
+        mc.vary(..., 'i_in', Tolerance.normal(0.1))     # all loads
+        mc.vary('LDO 3V3', 'v_out', Tolerance.uniform(0.02))
+        result = mc.run(100_000, seed=1)
+        print(result.report())
+
+    The parameters that can be varied are the current of loads ('i_in'), the voltage of outputs ('v_out'), the ground
+    current of converters ('i_gnd'), the efficiency of DC/DC converters ('eff', relative to the curve, limited to 100%),
+    and the thermal resistance of components ('r_th_ja'). All other parameters are read from the objects, which are not
+    modified. Note that an input that only defines a nominal voltage is violated whenever the voltage of its source varies.
+    """
+
+    PARAMETERS = ['i_in', 'v_out', 'i_gnd', 'eff', 'r_th_ja']
+
+
+    def __init__(self, network: "PowerComponent|CompiledNetwork"):
+        self.network = network if isinstance(network, CompiledNetwork) else network.compile()
+        self._variations = {parameter: [] for parameter in MonteCarlo.PARAMETERS} # type: dict[str,list[tuple[np.ndarray,Tolerance]]]
+
+
+    def __repr__(self) -> str:
+        return f'<MonteCarlo({self.network.root.name})>'
+
+
+    def vary(self, elements: "PowerComponent|PowerInput|PowerOutput|str|list|Ellipsis", parameter: str, tolerance: Tolerance):
+        """
+        Varies a <parameter> of the given <elements> (or of their names) with the given <tolerance>; each element varies
+        independently. Pass ... to vary the parameter of all elements that have it.
+        A later variation of the same parameter of an element replaces an earlier one.
+        """
+        if parameter not in MonteCarlo.PARAMETERS:
+            raise ValueError(f'Unknown parameter "{parameter}", expected one of {MonteCarlo.PARAMETERS}')
+        if elements is ...:
+            indices = self._all(parameter)
+        else:
+            if not isinstance(elements, (list, tuple)):
+                elements = [elements]
+            indices = [self._index(element, parameter) for element in elements]
+        self._variations[parameter].append((np.array(indices, dtype=np.int64), tolerance))
+
+
+    def _all(self, parameter: str) -> "list[int]":
+        network = self.network
+        network._gather()
+        if parameter == 'i_in':
+            return np.flatnonzero(network.comp_kind[network.in_comp] == KIND_GENERIC).tolist()
+        elif parameter == 'v_out':
+            return list(range(len(network.outputs)))
+        elif parameter == 'i_gnd':
+            return np.flatnonzero(network.comp_kind != KIND_GENERIC).tolist()
+        elif parameter == 'eff':
+            return network.dcdcs.tolist()
+        return np.flatnonzero(~np.isnan(network.r_th_ja)).tolist()
+
+
+    def _index(self, element: "PowerComponent|PowerInput|PowerOutput|str", parameter: str) -> int:
+        """Returns the position of the element in the arrays of the parameter (inputs, outputs or components)"""
+        network = self.network
+        if isinstance(element, str):
+            element = network.find(element)
+        if parameter == 'i_in':
+            input = element._get_input() if isinstance(element, PowerComponent) else element
+            n = network.index(input)
+            if network.comp_kind[network.in_comp[n]] != KIND_GENERIC:
+                raise ValueError(f'The input current of <{input.full_name()}> is calculated, and cannot be varied')
+            return n
+        if parameter == 'v_out':
+            return network.index(element._get_output() if isinstance(element, PowerComponent) else element)
+        if not isinstance(element, PowerComponent):
+            raise TypeError(f'Expected a component to vary {parameter}, got <{element}>')
+        c = network.index(element)
+        if parameter == 'i_gnd' and network.comp_kind[c] == KIND_GENERIC:
+            raise ValueError(f'<{element.name}> has no ground current')
+        if parameter == 'eff' and network.comp_kind[c] != KIND_DCDC:
+            raise ValueError(f'<{element.name}> is not a DC/DC converter')
+        if parameter == 'r_th_ja' and element.r_th_ja is None:
+            raise ValueError(f'<{element.name}> has no thermal resistance')
+        return c
+
+
+    def run(self, samples: int, seed: "int|None" = None, chunk_size: int = 10_000) -> MonteCarloResult:
+        """
+        Evaluates the given number of random samples. The samples are evaluated in chunks of <chunk_size>, which bounds the
+        memory that is used for intermediate results; the result itself holds 2 values per sample and component, plus 2 values
+        per sample and output (4 bytes each).
+        """
+        network = self.network
+        network._gather()
+        rng = np.random.default_rng(seed)
+        result = MonteCarloResult(network, samples)
+        labels, counts = [], []
+        failed = {} # type: dict[int,tuple[list,np.ndarray]] # id(elements) -> (elements, samples with any violation of each element)
+        for start in range(0, samples, chunk_size):
+            n = min(chunk_size, samples - start)
+            state = network._solve(**self._sample(rng, n))
+            chunk = slice(start, start + n)
+            result.p_diss[chunk], result.t_j[chunk] = state.p_diss, state.t_j
+            result.i_out[chunk], result.p_out[chunk] = state.i_out, state.p_out
+            result.ok[chunk] = True
+            violations = network._violations(state)
+            if len(counts) == 0:
+                labels = [(elements, msg) for elements, msg, _, _ in violations]
+                counts = [np.zeros(len(elements), dtype=np.int64) for elements, _, _, _ in violations]
+                failed = {id(elements): (elements, np.zeros(len(elements), dtype=np.int64)) for elements, _, _, _ in violations}
+            any_violated = {} # type: dict[int,np.ndarray]
+            for count, (elements, _, mask, _) in zip(counts, violations):
+                # without any variations, the state is that of a single sample
+                mask = np.broadcast_to(mask, (n,) + mask.shape[-1:])
+                count += np.count_nonzero(mask, axis=0)
+                result.ok[chunk] &= ~np.any(mask, axis=-1)
+                key = id(elements)
+                any_violated[key] = mask | any_violated[key] if key in any_violated else mask
+            for key, mask in any_violated.items():
+                _, count = failed[key]
+                count += np.count_nonzero(mask, axis=0)
+        result._failures = [(elements, msg, count) for (elements, msg), count in zip(labels, counts)]
+        result._element_failures = list(failed.values())
+        return result
+
+
+    def _sample(self, rng: "np.random.Generator", samples: int) -> "dict[str,np.ndarray]":
+        """Returns the varied parameters of the given number of samples, as keyword arguments of CompiledNetwork._solve()"""
+        network = self.network
+        nominal = dict(i_in=network.i_in_fixed, v_out=network.v_out, r_th_ja=network.r_th_ja,
+            i_gnd=np.zeros(len(network.components)), eff=np.ones(len(network.components)))
+        nominal['i_gnd'][network.ldos], nominal['i_gnd'][network.dcdcs] = network.ldo_i_gnd, network.dcdc_i_gnd
+
+        values = {}
+        for parameter, variations in self._variations.items():
+            if len(variations) == 0:
+                continue
+            values[parameter] = np.repeat(nominal[parameter][np.newaxis,:], samples, axis=0)
+            for indices, tolerance in variations:
+                values[parameter][:, indices] = tolerance.sample(nominal[parameter][indices], rng, samples)
+
+        kwargs = dict(i_in_fixed=values.get('i_in'), v_out=values.get('v_out'), r_th_ja=values.get('r_th_ja'))
+        if 'i_gnd' in values:
+            kwargs['ldo_i_gnd'], kwargs['dcdc_i_gnd'] = values['i_gnd'][:, network.ldos], values['i_gnd'][:, network.dcdcs]
+        if 'eff' in values:
+            kwargs['eff_scale'] = values['eff'][:, network.dcdcs]
+        return kwargs
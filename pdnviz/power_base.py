@@ -8,6 +8,15 @@ class PowerConfig:
     """Ambient temperature (for thermal calculations), in °C"""
     t_ambient: float = +20 # degrees C
 
+    """Directory for cached results (e.g. rendered graphs); None means a directory in the system's temp folder"""
+    cache_dir: "str|None" = None
+
+    """Max. size of each cache, in bytes; older entries are evicted first, and 0 disables caching"""
+    cache_max_bytes: int = 256 * 2**20
+
+    """Whether check(), get_hierarchy() and the exporters re-use cached results of unchanged networks by default"""
+    cache_results: bool = False
+
     _warning_handler = None # type: callable[tuple[PowerBaseElement, str], None]
 
 
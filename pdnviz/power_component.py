@@ -1,5 +1,5 @@
 ﻿from .power_base import PowerBaseElement, PowerConfig
-import logging, warnings
+import math, warnings
 from dataclasses import dataclass
 
 
@@ -72,10 +72,29 @@ class PowerHierarchyElement:
 
 
 
+def _topology_attribute(name: str) -> property:
+    """
+    An attribute that the topology depends on (e.g. the name registry on the names); changing its value invalidates all
+    cached topologies. The value is still stored in the instance dict, like the value of any other attribute.
+    """
+    def get(self):
+        return self.__dict__[name]
+    def set(self, value):
+        if name in self.__dict__ and self.__dict__[name] != value:
+            PowerComponent._topology_version += 1
+        self.__dict__[name] = value
+    return property(get, set)
+
+
+
 class PowerComponent(PowerBaseElement):
 
 
-    _names: "list[str]" = []
+    # incremented whenever any connection is made, or a name or group is changed, which invalidates all cached topologies
+    _topology_version: int = 0
+
+    name = _topology_attribute('name')
+    group = _topology_attribute('group')
 
 
     def __init__(self, name: str, *, group: "str|None" = None,
@@ -83,12 +102,11 @@ class PowerComponent(PowerBaseElement):
                  p_out_max: "float|None" = None, p_diss_max: "float|None" = None,
                  t_j_max: "float|None" = None, r_th_ja: "float|None" = None):
         super().__init__(name)
-        if name in PowerComponent._names:
-            warnings.warn(f'Duplicate name "{name}"')
-        PowerComponent._names.append(name)
         self.name, self.group, self._inputs, self._outputs, self.p_out_max, self.p_diss_max = name, group, inputs, outputs, p_out_max, p_diss_max
         self.t_j_max, self.r_th_ja = t_j_max, r_th_ja
         self.p_in_calc, self.p_diss_calc, self.p_out_calc, self.t_j_calc = None, None, None, None
+        self._topology = None # type: PowerTopology
+        self._reported_duplicates = set() # type: set[str]
     
 
     def __repr__(self) -> str:
@@ -117,11 +135,12 @@ class PowerComponent(PowerBaseElement):
 
     @staticmethod
     def clear_names():
-        """Call this before you want to re-define a network; otherwise you will get errors about duplicate names"""
-        PowerComponent._names = []
+        """Not needed anymore, as names are only checked within each network; kept for compatibility"""
+        pass
     
 
-    def add_sink(self, sink: "PowerComponent|PowerInput", source: "PowerOutput|None" = None) -> "PowerComponent|PowerInput":
+    def add_sink(self, sink: "PowerComponent|PowerInput", source: "PowerOutput|None" = None, r_series: "float|None" = None) -> "PowerComponent|PowerInput":
+        """Connects a sink to the given output (by default, to the only output); see PowerOutput.add_sink()"""
         if isinstance(sink, PowerInput):
             input = sink
         elif isinstance(sink, PowerComponent):
@@ -134,12 +153,11 @@ class PowerComponent(PowerBaseElement):
             output = self._get_output()
         else:
             raise TypeError()
-        output.add_sink(input)
+        output.add_sink(input, r_series)
         return sink
     
 
     def _verify_names(self):
-        logging.debug(f'Component({self.name})._verify_names()')
         input_names = [i.name for i in self._inputs]
         if len(input_names) != len(set(input_names)):
             raise RuntimeError(f'Component <{self.name}> has duplicate input names')
@@ -149,7 +167,6 @@ class PowerComponent(PowerBaseElement):
 
 
     def _update_downstream_components(self):
-        logging.debug(f'Component({self.name})._update_tree()')
         for output in self._outputs:
             for downstream_input in output._sinks:
                 downstream_input.parent.update()
@@ -173,21 +190,18 @@ class PowerComponent(PowerBaseElement):
 
     
     def _update_power(self):
-        logging.debug(f'Component({self.name})._update_power()')
         self.p_in_calc = sum([i.p_in_calc for i in self._inputs])
         self.p_out_calc = sum([o.p_out_calc for o in self._outputs])
         self.p_diss_calc = self.p_in_calc - self.p_out_calc
 
     
     def _update_thermal(self):
-        logging.debug(f'Component({self.name})._update_thermal()')
         self.t_j_calc = PowerConfig.t_ambient
         if self.r_th_ja is not None:
             self.t_j_calc += self.p_diss_calc * self.r_th_ja
 
 
     def update(self):
-        logging.debug(f'Component({self.name}).update()')
         self._update_downstream_components()
         self._verify_names()
         self._pre_update()
@@ -198,7 +212,6 @@ class PowerComponent(PowerBaseElement):
 
 
     def _check_tree(self, raise_severe_errors: bool):
-        logging.debug(f'Component({self.name})._check_tree()')
         if len(self._inputs)==0 and len(self._outputs)==0:
             self._warn(f'This component has no inputs and no outputs')
         for output in self._outputs:
@@ -210,7 +223,6 @@ class PowerComponent(PowerBaseElement):
 
     
     def _check(self, raise_severe_errors: bool):
-        logging.debug(f'Component({self.name})._check()')
         if self.p_out_max is not None:
             if self.p_out_calc > self.p_out_max:
                 self._warn(f'Max. output power exceeded')
@@ -222,11 +234,36 @@ class PowerComponent(PowerBaseElement):
                 self._warn(f'Max. junction temperature exceeded')
 
 
-    def check(self, raise_severe_errors: bool = False) -> bool:
-        logging.debug(f'Component({self.name}).check()')
+    def _update_cached(self, cache: "bool|None" = None):
+        """Updates the network, or loads the calculated values from the result cache (see check())"""
+        if not (PowerConfig.cache_results if cache is None else cache):
+            self.update()
+            return
+        from .result_cache import result_key, load_results, store_results
+        key = result_key(self, 'update')
+        if not load_results(self, key):
+            self.update()
+            store_results(self, key)
+
+
+    def check(self, raise_severe_errors: bool = False, cache: "bool|None" = None) -> bool:
+        """
+        Updates the network, and checks all limits. With <cache> (default: PowerConfig.cache_results), the results
+        and warnings of a network with the same topology and parameters are loaded from a persistent cache instead,
+        and the warnings are reported again; the cache is not used with <raise_severe_errors>.
+        """
+        self.get_topology() # reports duplicate names
+        cache = not raise_severe_errors and (PowerConfig.cache_results if cache is None else cache)
+        if cache:
+            from .result_cache import result_key, load_results, store_results
+            key = result_key(self, 'check')
+            if load_results(self, key, warnings=True):
+                return self.ok()
         self.update()
         self.clear_warnings()
         self._check_tree(raise_severe_errors)
+        if cache:
+            store_results(self, key)
         return self.ok()
     
 
@@ -245,16 +282,27 @@ class PowerComponent(PowerBaseElement):
         self._print_tree(0)
 
 
-    def get_hierarchy(self, grouped: bool = False) -> "list[PowerHierarchy]":
+    def get_hierarchy(self, grouped: bool = False, update: bool = True, cache: "bool|None" = None) -> "list[PowerHierarchy]":
+        """
+        Returns the hierarchy of the network (or of each group). The run time is linear in the number of components and
+        connections. Components with multiple inputs share a single list of connected sinks, so every sub-tree is
+        built only once; all lists are in a deterministic order.
+        Pass update=False if the calculated values are already up to date (e.g. after CompiledNetwork.apply()); with
+        <cache>, the values are loaded from the result cache if possible (see check()).
+        """
         
+        if update:
+            self._update_cached(cache)
+        topology = self.get_topology()
         if grouped:
-            groups = { g: self.get_all_components(g) for g in self.get_all_groups() }
+            groups = topology.components_by_group
         else:
-            groups = { Ellipsis: self.get_all_components() }
+            groups = { Ellipsis: topology.components }
         
         result = []
         for group, components in groups.items():
             
+            members = set(components)
             sources = self._find_sources(components)
 
             group_sources = []
@@ -269,32 +317,31 @@ class PowerComponent(PowerBaseElement):
                     i, p = source.i_out_calc, source.p_out_calc
                 group_sources.append(GroupSource(source, i, p))
             
-            def recurse(sinks: "list[PowerInput]") -> list[PowerHierarchyElement]:
-                result = []
-                for sink in set(sinks):
-                    downsteram_sources = self._find_downstream_sources([sink])
-                    downstream_sinks = self._find_sinks_connected_to(downsteram_sources, components)
-                    if len(downstream_sinks) > 0:
-                        connected_sinks = recurse(downstream_sinks)
-                    else:
-                        connected_sinks = []
-                    result.append(PowerHierarchyElement(sink, connected_sinks))
-                return result
-            hierarchy = recurse(self._find_sinks_connected_to(sources, components))
-
-            dissipating_components = list(set([c for c in components if not c.is_pure_source()]))
+            # the topology lists downstream components first, so the sinks of each component are complete before it is reached
+            elements = {} # type: dict[PowerInput,PowerHierarchyElement]
+            connected = {} # type: dict[PowerComponent,list[PowerHierarchyElement]]
+            def element(sink: "PowerInput") -> "PowerHierarchyElement":
+                if sink not in elements:
+                    elements[sink] = PowerHierarchyElement(sink, connected[sink.parent])
+                return elements[sink]
+            for component in components:
+                connected[component] = [element(sink) for output in component._outputs for sink in output._sinks if sink.parent in members]
+            hierarchy = [element(sink) for sink in self._find_sinks_connected_to(sources, components)]
+
+            dissipating_components = [c for c in components if not c.is_pure_source()]
             
             to_external = []
-            receivers = set()
             if grouped:
                 for source in self._find_local_supplies_to_external(components):
                     i, p = 0, 0
+                    receivers = []
                     for sink in source._sinks:
                         if sink.parent.group != group:
                             i += sink.i_in
                             p += sink.p_in_calc
-                            receivers.add(sink.parent.group)
-                    to_external.append(GroupSourceToExternal(source, list(receivers), i, p))
+                            if sink.parent.group not in receivers:
+                                receivers.append(sink.parent.group)
+                    to_external.append(GroupSourceToExternal(source, receivers, i, p))
             
             result.append(PowerHierarchy(group, group_sources, hierarchy, dissipating_components, to_external))
         return result
@@ -305,19 +352,40 @@ class PowerComponent(PowerBaseElement):
         
 
     def get_all_groups(self) -> "list[str]":
-        return list(set([c.group for c in self.get_all_components()]))
+        return list(self.get_topology().groups)
     
 
     def get_all_components(self, group: "str|Ellipsis" = ...) -> "list[PowerComponent]":
-        self.update()
-        result = []
-        for output in self._outputs:
-            for downstream_input in output._sinks:
-                result.extend(downstream_input.parent.get_all_components())
-        result.append(self)
+        """Returns each component of the network (or of the given group) exactly once; this does not update any values"""
+        topology = self.get_topology()
         if group is not ...:
-            result = [c for c in result if c.group == group]
-        return result
+            return list(topology.components_by_group.get(group, []))
+        return list(topology.components)
+    
+
+    def get_topology(self) -> "PowerTopology":
+        """
+        Returns the structural index of the network below this component; it is cached until any sink is added, or the
+        name or group of any component (or the name of any input) is changed
+        """
+        if self._topology is None or self._topology.version != PowerComponent._topology_version:
+            from .topology import PowerTopology
+            self._topology = PowerTopology(self, PowerComponent._topology_version)
+            for name in self._topology.duplicate_names:
+                if name not in self._reported_duplicates:
+                    self._reported_duplicates.add(name)
+                    warnings.warn(f'Duplicate name "{name}"')
+        return self._topology
+
+
+    def find(self, name: str) -> "PowerComponent":
+        """Returns the component with the given name, in the network below this component"""
+        return self.get_topology().find(name)
+
+
+    def find_input(self, full_name: str) -> "PowerInput":
+        """Returns the input with the given full name (i.e. "component / input"), in the network below this component"""
+        return self.get_topology().find_input(full_name)
     
 
     @staticmethod
@@ -327,16 +395,16 @@ class PowerComponent(PowerBaseElement):
         This only includes outputs that are either not in <components> itself (i.e.
         that come from the outside), or outputs of pure supplies (not converters).
         """
-        outputs = []
+        members = set(components)
+        outputs = {} # type: dict[PowerOutput,None]
         for component in components:
             for input in component._inputs:
                 driving_output = input.source
                 source_is_pure_supply = driving_output.parent.is_pure_source()
-                source_is_external = driving_output.parent not in components
+                source_is_external = driving_output.parent not in members
                 if source_is_pure_supply or source_is_external:
-                    if driving_output not in outputs:
-                        outputs.append(driving_output)
-        return outputs
+                    outputs[driving_output] = None
+        return list(outputs)
 
 
 
@@ -351,29 +419,31 @@ class PowerComponent(PowerBaseElement):
     @staticmethod
     def _find_sinks_connected_to(sources: "list[PowerOutput]", components: "list[PowerComponent]") -> "list[PowerInput]":
         """Returns all inputs that are connected to the given output in the given list of components"""
-        inputs = []
+        sources = set(sources)
+        inputs = {} # type: dict[PowerInput,None]
         for component in components:
             for input in component._inputs:
                 if input.source in sources:
-                    if input not in inputs:
-                        inputs.append(input)
-        return inputs
+                    inputs[input] = None
+        return list(inputs)
 
 
     @staticmethod
     def _find_local_supplies_to_external(components: "list[PowerComponent]") -> "list[PowerOutput]":
         """Returns all outputs that provide power to components that are not in the given list"""
-        outputs = []
+        members = set(components)
+        outputs = {} # type: dict[PowerOutput,None]
         for component in components:
             for output in component._outputs:
-                include = False
-                for input in output._sinks:
-                    if input.parent not in components:
-                        include = True
-                        break
-                if include and output not in outputs:
-                    outputs.append(output)
-        return outputs
+                if any(input.parent not in members for input in output._sinks):
+                    outputs[output] = None
+        return list(outputs)
+    
+    
+    def compile(self) -> "CompiledNetwork":
+        """Returns a flat, array-backed representation of the network below this component, which can be evaluated much faster"""
+        from .compiled import CompiledNetwork
+        return CompiledNetwork(self)
     
     
     def is_pure_source(self) -> bool:
@@ -394,9 +464,10 @@ class PowerComponent(PowerBaseElement):
 
 class PowerInput(PowerBaseElement):
 
+    name = _topology_attribute('name')
 
     def __init__(self, *, parent: "PowerComponent", name: "str|None" = None, v_in_min: "float|None" = None,
-        v_in_nom: "float|None" = None, v_in_max: "float|None" = None, i_in: float = 0):
+        v_in_nom: "float|None" = None, v_in_max: "float|None" = None, i_in: float = 0, r_series: float = 0):
         if name is None:
             if v_in_nom is None:
                 raise ValueError('Must specify either a name or a nominal input voltage')
@@ -404,6 +475,8 @@ class PowerInput(PowerBaseElement):
         super().__init__(name)
         self.parent = parent
         self.v_in_min, self.v_in_nom, self.v_in_max, self.i_in = v_in_min, v_in_nom, v_in_max, i_in
+        # resistance of the connection from the source (e.g. of a wire), in Ohm
+        self.r_series = r_series
         self.v_in_actual, self.p_in_calc = None, None
         self.source = None # type: PowerOutput
     
@@ -415,31 +488,47 @@ class PowerInput(PowerBaseElement):
     def _set_source(self, source: "PowerOutput"):
         if self.source is not None and self.source != source:
             raise RuntimeError('Cannot re-assign a different source')
-        logging.debug(f'Input({self.full_name()}) is now connected to Output({source.full_name()})')
         self.source = source
 
 
     def _pre_update(self):
-        logging.debug(f'Input({self.full_name()})._pre_update()')
         self.v_in_actual = self.source.v_out
 
 
     def _update(self):
-        logging.debug(f'Input({self.full_name()})._update()')
+        if self.r_series:
+            self.v_in_actual = self.source.v_out - self.r_series * self.i_in
         self.p_in_calc = abs(self.v_in_actual * self.i_in)
 
 
+    def _converter_voltage(self, i_gnd: float, p_conv: float) -> float:
+        """
+        Returns the input voltage of a converter that draws <i_gnd> plus the current to convert the power <p_conv>,
+        through the series resistance; NaN if the input voltage collapses
+        """
+        if not self.r_series:
+            return self.v_in_actual
+        # v_in = v_out - r*(i_gnd + p_conv/v_in); the root with the larger magnitude is the stable operating point
+        b = self.source.v_out - self.r_series * i_gnd
+        discriminant = b*b - 4 * self.r_series * p_conv
+        if discriminant < 0:
+            return math.nan
+        return (b + math.copysign(math.sqrt(discriminant), b)) / 2
+
+
     def _check(self, raise_severe_errors: bool) -> bool:
-        logging.debug(f'Input({self.full_name()})._check()')
+        # the limits apply to the voltage at the input, the nominal voltage to the source
         if self.v_in_min is not None:
-            if self.source.v_out < self.v_in_min:
+            if self.v_in_actual < self.v_in_min:
                 self._warn(f'Min. input voltage exceeded')
         if self.v_in_max is not None:
-            if self.source.v_out > self.v_in_max:
+            if self.v_in_actual > self.v_in_max:
                 self._warn(f'Max. input voltage exceeded')
         if self.v_in_min is None and self.v_in_max is None and self.v_in_nom is not None:
             if self.source.v_out != self.v_in_nom:
                 self._warn(f'Nom. input voltage violated', raise_severe_errors)
+        if self.r_series and math.isnan(self.v_in_actual):
+            self._warn(f'Input voltage collapses across the series resistance', raise_severe_errors)
         return self.ok()
     
 
@@ -473,7 +562,8 @@ class PowerOutput(PowerBaseElement):
         pass
 
 
-    def add_sink(self, sink: "PowerInput|PowerComponent") -> "PowerComponent|PowerInput":
+    def add_sink(self, sink: "PowerInput|PowerComponent", r_series: "float|None" = None) -> "PowerComponent|PowerInput":
+        """Connects a sink to this output; <r_series> is the resistance of the connection (e.g. of a wire), in Ohm"""
         if isinstance(sink, PowerInput):
             input = sink
         elif isinstance(sink, PowerComponent):
@@ -481,17 +571,18 @@ class PowerOutput(PowerBaseElement):
         else:
             raise ValueError()
         input._set_source(self)
+        if r_series is not None:
+            input.r_series = r_series
         self._sinks.append(input)
+        PowerComponent._topology_version += 1
         return sink
 
 
     def _pre_update(self):
-        logging.debug(f'Output({self.full_name()})._pre_update()')
         pass
 
 
     def _update(self):
-        logging.debug(f'Output({self.full_name()})._update()')
         self.i_out_calc = 0
         for sink in self._sinks:
             self.i_out_calc += sink.i_in
@@ -499,7 +590,6 @@ class PowerOutput(PowerBaseElement):
 
 
     def _check(self, raise_severe_errors: bool) -> bool:
-        logging.debug(f'Output({self.full_name()})._check()')
         sinks_ok = True
         self.clear_warnings()
         if self.p_out_max is not None:
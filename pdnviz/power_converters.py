@@ -1,6 +1,9 @@
 ﻿from .power_component import PowerComponent, PowerOutput, PowerInput
-import logging
-from scipy.interpolate import interp1d
+
+
+
+"""Max. number of iterations to find the input voltage of a DC/DC converter with an efficiency surface and a series resistance"""
+MAX_ITERATIONS = 50
 
 
 
@@ -25,14 +28,12 @@ class LDO(PowerComponent):
 
     
     def _update_inputs(self):
-        logging.debug(f'LDO({self.name})._update_inputs()')
         self.input.i_in = self.output.i_out_calc + self.i_gnd
         self.v_drop_calc = self.input.v_in_nom - self.output.v_out
         super()._update_inputs()
     
     
     def _check(self, raise_severe_errors: bool) -> bool:
-        logging.debug(f'LDO({self.name})._check()')
         super()._check(raise_severe_errors)
         if self.input.v_in_nom is not None and self.v_drop_min is not None:
             if self.input.v_in_nom < self.v_drop_min:
@@ -45,26 +46,86 @@ class DcDc(PowerComponent):
                 v_in_min: "float|None" = None, v_in_nom: "float|None" = None, v_in_max: "float|None" = None,
                 v_out: float, eff_pct_over_i_out: "dict[float,float]" = {}, i_gnd: float = 0,
                 i_out_max: "float|None" = None, p_diss_max: "float|None" = None,
-                t_j_max: "float|None" = None, r_th_ja: "float|None" = None):
+                t_j_max: "float|None" = None, r_th_ja: "float|None" = None,
+                eff_pct_over_i_out_v_in: "EfficiencySurface|dict[float,dict[float,float]]|None" = None):
         self.input = PowerInput(parent = self, v_in_min=v_in_min, v_in_nom=v_in_nom, v_in_max=v_in_max, i_in=0)
         self.output = PowerOutput(parent = self, v_out=v_out, i_out_max=i_out_max)
         super().__init__(name, group=group, inputs=[self.input], outputs=[self.output], p_diss_max=p_diss_max,
             t_j_max=t_j_max, r_th_ja=r_th_ja)
         self.eff_pct_over_i_out, self.i_gnd = eff_pct_over_i_out, i_gnd
+        self.eff_pct_over_i_out_v_in = eff_pct_over_i_out_v_in
     
 
     def __repr__(self) -> str:
         return f'<DcDc({self.name})>'
 
 
-    def _update_inputs(self):
-        logging.debug(f'DcDc({self.name})._update_conversion()')
-        if len(self.eff_pct_over_i_out.keys()) > 0:
-            intp = interp1d(x=list(self.eff_pct_over_i_out.keys()), y=list(self.eff_pct_over_i_out.values()), kind='linear', bounds_error=False, fill_value='extrapolate', assume_sorted=False)
-            self.eff_pct_calc = intp(self._outputs[0].i_out_calc)
+    @property
+    def eff_pct_over_i_out(self) -> "dict[float,float]":
+        return self._eff_pct_over_i_out
+
+
+    @eff_pct_over_i_out.setter
+    def eff_pct_over_i_out(self, value: "dict[float,float]"):
+        self._eff_pct_over_i_out = value
+        self._eff_points = ... # compiled on first use, so that numpy is only imported when needed
+
+
+    @property
+    def eff_pct_over_i_out_v_in(self) -> "EfficiencySurface|dict[float,dict[float,float]]|None":
+        """Efficiency over output current and input voltage, as an EfficiencySurface or as curves {v_in: {i_out: eff_pct}};
+        if given, eff_pct_over_i_out is ignored"""
+        return self._eff_pct_over_i_out_v_in
+
+
+    @eff_pct_over_i_out_v_in.setter
+    def eff_pct_over_i_out_v_in(self, value: "EfficiencySurface|dict[float,dict[float,float]]|None"):
+        self._eff_pct_over_i_out_v_in = value
+        self._eff_points = ...
+
+
+    def get_efficiency_curve(self) -> "EfficiencyCurve|EfficiencySurface|None":
+        """Returns the compiled efficiency curve (or surface), or None if no efficiency is defined (i.e. 100%)"""
+        surface = self._eff_pct_over_i_out_v_in
+        points = self._eff_pct_over_i_out if surface is None else surface
+        # compared with a copy of the points that the curve was compiled from, so that changes to the dicts themselves
+        #   are picked up as well; comparing dicts is cheap, compared to sorting their items on each update
+        if points is self._eff_points or points == self._eff_points:
+            return self._eff_curve
+        self._eff_surface = surface is not None
+        if surface is None:
+            if len(points) == 0:
+                self._eff_curve = None
+            else:
+                from .efficiency import EfficiencyCurve
+                self._eff_curve = EfficiencyCurve.get(points)
+            self._eff_points = dict(points)
+        elif isinstance(surface, dict):
+            from .efficiency import EfficiencySurface
+            self._eff_curve = EfficiencySurface.from_curves(surface)
+            self._eff_points = {v_in: dict(curve) for v_in, curve in surface.items()}
         else:
-            self.eff_pct_calc = 100
+            self._eff_curve = self._eff_points = surface
+        return self._eff_curve
+
+
+    def _update_inputs(self):
+        curve = self.get_efficiency_curve()
         self.output._update() # hack...
-        p_in = self.output.p_out_calc / (self.eff_pct_calc/100)
-        self.input.i_in = self.i_gnd + p_in / self._inputs[0].v_in_actual
+        surface = self._eff_surface
+        v_in = self.input.v_in_actual
+        # with a surface, the efficiency depends on the input voltage, which depends on the efficiency if there is a
+        #   series resistance; this converges quickly, as the efficiency only changes slowly with the input voltage
+        for _ in range(MAX_ITERATIONS if surface and self.input.r_series else 1):
+            if curve is None:
+                self.eff_pct_calc = 100
+            elif surface:
+                self.eff_pct_calc = float(curve(self.output.i_out_calc, v_in))
+            else:
+                self.eff_pct_calc = float(curve(self.output.i_out_calc))
+            p_in = self.output.p_out_calc / (self.eff_pct_calc/100)
+            v_in, v_prev = self.input._converter_voltage(self.i_gnd, p_in), v_in
+            if not abs(v_in - v_prev) > 1e-12 * abs(v_in):
+                break
+        self.input.i_in = self.i_gnd + p_in / v_in
         super()._update_inputs()
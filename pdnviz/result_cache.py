@@ -0,0 +1,103 @@
+from .power_base import PowerConfig
+from .cache import DiskCache, get_cache
+from .efficiency import EfficiencySurface
+import hashlib, os, tempfile
+
+
+
+"""Version of the stored results; increment it whenever the calculations change, so that older entries are not used"""
+CACHE_VERSION = 1
+
+_PRIMITIVES = (bool, int, float, str, type(None))
+
+# (class, attribute names, attribute types) -> names of the parameters; instances of a class usually share these
+_parameter_names = {} # type: dict[tuple,tuple[str]]
+
+
+
+def _parameters(element) -> tuple:
+    """Returns the parameters of an element, i.e. its plain attributes, except for the calculated ones"""
+    attributes = vars(element)
+    key = (type(element), tuple(attributes), tuple(map(type, attributes.values())))
+    names = _parameter_names.get(key)
+    if names is None:
+        names = tuple(name for name, value in attributes.items()
+            if not name.endswith('_calc') and name != 'v_in_actual'
+            # e.g. the efficiency curve of a DcDc is stored in a private dict (or surface)
+            and (isinstance(value, (dict, EfficiencySurface)) or (not name.startswith('_') and isinstance(value, _PRIMITIVES))))
+        _parameter_names[key] = names
+    return tuple((name, _value(value)) for name, value in zip(names, map(attributes.__getitem__, names)))
+
+
+def _value(value) -> object:
+    """Returns a representation of a parameter that does not depend on the order of dict items"""
+    if isinstance(value, dict):
+        return sorted((k, _value(v)) for k, v in value.items())
+    if isinstance(value, EfficiencySurface):
+        return value.key()
+    return value
+
+
+def network_hash(root: "PowerComponent") -> str:
+    """
+    Returns a stable hash of the network below <root>: its topology, the parameters of all components, inputs and
+    outputs (including efficiency curves), and PowerConfig.t_ambient. Calculated values do not affect the hash.
+    """
+    topology = root.get_topology()
+    hash = hashlib.sha256(repr((CACHE_VERSION, PowerConfig.t_ambient)).encode('utf-8'))
+    for component in topology.components:
+        parameters = _parameters(component)
+        hash.update(repr((type(component).__module__, type(component).__qualname__, parameters)).encode('utf-8'))
+    for input in topology.inputs:
+        parameters = _parameters(input)
+        if len(input.parent._outputs) > 0:
+            # the input current of a converter is calculated from its outputs
+            parameters = tuple((name, value) for name, value in parameters if name != 'i_in')
+        source = topology.output_index.get(input.source)
+        if source is None:
+            source = (input.source.full_name(), input.source.v_out) # driven from outside of the network
+        hash.update(repr((topology.component_index[input.parent], source, parameters)).encode('utf-8'))
+    for output in topology.outputs:
+        sinks = [topology.input_index[sink] for sink in output._sinks]
+        hash.update(repr((topology.component_index[output.parent], sinks, _parameters(output))).encode('utf-8'))
+    return hash.hexdigest()
+
+
+def result_key(root: "PowerComponent", kind: str) -> str:
+    """Returns the cache key of the results of the given <kind> (e.g. 'update' or 'check') for the network below <root>"""
+    return DiskCache.key(network_hash(root), kind)
+
+
+def load_results(root: "PowerComponent", key: str, warnings: bool = False) -> bool:
+    """
+    Writes the cached results with the given <key> into the network below <root> (with <warnings>, also the
+    warnings, which are reported like during check()). Returns False if there is no such entry.
+    """
+    cache = get_cache('results')
+    if cache is None:
+        return False
+    path = cache.get(key, '.pdnsnap')
+    if path is None:
+        return False
+    from .snapshot import Snapshot
+    try:
+        snapshot = Snapshot(path, mmap=False)
+    except FileNotFoundError:
+        return False # evicted by another process in the meantime
+    snapshot.apply(root, warnings=warnings)
+    return True
+
+
+def store_results(root: "PowerComponent", key: str):
+    """Stores the calculated values and warnings of the network below <root> under the given <key>"""
+    cache = get_cache('results')
+    if cache is None:
+        return
+    from .snapshot import Snapshot
+    fd, path = tempfile.mkstemp(suffix='.pdnsnap')
+    os.close(fd)
+    try:
+        Snapshot.save(root, path)
+        cache.put(key, path, '.pdnsnap')
+    finally:
+        os.remove(path)
@@ -0,0 +1,395 @@
+from .power_base import PowerConfig
+from .power_component import PowerComponent, PowerInput, PowerOutput
+from .power_converters import LDO, DcDc
+from .power_sources import Supply
+from .efficiency import EfficiencySurface
+import json
+import numpy as np
+
+
+
+KIND_GENERIC, KIND_LDO, KIND_DCDC = 0, 1, 2
+ELEMENT_COMPONENT, ELEMENT_INPUT, ELEMENT_OUTPUT = 0, 1, 2
+
+
+
+class StringColumn:
+    """A column of strings (e.g. names), stored as UTF-8 data plus offsets; strings are only decoded when accessed"""
+
+
+    def __init__(self, offsets: "np.ndarray", data: "np.ndarray"):
+        self._offsets, self._data = offsets, data
+        self._index = None # type: dict[str,int]
+
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+
+    def __getitem__(self, n: int) -> str:
+        if n < 0:
+            n += len(self)
+        return bytes(self._data[self._offsets[n]:self._offsets[n+1]]).decode('utf-8')
+
+
+    def __iter__(self):
+        for n in range(len(self)):
+            yield self[n]
+
+
+    def index(self, text: str) -> int:
+        """Returns the position of the first occurrence of <text>; the lookup table is built on first use"""
+        if self._index is None:
+            self._index = {}
+            for n, s in enumerate(self):
+                self._index.setdefault(s, n)
+        if text not in self._index:
+            raise KeyError(text)
+        return self._index[text]
+
+
+    @staticmethod
+    def encode(strings: "list[str]") -> "tuple[np.ndarray,np.ndarray]":
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.cumsum([0] + [len(e) for e in encoded], dtype=np.int64)
+        return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+
+class Snapshot:
+    """
+    An evaluated network (structure, parameters, calculated values and warnings), stored as a compact columnar binary
+    file. Create one with Snapshot.save(root, path), and open it with Snapshot(path); the columns are memory-mapped,
+    and only read when they are accessed, so even huge files open instantly:
+
+        snapshot = Snapshot('release.pdnsnap')
+        p_diss = snapshot.column('comp.p_diss_calc')[snapshot.find('LDO 3.3V')]
+
+    Components, inputs and outputs are stored in the order of the network's topology index. Numbers that were not
+    specified (None) are stored as NaN. restore() re-creates the network (as PowerComponent, LDO and DcDc objects),
+    e.g. to export it again without the script that originally defined it.
+
+    File layout: magic, header size (uint64), JSON header, then each column as a raw little-endian array, aligned
+    to 64 bytes. The header lists the dtype, shape and offset of each column.
+    """
+
+    MAGIC = b'PDNSNAP1'
+    ALIGNMENT = 64
+
+
+    def __init__(self, path: str, mmap: bool = True):
+        self.path, self.mmap = path, mmap
+        with open(path, 'rb') as file:
+            if file.read(len(Snapshot.MAGIC)) != Snapshot.MAGIC:
+                raise ValueError(f'<{path}> is not a PDN snapshot')
+            header_size = int.from_bytes(file.read(8), 'little')
+            self.header = json.loads(file.read(header_size).decode('utf-8'))
+        self._data_offset = Snapshot._align(len(Snapshot.MAGIC) + 8 + header_size)
+        self._columns = {} # type: dict[str,np.ndarray]
+        self._strings = {} # type: dict[str,StringColumn]
+
+
+    def __repr__(self) -> str:
+        return f'<Snapshot({self.root_name}, {len(self)} components)>'
+
+
+    def __len__(self) -> int:
+        return self.header['counts']['components']
+
+
+    @property
+    def root_name(self) -> str:
+        return self.header['root']
+
+
+    @property
+    def t_ambient(self) -> float:
+        """PowerConfig.t_ambient at the time the snapshot was saved"""
+        return self.header['t_ambient']
+
+
+    @property
+    def columns(self) -> "list[str]":
+        return list(self.header['columns'])
+
+
+    def column(self, name: str) -> "np.ndarray":
+        """Returns a (read-only) column"""
+        if name not in self._columns:
+            info = self.header['columns'][name]
+            dtype, shape, offset = np.dtype(info['dtype']), tuple(info['shape']), self._data_offset + info['offset']
+            if int(np.prod(shape)) == 0:
+                array = np.empty(shape, dtype=dtype)
+            elif self.mmap:
+                array = np.memmap(self.path, dtype=dtype, mode='r', offset=offset, shape=shape)
+            else:
+                with open(self.path, 'rb') as file:
+                    file.seek(offset)
+                    array = np.fromfile(file, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+                array.flags.writeable = False
+            self._columns[name] = array
+        return self._columns[name]
+
+
+    def strings(self, name: str) -> StringColumn:
+        """Returns a string column, e.g. 'comp.name', 'comp.group', 'in.name' or 'out.name'"""
+        if name not in self._strings:
+            self._strings[name] = StringColumn(self.column(name + '.offsets'), self.column(name + '.data'))
+        return self._strings[name]
+
+
+    def find(self, name: str) -> int:
+        """Returns the position of the component with the given name"""
+        return self.strings('comp.name').index(name)
+
+
+    def warnings(self) -> "list[tuple[str,str]]":
+        """Returns all warnings, as (element, message)"""
+        messages = self.header['messages']
+        names = {ELEMENT_COMPONENT: self.strings('comp.name'), ELEMENT_INPUT: self.strings('in.name'), ELEMENT_OUTPUT: self.strings('out.name')}
+        result = []
+        for kind, index, message in zip(self.column('warn.kind').tolist(), self.column('warn.index').tolist(), self.column('warn.message').tolist()):
+            name = names[kind][index]
+            if kind != ELEMENT_COMPONENT:
+                parent = self.column('in.comp' if kind == ELEMENT_INPUT else 'out.comp')[index]
+                name = f'{self.strings("comp.name")[parent]} / {name}'
+            result.append((name, messages[message]))
+        return result
+
+
+    @staticmethod
+    def _align(offset: int) -> int:
+        return -(-offset // Snapshot.ALIGNMENT) * Snapshot.ALIGNMENT
+
+
+    @staticmethod
+    def save(root: "PowerComponent", path: str):
+        """Stores the network below <root>, with the values of the last evaluation (this does not update the network)"""
+
+        topology = root.get_topology()
+        components, inputs, outputs = topology.components, topology.inputs, topology.outputs
+
+        def values(items, attr):
+            return np.array([np.nan if getattr(x, attr, None) is None else getattr(x, attr) for x in items], dtype=np.float64)
+
+        def nominal(input: "PowerInput"):
+            try:
+                return float(input.v_in_nom)
+            except (TypeError, ValueError):
+                return np.nan
+
+        kinds = np.array([KIND_LDO if isinstance(c, LDO) else KIND_DCDC if isinstance(c, DcDc) else KIND_GENERIC for c in components], dtype=np.int8)
+        curves = [c.get_efficiency_curve() if isinstance(c, DcDc) else None for c in components]
+        # surfaces are stored once each, as the size of each axis (0 for no temperature axis), the axes, and the flat grid
+        surfaces, surface_index = {}, [] # type: dict[EfficiencySurface,int], list[int]
+        for n, curve in enumerate(curves):
+            if isinstance(curve, EfficiencySurface):
+                surface_index.append(surfaces.setdefault(curve, len(surfaces)))
+                curves[n] = None
+            else:
+                surface_index.append(-1)
+        columns = {
+            'comp.kind': kinds,
+            'comp.has_group': np.array([c.group is not None for c in components], dtype=bool),
+            'comp.in_ptr': np.cumsum([0] + [len(c._inputs) for c in components], dtype=np.int64),
+            'comp.out_ptr': np.cumsum([0] + [len(c._outputs) for c in components], dtype=np.int64),
+            'comp.p_out_max': values(components, 'p_out_max'),
+            'comp.p_diss_max': values(components, 'p_diss_max'),
+            'comp.t_j_max': values(components, 't_j_max'),
+            'comp.r_th_ja': values(components, 'r_th_ja'),
+            'comp.i_gnd': values(components, 'i_gnd'),
+            'comp.v_drop_min': values(components, 'v_drop_min'),
+            'comp.curve_ptr': np.cumsum([0] + [0 if c is None else len(c.i_out) for c in curves], dtype=np.int64),
+            'curve.i_out': np.concatenate([[]] + [c.i_out for c in curves if c is not None]).astype(np.float64),
+            'curve.eff_pct': np.concatenate([[]] + [c.eff_pct for c in curves if c is not None]).astype(np.float64),
+            'comp.surface': np.array(surface_index, dtype=np.int64),
+            'surface.shape': np.array([[len(axis) for axis in s.axes] + [0] * (3 - len(s.axes)) for s in surfaces], dtype=np.int64).reshape(-1, 3),
+            'surface.axes': np.concatenate([[]] + [axis for s in surfaces for axis in s.axes]).astype(np.float64),
+            'surface.eff_pct': np.concatenate([[]] + [s.eff_pct.ravel() for s in surfaces]).astype(np.float64),
+            'comp.p_in_calc': values(components, 'p_in_calc'),
+            'comp.p_out_calc': values(components, 'p_out_calc'),
+            'comp.p_diss_calc': values(components, 'p_diss_calc'),
+            'comp.t_j_calc': values(components, 't_j_calc'),
+            'comp.v_drop_calc': values(components, 'v_drop_calc'),
+            'comp.eff_pct_calc': values(components, 'eff_pct_calc'),
+
+            'in.comp': np.array([topology.component_index[i.parent] for i in inputs], dtype=np.int64),
+            # inputs that are driven from outside of the network have no source index (-1)
+            'in.source': np.array([topology.output_index.get(i.source, -1) for i in inputs], dtype=np.int64),
+            'in.v_ext': np.array([i.source.v_out if i.source not in topology.output_index else np.nan for i in inputs], dtype=np.float64),
+            'in.v_in_min': values(inputs, 'v_in_min'),
+            'in.v_in_nom': np.array([nominal(i) for i in inputs], dtype=np.float64),
+            'in.v_in_max': values(inputs, 'v_in_max'),
+            'in.i_in': values(inputs, 'i_in'),
+            'in.r_series': values(inputs, 'r_series'),
+            'in.v_in_actual': values(inputs, 'v_in_actual'),
+            'in.p_in_calc': values(inputs, 'p_in_calc'),
+
+            'out.comp': np.array([topology.component_index[o.parent] for o in outputs], dtype=np.int64),
+            'out.sink_ptr': np.cumsum([0] + [len(o._sinks) for o in outputs], dtype=np.int64),
+            'out.sink_index': np.array([topology.input_index[i] for o in outputs for i in o._sinks], dtype=np.int64),
+            'out.v_out': values(outputs, 'v_out'),
+            'out.i_out_max': values(outputs, 'i_out_max'),
+            'out.p_out_max': values(outputs, 'p_out_max'),
+            'out.i_out_calc': values(outputs, 'i_out_calc'),
+            'out.p_out_calc': values(outputs, 'p_out_calc'),
+        }
+        for name, strings in [('comp.name', [c.name for c in components]), ('comp.group', [c.group or '' for c in components]),
+                              ('in.name', [i.name for i in inputs]), ('out.name', [o.name for o in outputs])]:
+            columns[name + '.offsets'], columns[name + '.data'] = StringColumn.encode(strings)
+
+        messages, warn_kind, warn_index, warn_message = {}, [], [], [] # type: dict[str,int]
+        for kind, elements in [(ELEMENT_COMPONENT, components), (ELEMENT_INPUT, inputs), (ELEMENT_OUTPUT, outputs)]:
+            for n, element in enumerate(elements):
+                for message in element._warnings:
+                    warn_kind.append(kind)
+                    warn_index.append(n)
+                    warn_message.append(messages.setdefault(message, len(messages)))
+        columns['warn.kind'] = np.array(warn_kind, dtype=np.int8)
+        columns['warn.index'] = np.array(warn_index, dtype=np.int64)
+        columns['warn.message'] = np.array(warn_message, dtype=np.int32)
+
+        column_info, offset = {}, 0
+        for name, array in columns.items():
+            array = columns[name] = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+            column_info[name] = dict(dtype=array.dtype.str, shape=list(array.shape), offset=offset)
+            offset = Snapshot._align(offset + array.nbytes)
+        header = json.dumps(dict(
+            version=1, root=root.name, t_ambient=PowerConfig.t_ambient,
+            counts=dict(components=len(components), inputs=len(inputs), outputs=len(outputs)),
+            messages=list(messages), columns=column_info,
+        )).encode('utf-8')
+
+        with open(path, 'wb') as file:
+            file.write(Snapshot.MAGIC)
+            file.write(len(header).to_bytes(8, 'little'))
+            file.write(header)
+            start = Snapshot._align(file.tell())
+            for name, array in columns.items():
+                file.write(b'\0' * (start + column_info[name]['offset'] - file.tell()))
+                file.write(array.tobytes())
+
+
+    def restore(self) -> "PowerComponent":
+        """
+        Re-creates the network, with all parameters, calculated values and warnings, and returns its root. LDOs and DC/DC
+        converters are restored as such; all other components become plain PowerComponent objects. Inputs that were
+        driven from outside of the network are connected to a separate Supply (which is not part of the network).
+        """
+
+        def number(value: float) -> "float|None":
+            return None if np.isnan(value) else value
+
+        def col(name: str) -> list:
+            return self.column(name).tolist()
+
+        comp_names, groups, has_group = self.strings('comp.name'), self.strings('comp.group'), col('comp.has_group')
+        in_names, out_names = self.strings('in.name'), self.strings('out.name')
+        kinds, in_ptr, out_ptr, curve_ptr = col('comp.kind'), col('comp.in_ptr'), col('comp.out_ptr'), col('comp.curve_ptr')
+        p_out_max, p_diss_max, t_j_max, r_th_ja = col('comp.p_out_max'), col('comp.p_diss_max'), col('comp.t_j_max'), col('comp.r_th_ja')
+        i_gnd, v_drop_min = col('comp.i_gnd'), col('comp.v_drop_min')
+        curve_i_out, curve_eff_pct = col('curve.i_out'), col('curve.eff_pct')
+        v_in_min, v_in_nom, v_in_max, i_in = col('in.v_in_min'), col('in.v_in_nom'), col('in.v_in_max'), col('in.i_in')
+        v_out, i_out_max, out_p_out_max = col('out.v_out'), col('out.i_out_max'), col('out.p_out_max')
+
+        surfaces = [] # type: list[EfficiencySurface]
+        surface_index, axes, eff_pct = col('comp.surface'), self.column('surface.axes'), self.column('surface.eff_pct')
+        axes_start, grid_start = 0, 0
+        for shape in col('surface.shape'):
+            shape = [size for size in shape if size > 0]
+            axes_ptr = np.cumsum([axes_start] + shape)
+            grid = np.array(eff_pct[grid_start:grid_start + int(np.prod(shape))]).reshape(shape)
+            points = [np.array(axes[axes_ptr[d]:axes_ptr[d+1]]) for d in range(len(shape))]
+            surfaces.append(EfficiencySurface.get(points[0], points[1], grid, points[2] if len(points) > 2 else None))
+            axes_start, grid_start = int(axes_ptr[-1]), grid_start + grid.size
+
+        components, inputs, outputs = [], [], [] # type: list[PowerComponent], list[PowerInput], list[PowerOutput]
+        for c in range(len(comp_names)):
+            name, group = comp_names[c], (groups[c] if has_group[c] else None)
+            ins, outs = range(in_ptr[c], in_ptr[c+1]), range(out_ptr[c], out_ptr[c+1])
+            limits = dict(p_diss_max=number(p_diss_max[c]), t_j_max=number(t_j_max[c]), r_th_ja=number(r_th_ja[c]))
+            if kinds[c] == KIND_LDO:
+                component = LDO(name, group=group, v_in_min=number(v_in_min[ins[0]]), v_in_nom=number(v_in_nom[ins[0]]), v_in_max=number(v_in_max[ins[0]]),
+                    v_drop_min=number(v_drop_min[c]), v_out=v_out[outs[0]], i_gnd=i_gnd[c], i_out_max=number(i_out_max[outs[0]]), **limits)
+            elif kinds[c] == KIND_DCDC:
+                curve = range(curve_ptr[c], curve_ptr[c+1])
+                component = DcDc(name, group=group, v_in_min=number(v_in_min[ins[0]]), v_in_nom=number(v_in_nom[ins[0]]), v_in_max=number(v_in_max[ins[0]]),
+                    v_out=v_out[outs[0]], eff_pct_over_i_out={curve_i_out[k]: curve_eff_pct[k] for k in curve}, i_gnd=i_gnd[c],
+                    i_out_max=number(i_out_max[outs[0]]), **limits,
+                    eff_pct_over_i_out_v_in=surfaces[surface_index[c]] if surface_index[c] >= 0 else None)
+            else:
+                component = PowerComponent.__new__(PowerComponent)
+                PowerComponent.__init__(component, name, group=group, p_out_max=number(p_out_max[c]), **limits,
+                    inputs=[PowerInput(parent=component, name=in_names[n], v_in_min=number(v_in_min[n]), v_in_nom=number(v_in_nom[n]),
+                        v_in_max=number(v_in_max[n]), i_in=i_in[n]) for n in ins],
+                    outputs=[PowerOutput(parent=component, name=out_names[n], v_out=v_out[n], i_out_max=number(i_out_max[n]),
+                        p_out_max=number(out_p_out_max[n])) for n in outs])
+            # names and limits that the constructors of converters do not take
+            component.p_out_max = number(p_out_max[c])
+            for n, input in zip(ins, component._inputs):
+                input.name = in_names[n]
+            for n, output in zip(outs, component._outputs):
+                output.name, output.p_out_max = out_names[n], number(out_p_out_max[n])
+            components.append(component)
+            inputs.extend(component._inputs)
+            outputs.extend(component._outputs)
+
+        for input, r_series in zip(inputs, col('in.r_series')):
+            input.r_series = r_series
+
+        sink_ptr, sink_index = col('out.sink_ptr'), col('out.sink_index')
+        for o, output in enumerate(outputs):
+            for k in range(sink_ptr[o], sink_ptr[o+1]):
+                output.add_sink(inputs[sink_index[k]])
+        for n, v_ext in zip(np.flatnonzero(self.column('in.source') < 0).tolist(), self.column('in.v_ext')[self.column('in.source') < 0].tolist()):
+            Supply(f'External Supply of {inputs[n].full_name()}', v_ext).add_sink(inputs[n])
+
+        # the components are stored in topological order, i.e. the root comes last
+        root = components[-1]
+        self.apply(root, report=False)
+        return root
+
+
+    def apply(self, root: "PowerComponent", warnings: bool = True, report: bool = True):
+        """
+        Writes the stored calculated values into the network below <root>, which must have the same structure as the stored
+        one. With <warnings>, the warnings of all elements are replaced by the stored ones; with <report>, they are also
+        reported like during check().
+        """
+
+        def number(value: float) -> "float|None":
+            return None if value != value else value # NaN
+
+        def col(name: str) -> list:
+            return self.column(name).tolist()
+
+        topology = root.get_topology()
+        components, inputs, outputs = topology.components, topology.inputs, topology.outputs
+        counts = self.header['counts']
+        if (len(components), len(inputs), len(outputs)) != (counts['components'], counts['inputs'], counts['outputs']):
+            raise ValueError(f'The network of <{root.name}> does not match the snapshot')
+
+        kinds = col('comp.kind')
+        for component, values in zip(components, zip(col('comp.p_in_calc'), col('comp.p_out_calc'), col('comp.p_diss_calc'), col('comp.t_j_calc'))):
+            component.p_in_calc, component.p_out_calc, component.p_diss_calc, component.t_j_calc = [number(v) for v in values]
+        for component, kind, v_drop, eff_pct in zip(components, kinds, col('comp.v_drop_calc'), col('comp.eff_pct_calc')):
+            if kind == KIND_LDO:
+                component.v_drop_calc = number(v_drop)
+            elif kind == KIND_DCDC:
+                component.eff_pct_calc = number(eff_pct)
+        for input, i, v, p in zip(inputs, col('in.i_in'), col('in.v_in_actual'), col('in.p_in_calc')):
+            input.i_in, input.v_in_actual, input.p_in_calc = i, number(v), number(p)
+        for output, i, p in zip(outputs, col('out.i_out_calc'), col('out.p_out_calc')):
+            output.i_out_calc, output.p_out_calc = number(i), number(p)
+
+        if not warnings:
+            return
+        for element in components + inputs + outputs:
+            element.clear_warnings()
+        messages = self.header['messages']
+        elements = {ELEMENT_COMPONENT: components, ELEMENT_INPUT: inputs, ELEMENT_OUTPUT: outputs}
+        for kind, index, message in zip(col('warn.kind'), col('warn.index'), col('warn.message')):
+            if report:
+                elements[kind][index]._warn(messages[message])
+            else:
+                elements[kind][index]._warnings.append(messages[message])
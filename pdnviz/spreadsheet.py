@@ -4,29 +4,163 @@ from .power_sources import Supply, MultiSupply, DualSupply
 from .power_sinks import Load, MultiLoad, DualLoad
 from .power_converters import LDO, DcDc
 from .systools import get_tempfile_path, open_file, ensure_directories
-import openpyxl, datetime, os, subprocess, tempfile
+from .cache import DiskCache, get_cache
+from .hooks import module_imported
+import openpyxl, datetime, os, subprocess, tempfile, warnings
+
+
+class _SheetWriter:
+    """
+    Wraps a worksheet, so that the tables can be written the same way in regular and in streaming (write-only) mode.
+    In streaming mode, rows must be written in ascending order; each row is sent to the file as soon as a later row is
+    accessed, so only a single row is held in memory.
+    """
+
+
+    def __init__(self, sheet: "openpyxl.worksheet.worksheet.Worksheet", streaming: bool):
+        self.sheet, self.streaming = sheet, streaming
+        self._row, self._cells = 1, {} # type: int, dict[int,openpyxl.cell.Cell]
+    
+
+    def __getattr__(self, name: str):
+        return getattr(self.sheet, name)
+
+
+    def cell(self, row: int, col: int) -> "openpyxl.cell.Cell":
+        if not self.streaming:
+            return self.sheet.cell(row, col)
+        if row < self._row:
+            raise RuntimeError(f'Row {row} was already written')
+        if row > self._row:
+            self._flush(row)
+        if col not in self._cells:
+            self._cells[col] = openpyxl.cell.WriteOnlyCell(self.sheet)
+            self._cells[col].row, self._cells[col].column = row, col
+        return self._cells[col]
+    
+
+    def row_values(self, row: int, last_col: int) -> list:
+        """Returns the values of the given row (in streaming mode, this must be the current row)"""
+        if self.streaming and row != self._row:
+            raise RuntimeError(f'Row {row} is not the current row')
+        return [self.cell(row, col).value for col in range(1, last_col+1)]
+    
+
+    def set_outline_level(self, row: int, level: int):
+        if level > 0:
+            self.sheet.row_dimensions[row].outline_level = level
+    
+
+    def _flush(self, next_row: int):
+        if len(self._cells) > 0:
+            self.sheet.append([self._cells.get(col) for col in range(1, max(self._cells.keys())+1)])
+        else:
+            self.sheet.append([])
+        for _ in range(self._row+1, next_row):
+            self.sheet.append([])
+        self._row, self._cells = next_row, {}
+    
+
+    def close(self):
+        if self.streaming and len(self._cells) > 0:
+            self._flush(self._row+1)
+
 
 
 class PowerSpreadsheet:
 
 
-    def __init__(self, pdn: "PowerComponent", title: str = None, grouped: bool = False):
+    def __init__(self, pdn: "PowerComponent|CompiledNetwork", title: str = None, grouped: bool = False, streaming: bool = False, comments: bool = True,
+                 scenarios: "NetworkState|None" = None, scenario_names: "list[str]|None" = None, cache: "bool|None" = None):
+        """
+        Creates a spreadsheet of the given PDN. With <streaming>, the workbook is written in write-only mode, which
+        keeps the memory usage bounded for very large networks; such a spreadsheet is written when it is saved for the
+        first time, subsequent calls of save() or view() write the same content again.
+        Without <comments>, limits (e.g. max. currents) are written into additional columns instead of cell comments,
+        which is faster and results in much smaller files for large networks.
+        <scenarios> is the result of CompiledNetwork.evaluate_scenarios(); then the workbook contains a comparison of
+        all scenarios, plus the regular sheets for each scenario. Afterwards, the objects hold the calculated values of the
+        last scenario, while the currents of the loads are restored.
+        With <cache> (default: PowerConfig.cache_results), a workbook that was created before from an identical network
+        (without scenarios, also with the same warnings), the same scenarios and the same options is copied from a
+        persistent cache; such a workbook has the timestamp of its first creation. Without scenarios, the objects are
+        still updated.
+        """
 
         if title is None: title = 'PDN'
         
-        self.title, self.grouped = title, grouped
+        self.title, self.grouped, self.streaming, self.comments = title, grouped, streaming, comments
 
-        self._wb = openpyxl.Workbook()
+        self._wb = openpyxl.Workbook(write_only=streaming)
         self.initial_sheets = self._wb.sheetnames
         self._define_formats()
         self._problems = []
         self._sheets = {}
         self._title_sheet = None
+        self._saved_bytes = None # type: bytes|None
+        self._scenario = None # type: str|None
+        self._leading_sheets = 0
+        self._cache, self._cache_key = None, None
+        self._table_names = set() # type: set[str]
+
+        if PowerConfig.cache_results if cache is None else cache:
+            self._cache = get_cache('spreadsheets')
+        if self._cache is not None:
+            root = pdn if isinstance(pdn, PowerComponent) else pdn.root
+            self._cache_key = self._get_cache_key(root, scenarios, scenario_names)
+            cached_path = self._cache.get(self._cache_key, '.xlsx')
+            if cached_path is not None:
+                # read right away, as the entry may be evicted before the workbook is saved
+                try:
+                    with open(cached_path, 'rb') as file:
+                        self._saved_bytes = file.read()
+                except FileNotFoundError:
+                    pass # evicted in the meantime, so the workbook is created as if it was not cached
+            if self._saved_bytes is not None:
+                if scenarios is None:
+                    root._update_cached(cache)
+                else:
+                    from .compiled import CompiledNetwork
+                    network = pdn if isinstance(pdn, CompiledNetwork) else pdn.compile()
+                    network._gather()
+                    i_in = network.get_load_currents()
+                    network.apply(scenarios, len(scenarios.p_diss) - 1)
+                    network.set_load_currents(i_in)
+                return
+        
+        if scenarios is not None:
+            from .compiled import CompiledNetwork
+            network = pdn if isinstance(pdn, CompiledNetwork) else pdn.compile()
+            # the limits are read from the objects, also if the network was not evaluated before
+            network._gather()
+            if scenario_names is None:
+                scenario_names = [f'Scenario {n+1}' for n in range(len(scenarios.p_diss))]
+            if len(scenario_names) != len(scenarios.p_diss) or scenarios.p_diss.shape[-1] != len(network.components):
+                raise ValueError('The scenarios do not match the network or the scenario names')
+            self._add_comparison_sheet(network, scenarios, scenario_names)
+            pdn = network.root
+        elif not isinstance(pdn, PowerComponent):
+            pdn = pdn.root
         
         hierarchies = pdn.get_hierarchy(grouped=self.grouped)
         self.all_groups = [h.group for h in hierarchies]
-        for hierarchy in hierarchies:
-            self._add_sheet(hierarchy)
+        if self.streaming and self.grouped:
+            # sheets cannot be re-ordered once they are written, so the summary must be created first
+            self._title_sheet = _SheetWriter(self._wb.create_sheet(title='Summary'), self.streaming)
+        if scenarios is None:
+            for hierarchy in hierarchies:
+                self._add_sheet(hierarchy)
+        else:
+            # apply() overwrites the currents of the loads, which are parameters
+            i_in = network.get_load_currents()
+            try:
+                for n, name in enumerate(scenario_names):
+                    network.apply(scenarios, n)
+                    self._scenario = name
+                    for hierarchy in pdn.get_hierarchy(grouped=self.grouped, update=False):
+                        self._add_sheet(hierarchy)
+            finally:
+                network.set_load_currents(i_in)
         
         if len(self._sheets) < 1:
             raise RuntimeError('No components were found to put into the spreadsheet')
@@ -37,23 +171,57 @@ class PowerSpreadsheet:
     def save(self, path: str, view: bool = False, makedirs: bool = True):
         if makedirs:
             ensure_directories(path, is_filename=True)
-        self._wb.save(path)
+        self._save(path)
         if view:
             open_file(path)
     
 
     def view(self) -> str:
         path = get_tempfile_path()
-        self._wb.save(path)
+        self._save(path)
         open_file(path)
         return path
     
 
+    def _save(self, path: str):
+        if self._saved_bytes is not None:
+            with open(path, 'wb') as file:
+                file.write(self._saved_bytes)
+            return
+        self._wb.save(path)
+        if self.streaming or self._cache is not None:
+            # a write-only workbook can be saved only once, and a cached one is saved with the content of the cache entry;
+            #   the file may be moved or overwritten afterwards
+            with open(path, 'rb') as file:
+                self._saved_bytes = file.read()
+        if self._cache is not None:
+            self._cache.put_bytes(self._cache_key, self._saved_bytes, '.xlsx')
+
+
+    def _get_cache_key(self, root: PowerComponent, scenarios: "NetworkState|None", scenario_names: "list[str]|None") -> str:
+        from .result_cache import network_hash
+        if scenarios is None:
+            # the sheets show the current warnings (e.g. of the last check()), which update() does not change
+            topology = root.get_topology()
+            warnings = [element.get_warnings() for element in topology.components + topology.inputs + topology.outputs]
+        else:
+            warnings = None # replaced by the warnings of each scenario
+        parts = [network_hash(root), repr((self.title, self.grouped, self.streaming, self.comments, warnings, scenario_names))]
+        if scenarios is not None:
+            from dataclasses import fields
+            for field in fields(scenarios):
+                array = getattr(scenarios, field.name)
+                parts += [repr((field.name, array.dtype.str, array.shape)), array.tobytes()]
+        return DiskCache.key(*parts)
+    
+
     def _add_sheet(self, hierarchy: PowerHierarchy):
         if len(hierarchy.all_dissipating_components) < 1:
             return # probably an empty group?
         title = self._group_name(hierarchy.group) if self.grouped else self.title
-        sheet = self._wb.create_sheet(title=self._human_name(title))
+        if self._scenario is not None:
+            title = f'{self._scenario} - {title}' if self.grouped else self._scenario
+        sheet = _SheetWriter(self._wb.create_sheet(title=self._sheet_title(title)), self.streaming)
         sheet.column_dimensions['A'].width = 30
         sheet.column_dimensions['B'].width = 20
         sheet.column_dimensions['C'].width = 11
@@ -68,7 +236,7 @@ class PowerSpreadsheet:
         sheet.column_dimensions['L'].width = 30
         row = 1
         sheet.cell(row,1).value = title
-        sheet.cell(row,1).font = openpyxl.styles.Font(bold=True, underline='single')
+        sheet.cell(row,1).style = self._style_title
         row += 2
         summary = []
 
@@ -85,6 +253,7 @@ class PowerSpreadsheet:
             row += 1
             self._add_timestamp(sheet, row)
 
+        sheet.close()
         self._sheets[sheet.title] = ', '.join(summary)
 
 
@@ -92,7 +261,7 @@ class PowerSpreadsheet:
         if len(hierarchy.sources) <= 0:
             return (row, summary)
         sheet.cell(row,1).value = 'Power Drawn From Sources'
-        sheet.cell(row,1).font = openpyxl.styles.Font(underline='single')
+        sheet.cell(row,1).style = self._style_heading
         row += 2
         p_tot = 0
         sheet.cell(row,1).value = 'Source'
@@ -100,6 +269,8 @@ class PowerSpreadsheet:
         sheet.cell(row,3).value = 'I Drawn'
         sheet.cell(row,4).value = 'P Drawn'
         sheet.cell(row,5).value = 'Warnings'
+        last_col = self._limit_headers(sheet, row, 5, ['I Max', 'P Max'])
+        headers = sheet.row_values(row, last_col)
         row += 1
         row1 = row
         for source in hierarchy.sources:
@@ -112,14 +283,14 @@ class PowerSpreadsheet:
             sheet.cell(row,4).value = source.p_drawn
             
             if source.output.i_out_max is not None:
-                sheet.cell(row,3).comment = openpyxl.comments.Comment(f'max. I_out: {source.output.i_out_max:.3g} A', 'PDN Viz')
+                self._limit(sheet, row, 3, f'max. I_out: {source.output.i_out_max:.3g} A', 6, source.output.i_out_max, '0.###" A"')
             if source.output.p_out_max is not None:
-                sheet.cell(row,4).comment = openpyxl.comments.Comment(f'max. P_out: {source.output.p_out_max:.3g} W', 'PDN Viz')
+                self._limit(sheet, row, 4, f'max. P_out: {source.output.p_out_max:.3g} W', 7, source.output.p_out_max, '0.###" W"')
                 
             if not source.output.ok():
-                sheet.cell(row, 1).font = openpyxl.styles.Font(color='FF0000') # also make the 1st col red (easier visible)
+                sheet.cell(row, 1).style = self._style_warning # also make the 1st col red (easier visible)
                 sheet.cell(row, 5).value = '; '.join(source.output.get_warnings())
-                sheet.cell(row, 5).font = openpyxl.styles.Font(color='FF0000')
+                sheet.cell(row, 5).style = self._style_warning
                 for p in source.output.get_warnings():
                     self._problems.append((p,sheet.title,row))
             
@@ -131,9 +302,9 @@ class PowerSpreadsheet:
             row += 1
         row += 1 # add emtpy row, otherwise the sum will be part of the table, which messes up sorting
         sheet.cell(row,4).value = f'=SUM({self._range(row1, row2, 4, 4)})'
+        sheet.cell(row,4).style = self._style_sum
         sheet.cell(row,4).number_format = '0.###" W"'
-        sheet.cell(row,4).font = openpyxl.styles.Font(underline='double')
-        self._newtable(sheet, self._range(row1-1, row2, 1, 5), self._code_name(self._group_name(hierarchy.group))+'_Drawn')
+        self._newtable(sheet, self._range(row1-1, row2, 1, last_col), self._table_name(hierarchy, '_Drawn'), headers)
         sheet.conditional_formatting.add(self._range(row1, row2, 2, 2), self._data_bar_v)
         sheet.conditional_formatting.add(self._range(row1, row2, 3, 3), self._data_bar_i)
         sheet.conditional_formatting.add(self._range(row1, row2, 4, 4), self._data_bar_p)
@@ -148,7 +319,7 @@ class PowerSpreadsheet:
             return (row, summary)
         
         sheet.cell(row,1).value = 'Component Supply Hierarchy'
-        sheet.cell(row,1).font = openpyxl.styles.Font(underline='single')
+        sheet.cell(row,1).style = self._style_heading
         row += 2
         sheet.cell(row,1).value = 'Component'
         sheet.cell(row,2).value = 'Source'
@@ -157,6 +328,8 @@ class PowerSpreadsheet:
         sheet.cell(row,5).value = 'P Drawn'
         sheet.cell(row,6).value = 'Notes'
         sheet.cell(row,7).value = 'Warnings'
+        last_col = self._limit_headers(sheet, row, 7, ['Source I Total', 'Source I Max', 'Source P Total', 'Source P Max', 'Min. V Drop'])
+        headers = sheet.row_values(row, last_col)
         row += 1
         
         row1 = row
@@ -164,8 +337,6 @@ class PowerSpreadsheet:
 
         def print_level(hierarchy_level: "list[PowerHierarchyElement]", level_index: int):
             nonlocal row, hierarchy, row2
-            group_row1 = row
-            group_row2 = None
 
             if level_index==0:
                 indent = ''
@@ -185,41 +356,40 @@ class PowerSpreadsheet:
                 comment = f'total I_out of source: {power_input.source.i_out_calc:.3g} A'
                 if power_input.source.i_out_max is not None:
                     comment += f'\nmax. I_out of source: {power_input.source.i_out_max:.3g} A'
-                sheet.cell(row,4).comment = openpyxl.comments.Comment(comment, 'PDN Viz')
+                self._limit(sheet, row, 4, comment, 8, power_input.source.i_out_calc, '0.###" A"')
+                self._limit(sheet, row, 4, None, 9, power_input.source.i_out_max, '0.###" A"')
                 sheet.cell(row,5).value = power_input.p_in_calc*1e3
                 sheet.cell(row,5).number_format = '0" mW"'
                 comment = f'total P_out of source: {power_input.source.p_out_calc:.3g} W'
                 if power_input.source.p_out_max is not None:
                     comment += f'\nmax. P_out of source: {power_input.source.p_out_max:.3g} W'
-                sheet.cell(row,5).comment = openpyxl.comments.Comment(comment, 'PDN Viz')
+                self._limit(sheet, row, 5, comment, 10, power_input.source.p_out_calc, '0.###" W"')
+                self._limit(sheet, row, 5, None, 11, power_input.source.p_out_max, '0.###" W"')
                 
                 if isinstance(power_input.parent, LDO):
                     sheet.cell(row,6).value = f'{power_input.parent.v_drop_calc:.3g} V drop'
                     if power_input.parent.v_drop_min is not None:
-                        sheet.cell(row,6).comment = openpyxl.comments.Comment(f'min. req. drop: {power_input.parent.v_drop_min:.3g} V', 'PDN Viz')
+                        self._limit(sheet, row, 6, f'min. req. drop: {power_input.parent.v_drop_min:.3g} V', 12, power_input.parent.v_drop_min, '0.###" V"')
                 if isinstance(power_input.parent, DcDc):
                     sheet.cell(row,6).value = f'{power_input.parent.eff_pct_calc:.0f}% eff.'
                 
                 if not power_input.parent.ok():
-                    sheet.cell(row, 1).font = openpyxl.styles.Font(color='FF0000') # also make the 1st col red (easier visible)
+                    sheet.cell(row, 1).style = self._style_warning # also make the 1st col red (easier visible)
                     sheet.cell(row, 7).value = '; '.join(power_input.parent.get_warnings())
-                    sheet.cell(row, 7).font = openpyxl.styles.Font(color='FF0000')
+                    sheet.cell(row, 7).style = self._style_warning
                     for p in power_input.parent.get_warnings():
                         self._problems.append((p,sheet.title,row))
 
+                sheet.set_outline_level(row, level_index)
                 row2 = row
-                group_row2 = row
                 row += 1
 
                 if len(level.connected_sinks)>0:
                     print_level(level.connected_sinks, level_index+1)
-                
-            if (level_index>0) and (group_row2 is not None):
-                sheet.row_dimensions.group(group_row1, group_row2, outline_level=level_index)
         
         print_level(hierarchy.sink_hierarchy, 0)
         row += 1 # add emtpy row, otherwise the sum will be part of the table, which messes up sorting
-        self._newtable(sheet, self._range(row1-1, row2, 1, 7), self._code_name(self._group_name(hierarchy.group))+'_Hier')
+        self._newtable(sheet, self._range(row1-1, row2, 1, last_col), self._table_name(hierarchy, '_Hier'), headers)
         sheet.conditional_formatting.add(self._range(row1, row2, 3, 3), self._data_bar_v)
         sheet.conditional_formatting.add(self._range(row1, row2, 4, 4), self._data_bar_i)
 
@@ -232,13 +402,15 @@ class PowerSpreadsheet:
             return (row, summary)
         
         sheet.cell(row,1).value = 'Power-Dissipating Components'
-        sheet.cell(row,1).font = openpyxl.styles.Font(underline='single')
+        sheet.cell(row,1).style = self._style_heading
         row += 2
         sheet.cell(row,1).value = 'Component'
         sheet.cell(row,2).value = 'Sources'
         sheet.cell(row,3).value = 'P Dissipated'
         sheet.cell(row,4).value = 'T J'
         sheet.cell(row,5).value = 'Warnings'
+        last_col = self._limit_headers(sheet, row, 5, ['P Diss Max', 'R Th JA', 'T J Max'])
+        headers = sheet.row_values(row, last_col)
         row += 1
         
         p_diss_tot = 0
@@ -255,17 +427,18 @@ class PowerSpreadsheet:
             sheet.cell(row,3).number_format = '0" mW"'
             p_diss_tot += component.p_diss_calc
             if component.p_diss_max is not None:
-                sheet.cell(row,3).comment = openpyxl.comments.Comment(f'max. P_diss: {component.p_diss_max:.3g} W', 'PDN Viz')
+                self._limit(sheet, row, 3, f'max. P_diss: {component.p_diss_max:.3g} W', 6, component.p_diss_max, '0.###" W"')
             
             sheet.cell(row,4).value = component.t_j_calc
             sheet.cell(row,4).number_format = '0.#" °C"'
             if component.t_j_max is not None and component.r_th_ja is not None:
-                sheet.cell(row,4).comment = openpyxl.comments.Comment(f'R_Th_JA: {component.r_th_ja:.1f} K/W\nmax. T_J: {component.t_j_max:.1f} °C', 'PDN Viz')
+                self._limit(sheet, row, 4, f'R_Th_JA: {component.r_th_ja:.1f} K/W\nmax. T_J: {component.t_j_max:.1f} °C', 7, component.r_th_ja, '0.#" K/W"')
+                self._limit(sheet, row, 4, None, 8, component.t_j_max, '0.#" °C"')
                 
             if not component.ok():
-                sheet.cell(row, 1).font = openpyxl.styles.Font(color='FF0000') # also make the 1st col red (easier visible)
+                sheet.cell(row, 1).style = self._style_warning # also make the 1st col red (easier visible)
                 sheet.cell(row, 5).value = '; '.join(component.get_warnings())
-                sheet.cell(row, 5).font = openpyxl.styles.Font(color='FF0000')
+                sheet.cell(row, 5).style = self._style_warning
                 for p in component.get_warnings():
                     self._problems.append((p,sheet.title,row))
 
@@ -274,9 +447,9 @@ class PowerSpreadsheet:
 
         row += 1 # add emtpy row, otherwise the sum will be part of the table, which messes up sorting
         sheet.cell(row,3).value = f'=SUM({self._range(row1, row2, 3, 3)})/1e3'
+        sheet.cell(row,3).style = self._style_sum
         sheet.cell(row,3).number_format = '0.###" W"'
-        sheet.cell(row,3).font = openpyxl.styles.Font(underline='double')
-        self._newtable(sheet, self._range(row1-1, row2, 1, 5), self._code_name(self._group_name(hierarchy.group))+'_Comps')
+        self._newtable(sheet, self._range(row1-1, row2, 1, last_col), self._table_name(hierarchy, '_Comps'), headers)
         sheet.conditional_formatting.add(self._range(row1, row2, 3, 3), self._data_bar_p)
         sheet.conditional_formatting.add(self._range(row1, row2, 4, 4), self._data_bar_t)
         row += 1
@@ -293,13 +466,15 @@ class PowerSpreadsheet:
     
         p_prov_tot = 0
         sheet.cell(row,1).value = 'Power Provided to External'
-        sheet.cell(row,1).font = openpyxl.styles.Font(underline='single')
+        sheet.cell(row,1).style = self._style_heading
         row += 2
         sheet.cell(row,1).value = 'Source'
         sheet.cell(row,2).value = 'Sinks'
         sheet.cell(row,3).value = 'V Provided'
         sheet.cell(row,4).value = 'I Provided'
         sheet.cell(row,5).value = 'P Provided'
+        last_col = self._limit_headers(sheet, row, 5, ['I Max', 'P Max'])
+        headers = sheet.row_values(row, last_col)
         row += 1
         row1 = row
         for source_to_ext in hierarchy.to_external:
@@ -311,18 +486,18 @@ class PowerSpreadsheet:
             sheet.cell(row,4).value = source_to_ext.i_provided
             sheet.cell(row,4).number_format = '0.###" A"'
             if source_to_ext.output.i_out_max is not None:
-                sheet.cell(row,4).comment = openpyxl.comments.Comment(f'max. I_out: {source_to_ext.output.i_out_max:.3g} A', 'PDN Viz')
+                self._limit(sheet, row, 4, f'max. I_out: {source_to_ext.output.i_out_max:.3g} A', 6, source_to_ext.output.i_out_max, '0.###" A"')
             sheet.cell(row,5).value = source_to_ext.p_provided
             sheet.cell(row,5).number_format = '0.###" W"'
             if source_to_ext.output.p_out_max is not None:
-                sheet.cell(row,5).comment = openpyxl.comments.Comment(f'max. P_out: {source_to_ext.output.p_out_max:.3g} W', 'PDN Viz')
+                self._limit(sheet, row, 5, f'max. P_out: {source_to_ext.output.p_out_max:.3g} W', 7, source_to_ext.output.p_out_max, '0.###" W"')
             row2 = row
             row += 1
         row += 1 # add emtpy row, otherwise the sum will be part of the table, which messes up sorting
         sheet.cell(row,5).value = f'=SUM({self._range(row1, row2, 5, 5)})'
+        sheet.cell(row,5).style = self._style_sum
         sheet.cell(row,5).number_format = '0.###" W"'
-        sheet.cell(row,5).font = openpyxl.styles.Font(underline='double')
-        self._newtable(sheet, self._range(row1-1, row2, 1, 5), self._code_name(self._group_name(hierarchy.group))+'_Provided')
+        self._newtable(sheet, self._range(row1-1, row2, 1, last_col), self._table_name(hierarchy, '_Provided'), headers)
         sheet.conditional_formatting.add(self._range(row1, row2, 3, 3), self._data_bar_v)
         sheet.conditional_formatting.add(self._range(row1, row2, 4, 4), self._data_bar_i)
         sheet.conditional_formatting.add(self._range(row1, row2, 5, 5), self._data_bar_p)
@@ -342,17 +517,19 @@ class PowerSpreadsheet:
         for sheet in self.initial_sheets:
             self._wb.remove(self._wb[sheet])
         self.initial_sheets = []
-        self._wb.active = 0
+        if not self.streaming:
+            self._wb.active = 0
 
         if self.grouped:
             # create summary
-            sheet = self._wb.create_sheet(title='Summary')
-            self._title_sheet = sheet
+            if self._title_sheet is None:
+                self._title_sheet = _SheetWriter(self._wb.create_sheet(title='Summary'), self.streaming)
+            sheet = self._title_sheet
             sheet.column_dimensions['A'].width = 20
             sheet.column_dimensions['B'].width = 50
             row = 1
             sheet.cell(row,1).value = 'Summary'
-            sheet.cell(row,1).font = openpyxl.styles.Font(bold=True, underline='single')
+            sheet.cell(row,1).style = self._style_title
             row += 2
             for sheetname,summary in self._sheets.items():
                 sheet.cell(row,1).value = sheetname
@@ -363,18 +540,88 @@ class PowerSpreadsheet:
                 row += 1
                 for (text,sheetname,rownum) in self._problems:
                     sheet.cell(row,1).value = 'Problem'
-                    sheet.cell(row,1).font = openpyxl.styles.Font(color='FF0000')
+                    sheet.cell(row,1).style = self._style_warning
                     sheet.cell(row,2).value = text
                     sheet.cell(row,2).hyperlink = f'#{sheetname}!A{rownum}'
                     row += 1
             row += 1
             self._add_timestamp(sheet, row)
+            sheet.close()
         
-        sheet = self._wb._sheets.pop(len(self._wb._sheets)-1)
-        self._wb._sheets.insert(0, sheet)
+        if self.grouped and not self.streaming:
+            sheet = self._wb._sheets.pop(len(self._wb._sheets)-1)
+            self._wb._sheets.insert(self._leading_sheets, sheet)
+
+
+    def _add_comparison_sheet(self, network: "CompiledNetwork", state: "NetworkState", names: "list[str]"):
+        """Adds a sheet with one column per scenario, that compares the source power, dissipation and temperatures"""
+
+        import numpy as np
+        sheet = _SheetWriter(self._wb.create_sheet(title='Scenarios', index=0), self.streaming)
+        self._leading_sheets += 1
+        sheet.column_dimensions['A'].width = 40
+        for col in range(2, len(names)+2):
+            sheet.column_dimensions[openpyxl.utils.get_column_letter(col)].width = 14
+
+        # each row is only marked for the limits of its own quantity
+        masks = {} # type: dict[tuple[str,str],np.ndarray]
+        for elements, msg, mask, _ in network._violations(state):
+            if elements is network.components:
+                masks[('component', msg)] = mask
+            elif elements is network.outputs:
+                masks[('output', msg)] = mask
+        p_out_violated = masks[('output', 'Max. output power exceeded')] | masks[('component', 'Max. output power exceeded')][..., network.out_comp]
+
+        row = 1
+        sheet.cell(row,1).value = 'Scenario Comparison'
+        sheet.cell(row,1).style = self._style_title
+        row += 2
+        sheet.cell(row,1).value = 'Scenario'
+        for col, name in enumerate(names, 2):
+            sheet.cell(row,col).value = name
+        row += 1
+        sheet.cell(row,1).value = 'Limits'
+        for col, ok in enumerate(network.scenarios_ok(state).tolist(), 2):
+            sheet.cell(row,col).value = 'OK' if ok else 'FAIL'
+            if not ok:
+                sheet.cell(row,col).style = self._style_warning
+        row += 2
+
+        sections = [
+            ('Power Drawn From Sources', '0.###" W"', state.p_out, p_out_violated,
+                [(o, output.full_name()) for o, output in enumerate(network.outputs) if output.parent.is_pure_source()]),
+            ('Power Dissipated', '0.###" W"', state.p_diss, masks[('component', 'Max. dissipated power exceeded')],
+                [(c, component.name) for c, component in enumerate(network.components) if not component.is_pure_source()]),
+            ('Junction Temperature', '0.#" °C"', state.t_j, masks[('component', 'Max. junction temperature exceeded')],
+                [(c, component.name) for c, component in enumerate(network.components) if component.r_th_ja is not None]),
+        ]
+        for heading, number_format, values, violations, rows in sections:
+            if len(rows) < 1:
+                continue
+            sheet.cell(row,1).value = heading
+            sheet.cell(row,1).style = self._style_heading
+            row += 1
+            for index, label in rows:
+                sheet.cell(row,1).value = label
+                for col, (value, violated) in enumerate(zip(values[:,index].tolist(), violations[:,index].tolist()), 2):
+                    if violated:
+                        sheet.cell(row,1).style = sheet.cell(row,col).style = self._style_warning
+                    sheet.cell(row,col).value = value
+                    sheet.cell(row,col).number_format = number_format
+                row += 1
+            row += 1
+
+        self._add_timestamp(sheet, row)
+        sheet.close()
 
     
     def _define_formats(self):
+        # named styles are registered once in the workbook, and shared by all cells that use them
+        self._style_title, self._style_heading, self._style_warning, self._style_sum = 'PDN Title', 'PDN Heading', 'PDN Warning', 'PDN Sum'
+        self._wb.add_named_style(openpyxl.styles.NamedStyle(name=self._style_title, font=openpyxl.styles.Font(bold=True, underline='single')))
+        self._wb.add_named_style(openpyxl.styles.NamedStyle(name=self._style_heading, font=openpyxl.styles.Font(underline='single')))
+        self._wb.add_named_style(openpyxl.styles.NamedStyle(name=self._style_warning, font=openpyxl.styles.Font(color='FF0000')))
+        self._wb.add_named_style(openpyxl.styles.NamedStyle(name=self._style_sum, font=openpyxl.styles.Font(underline='double')))
         self._table_style = openpyxl.worksheet.table.TableStyleInfo(name='TableStyleMedium2', showRowStripes=True)
         self._data_bar_v = openpyxl.formatting.rule.Rule(type='dataBar', dataBar=openpyxl.formatting.rule.DataBar( \
             cfvo=[openpyxl.formatting.rule.FormatObject(type='min'), openpyxl.formatting.rule.FormatObject(type='max')], \
@@ -390,6 +637,50 @@ class PowerSpreadsheet:
             color="660066", minLength=None, maxLength=None))
     
 
+    def _limit_headers(self, sheet, row: int, last_col: int, headers: "list[str]") -> int:
+        """Adds the headers of the limit columns (if limits are not put into comments); returns the last column of the table"""
+        if self.comments:
+            return last_col
+        for header in headers:
+            last_col += 1
+            sheet.cell(row,last_col).value = header
+        return last_col
+
+
+    def _limit(self, sheet, row: int, comment_col: int, comment: "str|None", limit_col: int, value: "float|None", number_format: str):
+        """Documents a limit, either as a comment (if not None), or as a value in the given limit column"""
+        if self.comments:
+            if comment is not None:
+                sheet.cell(row,comment_col).comment = openpyxl.comments.Comment(comment, 'PDN Viz')
+        elif value is not None:
+            sheet.cell(row,limit_col).value = value
+            sheet.cell(row,limit_col).number_format = number_format
+
+
+    def _sheet_title(self, title: str) -> str:
+        """Returns a valid sheet title, i.e. at most 31 characters, and unique within the workbook"""
+        title = self._human_name(title)[:31]
+        existing, n = set(name.lower() for name in self._wb.sheetnames), 1
+        result = title
+        while result.lower() in existing:
+            n += 1
+            result = title[:31-len(f' ({n})')] + f' ({n})'
+        return result
+
+
+    def _table_name(self, hierarchy: PowerHierarchy, suffix: str) -> str:
+        """Returns a table name that is unique within the workbook (different names may have the same code name)"""
+        name = self._code_name(self._group_name(hierarchy.group))
+        if self._scenario is not None:
+            name = self._code_name(self._scenario) + '_' + name
+        result, n = name + suffix, 1
+        while result.lower() in self._table_names:
+            n += 1
+            result = f'{name}{suffix}_{n}'
+        self._table_names.add(result.lower())
+        return result
+
+
     def _group_name(self, name: "str|Ellipsis") -> str:
         if name is None or name is ...:
             return 'Ungrouped'
@@ -431,6 +722,19 @@ class PowerSpreadsheet:
         return f'{openpyxl.utils.get_column_letter(col1)}{row1}:{openpyxl.utils.get_column_letter(col2)}{row2}'
 
 
-    def _newtable(self, sheet, ref, name):
+    def _newtable(self, sheet, ref, name, headers: "list[str]"):
         table = openpyxl.worksheet.table.Table(ref=ref, displayName=name, tableStyleInfo=self._table_style)
-        sheet.add_table(table)
+        if self.streaming:
+            # the header cells cannot be read back from a write-only sheet, so the column names are given explicitly
+            table._initialise_columns()
+            for column, header in zip(table.tableColumns, headers):
+                column.name = header
+            with warnings.catch_warnings():
+                warnings.filterwarnings('ignore', 'In write-only mode you must add table columns manually')
+                sheet.add_table(table)
+        else:
+            sheet.add_table(table)
+
+
+
+module_imported(__name__) # installs the hooks of an instrumentation that was started before this import
@@ -1,4 +1,4 @@
-import openpyxl, datetime, os, subprocess, tempfile
+import os, subprocess, tempfile
 
 
 def is_linux() -> bool:
@@ -0,0 +1,246 @@
+from .power_component import PowerComponent, PowerInput
+from .compiled import CompiledNetwork, NetworkState
+from dataclasses import dataclass
+import copy, itertools
+import numpy as np
+
+
+
+class RunningStats:
+    """Peak, minimum, average and RMS of a quantity of each element, accumulated chunk by chunk"""
+
+
+    def __init__(self, size: int):
+        self.count = 0
+        self.peak = np.full(size, -np.inf)
+        self.minimum = np.full(size, np.inf)
+        self._sum = np.zeros(size)
+        self._sum_sq = np.zeros(size)
+
+
+    def add(self, values: "np.ndarray"):
+        """Adds a chunk of values, with one row per sample and one column per element"""
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        np.maximum(self.peak, values.max(axis=0), out=self.peak)
+        np.minimum(self.minimum, values.min(axis=0), out=self.minimum)
+        self._sum += values.sum(axis=0)
+        self._sum_sq += np.einsum('ij,ij->j', values, values)
+
+
+    @property
+    def average(self) -> "np.ndarray":
+        return self._sum / max(self.count, 1)
+
+
+    @property
+    def rms(self) -> "np.ndarray":
+        return np.sqrt(self._sum_sq / max(self.count, 1))
+
+
+
+@dataclass
+class ProfileChunk:
+    """The results of one chunk of a load profile; each array has one row per sample of the chunk"""
+
+    """Index of the first sample of the chunk"""
+    start: int
+
+    """Time of each sample, in s"""
+    t: "np.ndarray"
+
+    """All calculated values (see NetworkState)"""
+    state: "NetworkState"
+
+    """Power provided by each source (see ProfileEvaluator.sources), in W"""
+    p_source: "np.ndarray"
+
+    """Energy provided by each source since the start of the profile, in J"""
+    energy: "np.ndarray"
+
+
+
+class ProfileResult:
+    """
+    Statistics of a whole load profile. Each RunningStats has one value per source (<p_source>), output (<i_out>), DC/DC
+    converter (<eff_pct>) or component (<p_diss>); averages and RMS values are taken over the samples.
+    """
+
+
+    def __init__(self, evaluator: "ProfileEvaluator"):
+        self.network, self.sources = evaluator.network, evaluator.sources
+        self.samples, self.duration = evaluator.samples, evaluator.duration
+        self.energy = evaluator.energy.copy() # type: np.ndarray
+        # copies, as the evaluator may be fed with further chunks
+        self.p_source, self.i_out, self.eff_pct, self.p_diss = copy.deepcopy((evaluator.p_source, evaluator.i_out, evaluator.eff_pct, evaluator.p_diss))
+
+
+    def __repr__(self) -> str:
+        return f'<ProfileResult({self.samples} samples, {self.duration:.6g} s)>'
+
+
+    def report(self) -> str:
+        """Returns a human-readable summary of the sources, rails and DC/DC converters"""
+        network = self.network
+        lines = [f'{self.samples} samples, {self.duration:.6g} s']
+        lines.append(f'    {"Source":32} {"Energy":>12} {"Peak":>12} {"Average":>12} {"RMS":>12}')
+        for k, source in enumerate(self.sources):
+            lines.append(f'    {source.name:32} {self.energy[k]:10.4g} J {self.p_source.peak[k]:10.4g} W {self.p_source.average[k]:10.4g} W {self.p_source.rms[k]:10.4g} W')
+        lines.append(f'    {"Rail":32} {"":12} {"Peak":>12} {"Average":>12} {"RMS":>12}')
+        for o, output in enumerate(network.outputs):
+            lines.append(f'    {output.full_name():32} {"":12} {self.i_out.peak[o]:10.4g} A {self.i_out.average[o]:10.4g} A {self.i_out.rms[o]:10.4g} A')
+        if len(network.dcdcs) > 0:
+            lines.append(f'    {"Converter":32} {"Minimum":>12} {"Peak":>12} {"Average":>12}')
+            for k, c in enumerate(network.dcdcs):
+                lines.append(f'    {network.components[c].name:32} {self.eff_pct.minimum[k]:10.4g} % {self.eff_pct.peak[k]:10.4g} % {self.eff_pct.average[k]:10.4g} %')
+        return '\n'.join(lines)
+
+
+
+class ProfileEvaluator:
+    """
+    Evaluates time series of load currents chunk by chunk, so that traces of any length can be processed with bounded
+    memory. <loads> are the loads (or inputs of multi-input loads, or their names) whose currents are given; all other
+    parameters are read from the objects, which are not modified. Either pass the time of each sample to feed(), or
+    give the sample interval <dt>. Each chunk is passed to <callback> (if given), and accumulated into the statistics.
+    The energy is integrated with the trapezoidal rule.
+    """
+
+
+    def __init__(self, network: "PowerComponent|CompiledNetwork", loads: "list[PowerComponent|PowerInput|str]",
+            dt: "float|None" = None, callback: "callable[[ProfileChunk],None]|None" = None):
+        self.network = network if isinstance(network, CompiledNetwork) else network.compile()
+        self.network._gather()
+        self.dt, self.callback = dt, callback
+        self._columns = self.network._load_columns(loads)
+        # sources are the components without inputs (e.g. supplies); their power is what the network draws
+        self._sources = np.array([c for c, component in enumerate(self.network.components) if component.is_pure_source()], dtype=np.int64)
+        self.sources = [self.network.components[c] for c in self._sources] # type: list[PowerComponent]
+
+        self.samples, self.energy = 0, np.zeros(len(self.sources))
+        self._t_first, self._last = None, None # type: float|None, tuple[float,np.ndarray]|None
+        self.p_source = RunningStats(len(self.sources))
+        self.i_out = RunningStats(len(self.network.outputs))
+        self.eff_pct = RunningStats(len(self.network.dcdcs))
+        self.p_diss = RunningStats(len(self.network.components))
+
+
+    def __repr__(self) -> str:
+        return f'<ProfileEvaluator({self.network.root.name}, {self.samples} samples)>'
+
+
+    @property
+    def duration(self) -> float:
+        if self._last is None:
+            return 0.0
+        return self._last[0] - self._t_first
+
+
+    def feed(self, i_in: "np.ndarray", t: "np.ndarray|None" = None) -> ProfileChunk:
+        """
+        Evaluates the next chunk of the profile. <i_in> has one row per sample and one column per load; <t> are the times
+        of the samples (in s), which must be given if no <dt> was given.
+        """
+        network = self.network
+        i_in = np.asarray(i_in, dtype=np.float64)
+        if i_in.ndim == 1 and len(self._columns) == 1:
+            i_in = i_in[:, np.newaxis]
+        if i_in.ndim != 2 or i_in.shape[1] != len(self._columns):
+            raise ValueError(f'Expected a matrix of currents with {len(self._columns)} columns')
+        if t is None:
+            if self.dt is None:
+                raise ValueError('Either the sample interval or the time of each sample must be given')
+            t = (self.samples + np.arange(len(i_in))) * self.dt
+        t = np.asarray(t, dtype=np.float64)
+        if t.shape != (len(i_in),):
+            raise ValueError('Expected one time per sample')
+
+        i_in_fixed = np.repeat(network.i_in_fixed[np.newaxis,:], len(i_in), axis=0)
+        i_in_fixed[:, self._columns] = i_in
+        state = network._solve(i_in_fixed=i_in_fixed)
+        p_source = state.comp_p_out[:, self._sources]
+
+        # trapezoidal integration, continuing from the last sample of the previous chunk
+        energy = np.empty_like(p_source)
+        if len(t) > 0:
+            t_prev, p_prev = self._last if self._last is not None else (t[0], p_source[0])
+            dt = np.diff(t, prepend=t_prev)
+            p = np.concatenate([p_prev[np.newaxis,:], p_source])
+            energy = self.energy + np.cumsum((p[1:] + p[:-1]) / 2 * dt[:, np.newaxis], axis=0)
+            self.energy = energy[-1].copy()
+            if self._t_first is None:
+                self._t_first = float(t[0])
+            self._last = (float(t[-1]), p_source[-1].copy())
+
+        self.p_source.add(p_source)
+        self.i_out.add(state.i_out)
+        self.eff_pct.add(state.eff_pct)
+        self.p_diss.add(state.p_diss)
+        chunk = ProfileChunk(self.samples, t, state, p_source, energy)
+        self.samples += len(i_in)
+        if self.callback is not None:
+            self.callback(chunk)
+        return chunk
+
+
+    def result(self) -> ProfileResult:
+        """Returns the statistics of all chunks so far"""
+        return ProfileResult(self)
+
+
+
+def _trace(value: "np.ndarray|str") -> "np.ndarray":
+    if isinstance(value, str):
+        return np.load(value, mmap_mode='r') # only the chunks that are evaluated are read
+    return value
+
+
+def evaluate_profile(network: "PowerComponent|CompiledNetwork", traces: "dict[PowerComponent|PowerInput|str,np.ndarray|str]",
+        dt: "float|None" = None, t: "np.ndarray|str|None" = None, chunk_size: int = 8192,
+        callback: "callable[[ProfileChunk],None]|None" = None) -> ProfileResult:
+    """
+    Evaluates a current trace (an array, or the path of an .npy file, which is memory-mapped) of each of the given loads,
+    with the sample interval <dt> or the sample times <t>, and returns the statistics; see ProfileEvaluator.
+    """
+    loads = list(traces)
+    arrays = [_trace(trace) for trace in traces.values()]
+    if t is not None:
+        t = _trace(t)
+    lengths = {len(array) for array in arrays} | ({len(t)} if t is not None else set())
+    if len(lengths) > 1:
+        raise ValueError('All traces must have the same length')
+    evaluator = ProfileEvaluator(network, loads, dt, callback)
+    for start in range(0, lengths.pop() if len(lengths) > 0 else 0, chunk_size):
+        chunk = slice(start, start + chunk_size)
+        evaluator.feed(np.stack([np.asarray(array[chunk], dtype=np.float64) for array in arrays], axis=1),
+            None if t is None else t[chunk])
+    return evaluator.result()
+
+
+def evaluate_profile_csv(network: "PowerComponent|CompiledNetwork", path: str, dt: "float|None" = None,
+        time_column: "str|None" = None, delimiter: str = ',', chunk_size: int = 8192,
+        callback: "callable[[ProfileChunk],None]|None" = None) -> ProfileResult:
+    """
+    Evaluates the current traces in a CSV file, which is read chunk by chunk. The first line holds the column names: the
+    name of each load (or the full name of an input, i.e. "component / input"), plus the <time_column> (in s) if given;
+    otherwise, the sample interval <dt> must be given.
+    """
+    with open(path, newline='') as file:
+        header = [name.strip() for name in file.readline().rstrip('\r\n').split(delimiter)]
+        if time_column is not None and time_column not in header:
+            raise ValueError(f'The file has no column "{time_column}"')
+        columns = [n for n, name in enumerate(header) if name != time_column]
+        time_index = header.index(time_column) if time_column is not None else None
+        evaluator = ProfileEvaluator(network, [header[n] for n in columns], dt, callback)
+        while True:
+            lines = list(itertools.islice(file, chunk_size))
+            if len(lines) == 0:
+                break
+            # blank lines (e.g. at the end of the file) are skipped, also if a whole chunk consists of them
+            lines = [line for line in lines if line.strip() != '']
+            if len(lines) == 0:
+                continue
+            values = np.loadtxt(lines, delimiter=delimiter, ndmin=2, dtype=np.float64)
+            evaluator.feed(values[:, columns], None if time_index is None else values[:, time_index])
+    return evaluator.result()
@@ -0,0 +1,95 @@
+from .power_component import PowerComponent, PowerInput, PowerOutput
+
+
+
+class PowerTopology:
+    """
+    Structural index of the network below a root component. It only depends on how the components are
+    connected and named, not on any calculated values, so it is built once, and re-used until any sink
+    is added, or a name or group is changed.
+    Use PowerComponent.get_topology() to get the index of a network.
+    """
+
+
+    def __init__(self, root: "PowerComponent", version: int):
+
+        self.root, self.version = root, version
+
+        # all components, each exactly once; downstream components come before the components that drive them
+        self.components = [] # type: list[PowerComponent]
+
+        # all groups, in the order in which they first appear in <components>
+        self.groups = [] # type: list[str]
+
+        # the components of each group
+        self.components_by_group = {} # type: dict[str,list[PowerComponent]]
+
+        # all inputs and outputs of all components
+        self.inputs = [] # type: list[PowerInput]
+        self.outputs = [] # type: list[PowerOutput]
+
+        # the position of each component, input and output in the lists above
+        self.component_index = {} # type: dict[PowerComponent,int]
+        self.input_index = {} # type: dict[PowerInput,int]
+        self.output_index = {} # type: dict[PowerOutput,int]
+
+        # name registry; for duplicate names, the first component in <components> is registered
+        self.components_by_name = {} # type: dict[str,PowerComponent]
+        self.inputs_by_name = {} # type: dict[str,PowerInput]
+        self.duplicate_names = [] # type: list[str]
+
+        # iterative post-order traversal, so that deep networks do not hit the recursion limit
+        visited = {root}
+        stack = [(root, self._downstream(root))]
+        while len(stack) > 0:
+            component, downstream = stack[-1]
+            child = next(downstream, None)
+            if child is None:
+                stack.pop()
+                self._add(component)
+            elif child not in visited:
+                visited.add(child)
+                stack.append((child, self._downstream(child)))
+
+
+    @staticmethod
+    def _downstream(component: "PowerComponent"):
+        for output in component._outputs:
+            for input in output._sinks:
+                yield input.parent
+
+
+    def find(self, name: str) -> "PowerComponent":
+        """Returns the component with the given name"""
+        component = self.components_by_name.get(name)
+        if component is None:
+            raise KeyError(f'There is no component <{name}>')
+        return component
+
+
+    def find_input(self, full_name: str) -> "PowerInput":
+        """Returns the input with the given full name (i.e. "component / input")"""
+        input = self.inputs_by_name.get(full_name)
+        if input is None:
+            raise KeyError(f'There is no input <{full_name}>')
+        return input
+
+
+    def _add(self, component: "PowerComponent"):
+        self.component_index[component] = len(self.components)
+        self.components.append(component)
+        if component.name not in self.components_by_name:
+            self.components_by_name[component.name] = component
+        elif component.name not in self.duplicate_names:
+            self.duplicate_names.append(component.name)
+        if component.group not in self.components_by_group:
+            self.groups.append(component.group)
+            self.components_by_group[component.group] = []
+        self.components_by_group[component.group].append(component)
+        for input in component._inputs:
+            self.input_index[input] = len(self.inputs)
+            self.inputs.append(input)
+            self.inputs_by_name.setdefault(input.full_name(), input)
+        for output in component._outputs:
+            self.output_index[output] = len(self.outputs)
+            self.outputs.append(output)
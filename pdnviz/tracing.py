@@ -0,0 +1,103 @@
+from .power_component import PowerComponent, PowerInput, PowerOutput
+from .hooks import MethodHooks, subclasses
+from collections import deque, namedtuple
+import functools, json, time
+
+
+
+"""One traced call: time (ns, monotonic), the element, the phase (method name), and the values after the call"""
+TraceEvent = namedtuple('TraceEvent', ['time_ns', 'element', 'phase', 'values'])
+
+
+
+class Tracer:
+    """
+    Records every evaluation step of the object model (updates and checks of components, inputs and outputs):
+
+        with Tracer() as tracer:
+            pdn.check()
+        for event in tracer.events:
+            print(event.element, event.phase, event.values)
+
+    The events are kept in a ring buffer with the last <capacity> events. If <path> is given, all events are also
+    written to that file, one JSON object per line; each element is written as a small integer ID, which is defined
+    by a preceding {"id": ..., "name": ...} line.
+    The methods are only wrapped while a tracer is active, so tracing costs nothing when it is not used.
+    """
+
+    _active = None # type: Tracer|None
+
+    # traced methods, and the values that are recorded after each call, of each kind of element
+    METHODS = {
+        PowerComponent: (['update', '_update_inputs', '_update_power', '_update_thermal', '_check_tree', '_check'],
+            ['p_in_calc', 'p_out_calc', 'p_diss_calc', 't_j_calc']),
+        PowerInput: (['_set_source', '_pre_update', '_update', '_check'], ['v_in_actual', 'i_in', 'p_in_calc']),
+        PowerOutput: (['_pre_update', '_update', '_check'], ['i_out_calc', 'p_out_calc']),
+    }
+
+
+    def __init__(self, capacity: int = 100_000, path: "str|None" = None):
+        self.events = deque(maxlen=capacity) # type: deque[TraceEvent]
+        self.path = path
+        self._file = None
+        self._ids = {} # type: dict[object,int]
+        self._hooks = MethodHooks()
+
+
+    def __enter__(self) -> "Tracer":
+        self.start()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+    def start(self):
+        if Tracer._active is not None:
+            raise RuntimeError('Another tracer is already active')
+        Tracer._active = self
+        try:
+            if self.path is not None:
+                self._file = open(self.path, 'w')
+            for base, (methods, attributes) in Tracer.METHODS.items():
+                for cls in subclasses(base):
+                    for method in methods:
+                        if method in cls.__dict__:
+                            self._hooks.wrap(cls, method, functools.partial(self._traced, phase=method, attributes=attributes))
+        except BaseException:
+            self.stop()
+            raise
+
+
+    def stop(self):
+        self._hooks.remove()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if Tracer._active is self:
+            Tracer._active = None
+
+
+    def _traced(self, function, phase: str, attributes: "list[str]"):
+        @functools.wraps(function)
+        def wrapper(element, *args, **kwargs):
+            result = function(element, *args, **kwargs)
+            values = tuple(getattr(element, attribute, None) for attribute in attributes)
+            if phase.startswith('_check'):
+                values += (len(element._warnings),)
+            self._emit(TraceEvent(time.perf_counter_ns(), element, phase, values))
+            return result
+        return wrapper
+
+
+    def _emit(self, event: TraceEvent):
+        self.events.append(event)
+        if self._file is None:
+            return
+        id = self._ids.get(event.element)
+        if id is None:
+            id = self._ids[event.element] = len(self._ids)
+            name = event.element.full_name() if hasattr(event.element, 'full_name') else event.element.name
+            self._file.write(json.dumps(dict(id=id, name=name)) + '\n')
+        self._file.write(json.dumps(dict(t=event.time_ns, id=id, phase=event.phase, values=event.values)) + '\n')
@@ -0,0 +1,368 @@
+from .power_component import PowerComponent, PowerInput, PowerOutput
+from .compiled import CompiledNetwork, KIND_GENERIC, KIND_LDO, KIND_DCDC
+from .interval import _bounds, _points, _CURVE_FUNCTIONS
+from .efficiency import EfficiencySurface
+from dataclasses import dataclass
+import heapq
+import numpy as np
+
+
+
+@dataclass
+class WorstCaseLimit:
+    """The worst case of one limit of one element"""
+
+    """The output (for 'i_out') or component (for 'p_diss' and 't_j')"""
+    element: "PowerOutput|PowerComponent"
+
+    """The limited quantity: 'i_out', 'p_diss' or 't_j'"""
+    quantity: str
+
+    """The limit, i.e. i_out_max, p_diss_max or t_j_max"""
+    limit: float
+
+    """The highest value of the quantity within the ranges; if the search was not <exact>, an upper bound of it"""
+    value: float
+
+    """
+    The parameters with the highest value (usually a corner of the ranges, but e.g. the loss of a DC/DC converter may
+    peak inside the range of its output current), as {(element, parameter): value}, of the parameters that affect the quantity
+    """
+    corner: "dict[tuple[PowerInput|PowerOutput,str],float]"
+
+    """Whether the search finished, i.e. whether <value> is the maximum within the relative tolerance of the search"""
+    exact: bool
+
+    """Number of search nodes that were evaluated"""
+    nodes: int
+
+
+    @property
+    def violated(self) -> bool:
+        return self.value > self.limit
+
+
+
+class WorstCaseResult:
+    """The worst case of every limit that is defined in the network"""
+
+
+    def __init__(self, limits: "list[WorstCaseLimit]"):
+        self.limits = limits
+
+
+    def __repr__(self) -> str:
+        return f'<WorstCaseResult({len(self.limits)} limits, {len(self.violations())} violated)>'
+
+
+    def violations(self) -> "list[WorstCaseLimit]":
+        """Returns the limits that are violated somewhere within the ranges, the largest relative violations first"""
+        return sorted([l for l in self.limits if l.violated], key=lambda l: -l.value / l.limit if l.limit > 0 else -np.inf)
+
+
+    def report(self, max_rows: int = 20) -> str:
+        """Returns a human-readable summary of the violated limits and where they are worst"""
+        names = dict(i_out='Max. output current', p_diss='Max. dissipated power', t_j='Max. junction temperature')
+        units = dict(i_out='A', p_diss='W', t_j='°C')
+        violations = self.violations()
+        lines = [f'{len(violations)} of {len(self.limits)} limits can be violated']
+        for l in violations[:max_rows]:
+            approx = '' if l.exact else ' (upper bound)'
+            lines.append(f'    {l.element}: {names[l.quantity]} {l.limit:.4g} {units[l.quantity]}, worst case {l.value:.4g} {units[l.quantity]}{approx}, at:')
+            for (element, parameter), value in l.corner.items():
+                lines.append(f'        {element.full_name()} {parameter} = {value:.4g}')
+        return '\n'.join(lines)
+
+
+
+class WorstCase:
+    """
+    Finds the worst case of each current, dissipation and temperature limit (i_out_max of outputs, p_diss_max and
+    t_j_max of components), for given ranges of load currents and output voltages:
+
+        wc = WorstCase(pdn)
+        wc.set_range(['X-Axis Stepper', 'Y-Axis Stepper'], 'i_in', 0, 0.8)
+        print(wc.run().report())
+
+    Instead of enumerating all 2^N corners, each limit is searched separately: parameters that cannot affect it are
+    ignored, and parameters with a known monotonic effect (e.g. a load current on the currents upstream of it) are set
+    to the worse end of their range. The remaining parameters are searched with branch-and-bound over their continuous
+    ranges: each branch is bounded with interval arithmetic, pruned if it cannot exceed the worst case that was found so
+    far, and otherwise split in halves, until the bounds meet the worst case within the tolerance.
+    """
+
+    PARAMETERS = ['i_in', 'v_out']
+
+
+    def __init__(self, network: "PowerComponent|CompiledNetwork"):
+        self.network = network if isinstance(network, CompiledNetwork) else network.compile()
+        self._ranges = {} # type: dict[tuple[str,int],tuple[float,float]]
+
+
+    def __repr__(self) -> str:
+        return f'<WorstCase({self.network.root.name}, {len(self._ranges)} ranges)>'
+
+
+    def set_range(self, elements: "PowerComponent|PowerInput|PowerOutput|str|list", parameter: str, minimum: float, maximum: float):
+        """
+        Sets the range of a <parameter> ('i_in' of loads, or 'v_out' of outputs) of the given <elements> (or of their
+        names); e.g. a load that is switched on and off has the current range 0...i_on.
+        """
+        if parameter not in WorstCase.PARAMETERS:
+            raise ValueError(f'Unknown parameter "{parameter}", expected one of {WorstCase.PARAMETERS}')
+        if minimum > maximum:
+            raise ValueError('The minimum must not be greater than the maximum')
+        if not isinstance(elements, (list, tuple)):
+            elements = [elements]
+        network = self.network
+        for element in elements:
+            if parameter == 'i_in':
+                index = network._load_columns([element])[0]
+            else:
+                if isinstance(element, str):
+                    element = network.find(element)
+                index = network.index(element._get_output() if isinstance(element, PowerComponent) else element)
+            self._ranges[(parameter, index)] = (minimum, maximum)
+
+
+    def run(self, max_nodes: int = 100_000, batch_size: int = 32, tolerance: float = 1e-6) -> WorstCaseResult:
+        """
+        Searches the worst case of every limit, up to a relative <tolerance> (absolute for values below 1). The search of
+        a limit stops after <max_nodes> nodes; then, its value is an upper bound. <batch_size> nodes are evaluated at once.
+        """
+        network = self.network
+        network._gather()
+        n_in = len(network.inputs)
+
+        # all parameters are stored in one vector: the input currents, followed by the output voltages
+        self._lo = np.concatenate([network.i_in_fixed, network.v_out])
+        self._hi = self._lo.copy()
+        self._variables = [] # type: list[tuple[str,int,int]]
+        for (parameter, index), (minimum, maximum) in self._ranges.items():
+            position = index if parameter == 'i_in' else n_in + index
+            self._lo[position], self._hi[position] = minimum, maximum
+            self._variables.append((parameter, index, position))
+        # the range of every calculated value, over all parameters
+        self._envelope = self._bounds(self._lo[np.newaxis,:], self._hi[np.newaxis,:])
+
+        limits = []
+        targets = [('i_out', o, network.i_out_max[o]) for o in range(len(network.outputs))] + \
+            [('p_diss', c, network.p_diss_max[c]) for c in range(len(network.components))] + \
+            [('t_j', c, network.t_j_max[c]) for c in range(len(network.components)) if not np.isnan(network.r_th_ja[c])]
+        for quantity, index, limit in targets:
+            if not np.isnan(limit):
+                limits.append(self._search(quantity, index, limit, max_nodes, batch_size, tolerance))
+        return WorstCaseResult(limits)
+
+
+    def _bounds(self, lo: "np.ndarray", hi: "np.ndarray") -> "tuple[NetworkState,NetworkState]":
+        n_in = len(self.network.inputs)
+        return _bounds(self.network, lo[..., :n_in], hi[..., :n_in], lo[..., n_in:], hi[..., n_in:])
+
+
+    def _evaluate(self, x: "np.ndarray", quantity: str, index: int) -> "np.ndarray":
+        n_in = len(self.network.inputs)
+        return getattr(self.network._solve(i_in_fixed=x[..., :n_in], v_out=x[..., n_in:]), quantity)[..., index]
+
+
+    def _chain(self, n: int) -> "tuple[list[int],list[int]]":
+        """Returns the outputs and components upstream of input <n>, up to the first one whose input current is fixed"""
+        network = self.network
+        outputs, components = [], []
+        while network.in_src[n] >= 0:
+            o = int(network.in_src[n])
+            c = int(network.out_comp[o])
+            outputs.append(o)
+            components.append(c)
+            if network.comp_kind[c] == KIND_GENERIC:
+                break
+            n = int(network.comp_in_ptr[c]) # converters have a single input
+        return outputs, components
+
+
+    def _source_range(self, n: int) -> "tuple[float,float]":
+        """Returns the range of the voltage that drives input <n>"""
+        network = self.network
+        if network.in_src[n] < 0:
+            return float(network.v_ext[n]), float(network.v_ext[n])
+        position = len(network.inputs) + int(network.in_src[n])
+        return float(self._lo[position]), float(self._hi[position])
+
+
+    def _monotonic(self, c: int, function: str) -> int:
+        """Returns +1 (-1) if the function of the efficiency curve of DC/DC converter <c> increases (decreases) over the range of its output current, else 0"""
+        network = self.network
+        k = int(network._converter_pos[c])
+        o = int(network.dcdc_out[k])
+        lo, hi = float(self._envelope[0].i_out[0, o]), float(self._envelope[1].i_out[0, o])
+        curve = network.dcdc_curves[k]
+        if lo < 0:
+            return 0
+        if curve is None:
+            return +1 if function == 'q' else 0 # without a curve, there is no loss
+        if isinstance(curve, EfficiencySurface):
+            return 0 # the efficiency also depends on the input voltage
+        # the function is monotonic between its potential extrema, so it is monotonic if the values at these points are
+        points, _ = _points(curve, function)
+        points = np.concatenate([[lo], points[(points > lo) & (points < hi)], [hi]])
+        if not np.all(curve(points) > 0):
+            return 0 # an extrapolated curve may reach zero efficiency, where the function has a pole
+        values = _CURVE_FUNCTIONS[function](curve, points)
+        if np.all(np.diff(values) >= 0):
+            return +1
+        if np.all(np.diff(values) <= 0):
+            return -1
+        return 0
+
+
+    def _direction(self, parameter: str, index: int, quantity: str, target: int) -> "int|None":
+        """
+        Returns how the quantity of the target depends on a parameter: +1 if it increases monotonically, -1 if it
+        decreases, 0 if that is not known, and None if the parameter does not affect it at all
+        """
+        network = self.network
+        if parameter == 'v_out':
+            c = int(network.out_comp[index])
+            sinks = network.in_comp[network.out_sink_index[network.out_sink_ptr[index]:network.out_sink_ptr[index+1]]]
+            if network.comp_kind[c] == KIND_GENERIC:
+                outputs, components = [index], [c]
+            else:
+                outputs, components = self._chain(int(network.comp_in_ptr[c]))
+                outputs, components = [index] + outputs, [c] + components
+            if quantity == 'i_out':
+                return 0 if target in outputs else None
+            return 0 if target in components or target in sinks else None
+
+        # a load current; its own component is a generic one, and its input current is not calculated
+        lo = self._lo[index]
+        own = int(network.in_comp[index])
+        outputs, components = self._chain(index)
+        if quantity != 'i_out' and target == own:
+            if lo < 0:
+                return 0
+            # across a series resistance, the input power (v_src - r_series*i_in)*i_in peaks at i_in = v_src/(2*r_series)
+            v_src = self._source_range(index)
+            r_series = network.r_series[index]
+            return +1 if r_series == 0 or v_src[1] <= 0 or v_src[0] - 2 * r_series * self._hi[index] >= 0 else 0
+        chain = outputs if quantity == 'i_out' else components
+        if target not in chain or lo < 0:
+            return None if target not in chain else 0
+        position = chain.index(target)
+        # the current of each output on the way increases with the load current if the input current of each
+        #   converter in between increases with its output current
+        for c in components[:position]:
+            if network.comp_kind[c] == KIND_DCDC and self._monotonic(c, 'q') != +1:
+                return 0
+        if quantity == 'i_out':
+            return +1
+        if self._envelope[0].i_out[0, outputs[position]] < 0:
+            return 0 # the power is the absolute value of the current
+        kind = network.comp_kind[target]
+        if kind == KIND_LDO:
+            k = int(network._converter_pos[target])
+            n = int(network.ldo_in[k])
+            v_in = np.abs([self._envelope[0].v_in[0, n], self._envelope[1].v_in[0, n]])
+            v_out = np.abs([self._lo[len(network.inputs) + network.ldo_out[k]], self._hi[len(network.inputs) + network.ldo_out[k]]])
+            # the dissipation is (|v_in| - |v_out|) * i_out + |v_in| * i_gnd, where |v_in| drops by r_series*i_in
+            i_in = max(abs(self._envelope[0].i_in[0, n]), abs(self._envelope[1].i_in[0, n]))
+            return +1 if v_in.min() - network.r_series[n] * i_in >= v_out.max() else 0
+        if kind == KIND_DCDC:
+            # the dissipation is |v_out| * h(i_out) + v_in * i_gnd, where v_in drops with the converted power
+            k = int(network._converter_pos[target])
+            if network.r_series[network.dcdc_in[k]] > 0 and network.dcdc_i_gnd[k] != 0:
+                return 0
+            return self._monotonic(target, 'h')
+        if network.comp_in_ptr[target] == network.comp_in_ptr[target+1]:
+            return -1 # a source, whose dissipation is the negative output power
+        return 0
+
+
+    def _search(self, quantity: str, index: int, limit: float, max_nodes: int, batch_size: int, tolerance: float) -> WorstCaseLimit:
+        network = self.network
+        element = network.outputs[index] if quantity == 'i_out' else network.components[index]
+        lo, hi = self._lo.copy(), self._hi.copy()
+        free, relevant = [], []
+        for parameter, parameter_index, position in self._variables:
+            direction = self._direction(parameter, parameter_index, quantity, index)
+            if direction is not None:
+                relevant.append((parameter, parameter_index, position))
+            if direction is None or direction < 0:
+                hi[position] = lo[position]
+            elif direction > 0:
+                lo[position] = hi[position]
+            else:
+                free.append(position)
+        free = np.array(free, dtype=np.int64)
+        if len(free) == 0:
+            return self._limit(element, quantity, limit, float(self._evaluate(lo, quantity, index)), lo, relevant, True, 1)
+
+        # best-first branch-and-bound: each node is a box of the free parameters; a node whose upper bound does not
+        #   exceed the worst case found so far is pruned
+        best_value, best_x = -np.inf, lo
+        heap, counter, nodes, exact = [], 0, 0, True
+        root_bound = getattr(self._bounds(lo[np.newaxis,:], hi[np.newaxis,:])[1], quantity)[0, index]
+        heap.append((-root_bound, counter, lo, hi))
+        width = hi[free] - lo[free]
+        while len(heap) > 0:
+            if -heap[0][0] <= best_value + tolerance * max(1, abs(best_value)):
+                break
+            if nodes >= max_nodes:
+                exact = False
+                break
+            batch = [heapq.heappop(heap) for _ in range(min(batch_size, len(heap)))]
+            nodes += len(batch)
+            node_lo = np.array([b[2] for b in batch])
+            node_hi = np.array([b[3] for b in batch])
+
+            # probe each free parameter at both ends of the node (with the others at the center), and the center itself
+            center = (node_lo + node_hi) / 2
+            probes = np.repeat(center[:, np.newaxis, :], 2 * len(free) + 1, axis=1)
+            for j, position in enumerate(free):
+                probes[:, 2*j, position], probes[:, 2*j+1, position] = node_lo[:, position], node_hi[:, position]
+            probed = self._evaluate(probes, quantity, index)
+            sensitivity, at_center = probed[:, :-1].reshape(len(batch), len(free), 2), probed[:, -1:]
+            # a good corner of each node: each free parameter at the end that is worse at the center of the node
+            corners = node_lo.copy()
+            corners[:, free] = np.where(sensitivity[..., 1] >= sensitivity[..., 0], node_hi[:, free], node_lo[:, free])
+            candidates = np.concatenate([corners[:, np.newaxis, :], probes], axis=1).reshape(-1, len(lo))
+            values = np.concatenate([self._evaluate(corners, quantity, index)[:, np.newaxis], probed], axis=1).ravel()
+            n = int(np.argmax(values))
+            if values[n] > best_value:
+                best_value, best_x = float(values[n]), candidates[n]
+
+            # split the parameter with the largest effect within the node (the difference between its ends, plus the
+            #   deviation of the center from their mean, i.e. a peak inside), or else the widest one, in halves
+            effect = np.abs(sensitivity[..., 1] - sensitivity[..., 0]) + 2 * np.abs(at_center - sensitivity.mean(axis=-1))
+            widest = (node_hi[:, free] - node_lo[:, free]) / width
+            split = np.where(effect.max(axis=1) > 0, np.argmax(effect, axis=1), np.argmax(widest, axis=1))
+            children_lo, children_hi = [], []
+            for b in range(len(batch)):
+                position = free[split[b]]
+                middle = center[b, position]
+                if not node_lo[b, position] < middle < node_hi[b, position]:
+                    continue # the node cannot be split any further, i.e. its center was evaluated exactly
+                for child_range in [(node_lo[b, position], middle), (middle, node_hi[b, position])]:
+                    child_lo, child_hi = node_lo[b].copy(), node_hi[b].copy()
+                    child_lo[position], child_hi[position] = child_range
+                    children_lo.append(child_lo)
+                    children_hi.append(child_hi)
+            if len(children_lo) > 0:
+                bounds = getattr(self._bounds(np.array(children_lo), np.array(children_hi))[1], quantity)[:, index]
+                for bound, child_lo, child_hi in zip(bounds, children_lo, children_hi):
+                    if bound > best_value + tolerance * max(1, abs(best_value)):
+                        counter += 1
+                        heapq.heappush(heap, (-bound, counter, child_lo, child_hi))
+
+        if not exact:
+            best_value = max(best_value, -heap[0][0])
+        return self._limit(element, quantity, limit, best_value, best_x, relevant, exact, nodes)
+
+
+    def _limit(self, element, quantity: str, limit: float, value: float, x: "np.ndarray", variables: "list[tuple[str,int,int]]",
+            exact: bool, nodes: int) -> WorstCaseLimit:
+        network = self.network
+        corner = {}
+        for parameter, index, position in variables:
+            key = network.inputs[index] if parameter == 'i_in' else network.outputs[index]
+            corner[(key, parameter)] = float(x[position])
+        return WorstCaseLimit(element, quantity, float(limit), float(value), corner, exact, nodes)
@@ -2,7 +2,7 @@
 from context import pdnviz
 
 
-from pdnviz import Load, Supply, LDO, PowerSpreadsheet, PowerComponent
+from pdnviz import Load, Supply, LDO, PowerSpreadsheet
 
 
 if __name__ == '__main__':
@@ -11,22 +11,24 @@ if __name__ == '__main__':
     #   enough power for both at once. By sweeping all combinations, we will find out which combinations work,
     #   and which don't.
 
-    for idx_xaxis, i_xaxis in enumerate([0, 0.8]):
-        for idx_yaxis, i_yaxis in enumerate([0, 0.8]):
-
-            # We will re-define the circuit several times. To avoid warnings about duplicate names, we first
-            #   clear the list of known names. We could instead just as well define the circuit once (outside
-            #   of the loop), and inside of the loop we could overwrite i_in of the two loads.
-            PowerComponent.clear_names()
-            
-            with Supply('Supply', +12, i_out_max=1.5) as supply:
-                supply.add_sink(Load('X-Axis Stepper', v_in_nom=+12, i_in=i_xaxis))
-                supply.add_sink(Load('Y-Axis Stepper', v_in_nom=+12, i_in=i_yaxis))
-                with supply.add_sink(LDO('LDO 3.3V', v_in_nom=+12, v_out=+3.3, i_out_max=0.1, p_diss_max=0.25)) as ldo5:
-                    ldo5.add_sink(Load('MCU', v_in_nom=+3.3, i_in=10e-3))
-                    ldo5.add_sink(Load('X-Axis Driver', v_in_nom=+3.3, i_in=5e-3))
-                    ldo5.add_sink(Load('Y-Axis Driver', v_in_nom=+3.3, i_in=5e-3))
-            
-            supply.check()
-            PowerSpreadsheet(supply).save(f'./output/varying_load_x{idx_xaxis}y{idx_yaxis}.xlsx')
-None
\ No newline at end of file
+    # The circuit is defined only once; the currents of the two steppers are varied further down.
+    with Supply('Supply', +12, i_out_max=1.5) as supply:
+        x_axis = supply.add_sink(Load('X-Axis Stepper', v_in_nom=+12))
+        y_axis = supply.add_sink(Load('Y-Axis Stepper', v_in_nom=+12))
+        with supply.add_sink(LDO('LDO 3.3V', v_in_nom=+12, v_out=+3.3, i_out_max=0.1, p_diss_max=0.25)) as ldo5:
+            ldo5.add_sink(Load('MCU', v_in_nom=+3.3, i_in=10e-3))
+            ldo5.add_sink(Load('X-Axis Driver', v_in_nom=+3.3, i_in=5e-3))
+            ldo5.add_sink(Load('Y-Axis Driver', v_in_nom=+3.3, i_in=5e-3))
+
+    # Compile the network, and evaluate all combinations in one go; each row of <currents> is one scenario,
+    #   each column is one of the given loads.
+    network = supply.compile()
+    currents = [[i_xaxis, i_yaxis] for i_xaxis in [0, 0.8] for i_yaxis in [0, 0.8]]
+    results = network.evaluate_scenarios([x_axis, y_axis], currents)
+    scenarios_ok = network.scenarios_ok(results)
+    for (i_xaxis, i_yaxis), p_supply, ok in zip(currents, results.comp_p_out[:, network.index(supply)], scenarios_ok):
+        print(f'X-Axis {i_xaxis} A, Y-Axis {i_yaxis} A: supply provides {p_supply:.3g} W, {"OK" if ok else "limits exceeded"}')
+
+    # All scenarios go into one workbook: a comparison sheet, plus the details of each scenario
+    names = [f'X {i_xaxis} A, Y {i_yaxis} A' for i_xaxis, i_yaxis in currents]
+    PowerSpreadsheet(network, scenarios=results, scenario_names=names).save('./output/varying_load.xlsx')
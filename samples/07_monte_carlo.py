@@ -0,0 +1,30 @@
+﻿# allow Python to find our code library
+from context import pdnviz
+
+
+from pdnviz import Load, Supply, LDO, DcDc, MonteCarlo, Tolerance
+
+
+if __name__ == '__main__':
+
+    # The loads of this circuit draw currents that vary from board to board, and the parts have tolerances. Instead of
+    #   checking a few hand-picked corners, we evaluate many random boards at once, and look at the statistics.
+    with Supply('Supply', +12, i_out_max=1.0) as supply:
+        with supply.add_sink(DcDc('Buck 5V', v_in_min=+9, v_in_nom=+12, v_in_max=+15, v_out=+5, eff_pct_over_i_out={0.01: 70, 0.1: 85, 1: 90},
+                i_out_max=1.0, p_diss_max=0.5, t_j_max=125, r_th_ja=60)) as buck:
+            buck.add_sink(Load('Radio', v_in_min=+4.5, v_in_nom=+5, v_in_max=+5.5, i_in=0.35))
+            with buck.add_sink(LDO('LDO 3.3V', v_in_min=+4.5, v_in_nom=+5, v_in_max=+5.5, v_out=+3.3, i_out_max=0.3, p_diss_max=0.5,
+                    t_j_max=125, r_th_ja=150)) as ldo:
+                ldo.add_sink(Load('MCU', v_in_min=+3.0, v_in_nom=+3.3, v_in_max=+3.6, i_in=0.12))
+                ldo.add_sink(Load('Sensors', v_in_min=+3.0, v_in_nom=+3.3, v_in_max=+3.6, i_in=0.08))
+
+    # All load currents vary by 15% (1 sigma), the output voltages by +/-3%, the efficiency of the DC/DC converter by
+    #   2%, and the thermal resistances by +/-20%.
+    mc = MonteCarlo(supply)
+    mc.vary(..., 'i_in', Tolerance.normal(0.15))
+    mc.vary(['Buck 5V', 'LDO 3.3V'], 'v_out', Tolerance.uniform(0.03))
+    mc.vary('Buck 5V', 'eff', Tolerance.normal(0.02))
+    mc.vary(..., 'r_th_ja', Tolerance.uniform(0.2))
+    result = mc.run(100_000, seed=1)
+    print(result.report())
+    print(f'Probability that the LDO exceeds any of its limits: {result.failure_probability("LDO 3.3V")*100:.3g}%')
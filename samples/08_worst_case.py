@@ -0,0 +1,30 @@
+﻿# allow Python to find our code library
+from context import pdnviz
+
+
+from pdnviz import Load, Supply, LDO, DcDc, WorstCase
+
+
+if __name__ == '__main__':
+
+    # A 3D printer board: the stepper drivers, the heater and the fan are switched on and off independently, so each of
+    #   them draws anything between zero and its full current. Checking all 2^5 combinations (and the tolerances of the
+    #   output voltages) by hand is tedious; the worst-case search finds the worst combination for each limit.
+    with Supply('Supply', +24, i_out_max=3.0) as supply:
+        supply.add_sink(Load('Heater', v_in_nom=+24, i_in=2.0))
+        with supply.add_sink(DcDc('Buck 12V', v_in_min=+20, v_in_nom=+24, v_in_max=+28, v_out=+12, eff_pct_over_i_out={0.01: 70, 0.1: 85, 1: 92},
+                i_out_max=1.5, p_diss_max=1.0, t_j_max=125, r_th_ja=50)) as buck:
+            buck.add_sink(Load('X-Axis Stepper', v_in_nom=+12, i_in=0.5))
+            buck.add_sink(Load('Y-Axis Stepper', v_in_nom=+12, i_in=0.5))
+            buck.add_sink(Load('Z-Axis Stepper', v_in_nom=+12, i_in=0.3))
+            buck.add_sink(Load('Fan', v_in_nom=+12, i_in=0.15))
+            with buck.add_sink(LDO('LDO 3.3V', v_in_nom=+12, v_out=+3.3, i_out_max=0.3, p_diss_max=1.0, t_j_max=125, r_th_ja=100)) as ldo:
+                ldo.add_sink(Load('MCU', v_in_min=+3.0, v_in_nom=+3.3, v_in_max=+3.6, i_in=0.1))
+
+    wc = WorstCase(supply)
+    for name, i_on in [('Heater', 2.0), ('X-Axis Stepper', 0.5), ('Y-Axis Stepper', 0.5), ('Z-Axis Stepper', 0.3), ('Fan', 0.15)]:
+        wc.set_range(name, 'i_in', 0, i_on)
+    wc.set_range('MCU', 'i_in', 0.05, 0.12)
+    wc.set_range('Buck 12V', 'v_out', 11.6, 12.4)
+    result = wc.run()
+    print(result.report())
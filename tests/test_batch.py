@@ -0,0 +1,63 @@
+import os, sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from pdnviz import Load, PowerConfig, Supply
+from pdnviz.batch import BatchJob, run_batch
+
+
+def _build():
+    with Supply('Supply', +5) as supply:
+        supply.add_sink(Load('Load', v_in_nom=+5, i_in=0.1))
+    return supply
+
+
+def _changes_config():
+    PowerConfig.t_ambient = 60
+    PowerConfig.cache_results = not PowerConfig.cache_results
+    return _build()
+
+
+def test_config_of_each_job(tmp_path):
+    # every job starts with the settings of the batch, whatever the previous job changed
+    seen = []
+    def records_config():
+        seen.append((PowerConfig.t_ambient, PowerConfig.cache_results))
+        return _build()
+    cache_results = PowerConfig.cache_results
+    jobs = [BatchJob('a', _changes_config, spreadsheet=False), BatchJob('b', records_config, spreadsheet=False)]
+    report = run_batch(jobs, str(tmp_path), processes=0, t_ambient=37)
+    assert report.failed == []
+    assert seen == [(37, cache_results)]
+    assert PowerConfig.t_ambient == 20 and PowerConfig.cache_results == cache_results
+
+
+def test_graph_of_scenarios(tmp_path, monkeypatch):
+    from pdnviz.graph import PowerGraph
+    monkeypatch.setattr(PowerGraph, 'save', lambda graph, path: open(path, 'w').write(graph.source))
+    job = BatchJob('scenarios', _build, loads=['Load'], currents=[[0.5], [0.9]], graph=True, graph_format='dot')
+    report = run_batch([job], str(tmp_path), processes=0)
+    assert report.failed == []
+    source = open(str(tmp_path / 'scenarios.dot')).read()
+    assert '100 mA' in source and '900 mA' not in source
+
+
+def _overloaded():
+    with Supply('Supply', +5, i_out_max=0.5) as supply:
+        supply.add_sink(Load('Load', v_in_nom=+5, i_in=1.0))
+    return supply
+
+
+def test_pool(tmp_path):
+    # the same results in worker processes as in the calling process
+    jobs = [BatchJob('ok', _build), BatchJob('overloaded', _overloaded), BatchJob('broken', 'pdnviz:missing'),
+        BatchJob('scenarios', _overloaded, loads=['Load'], currents=[[0.1], [2.0]], scenario_names=['Low', 'High'])]
+    pool = run_batch(jobs, str(tmp_path / 'pool'), processes=2)
+    serial = run_batch(jobs, str(tmp_path / 'serial'), processes=0)
+    for report, directory in [(pool, 'pool'), (serial, 'serial')]:
+        assert [r.name for r in report.failed] == ['broken']
+        assert [r.name for r in report.violated] == ['overloaded', 'scenarios']
+        assert report.results[3].warnings == ['High: limits exceeded']
+        assert all(os.path.isfile(file) and os.path.dirname(file) == str(tmp_path / directory)
+            for r in report.results for file in r.files)
+    assert [r.warnings for r in pool.results] == [r.warnings for r in serial.results]
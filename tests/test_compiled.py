@@ -0,0 +1,109 @@
+import os, sys, warnings
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from pytest import approx
+from pdnviz import DcDc, LDO, Load, Supply
+
+
+def _network():
+    with Supply('Supply', +12) as supply:
+        motor = supply.add_sink(Load('Motor', v_in_nom=+12, i_in=0.1))
+        with supply.add_sink(DcDc('DC/DC', v_in_nom=+12, v_out=+3.3, eff_pct_over_i_out={0.1: 80, 1: 90})) as dcdc:
+            dcdc.add_sink(Load('MCU', v_in_nom=+3.3, i_in=0.5))
+    return supply, motor
+
+
+def test_apply_and_restore_load_currents():
+    supply, motor = _network()
+    network = supply.compile()
+    scenarios = network.evaluate_scenarios([motor], [[0.5], [0.9]])
+    i_in = network.get_load_currents()
+    network.apply(scenarios, 1)
+    assert motor._get_input().i_in == 0.9
+    network.set_load_currents(i_in)
+    supply.update()
+    assert motor._get_input().i_in == 0.1
+    assert supply._get_output().i_out_calc == approx(0.1 + supply.find('DC/DC')._get_input().i_in)
+
+
+def _sample_01():
+    with Supply('Supply', +12, i_out_max=3) as supply:
+        supply.add_sink(Load('Motor', v_in_nom=+12, i_in=1))
+    return supply
+
+
+def _sample_06(i_xaxis: float = 0.8, i_yaxis: float = 0.8):
+    with Supply('Supply', +12, i_out_max=1.5) as supply:
+        supply.add_sink(Load('X-Axis Stepper', v_in_nom=+12, i_in=i_xaxis))
+        supply.add_sink(Load('Y-Axis Stepper', v_in_nom=+12, i_in=i_yaxis))
+        with supply.add_sink(LDO('LDO 3.3V', v_in_nom=+12, v_out=+3.3, i_out_max=0.1, p_diss_max=0.25)) as ldo5:
+            ldo5.add_sink(Load('MCU', v_in_nom=+3.3, i_in=10e-3))
+            ldo5.add_sink(Load('X-Axis Driver', v_in_nom=+3.3, i_in=5e-3))
+            ldo5.add_sink(Load('Y-Axis Driver', v_in_nom=+3.3, i_in=5e-3))
+    return supply
+
+
+def _results(root) -> dict:
+    """Returns the calculated values and warnings of all elements of the network, by name"""
+    topology = root.get_topology()
+    result = {}
+    for component in topology.components:
+        result[component.name] = ([getattr(component, a, None) for a in ['p_in_calc', 'p_out_calc', 'p_diss_calc', 't_j_calc', 'v_drop_calc', 'eff_pct_calc']],
+            component.get_warnings())
+    for input in topology.inputs:
+        result[input.full_name()] = ([input.v_in_actual, input.i_in, input.p_in_calc], input.get_warnings())
+    for output in topology.outputs:
+        result[output.full_name()] = ([output.i_out_calc, output.p_out_calc], output.get_warnings())
+    return result
+
+
+def _check(root, compiled: bool) -> dict:
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        if compiled:
+            root.compile().check()
+        else:
+            root.check()
+    return _results(root)
+
+
+def test_same_results_as_object_model():
+    for network in [_sample_01, _sample_06, lambda: _network()[0]]:
+        expected, actual = _check(network(), compiled=False), _check(network(), compiled=True)
+        assert list(actual) == list(expected)
+        for name, (values, warnings) in expected.items():
+            assert actual[name][0] == approx(values, nan_ok=True), name
+            assert actual[name][1] == warnings, name
+
+
+def test_scenarios_match_object_model():
+    currents = [[i_xaxis, i_yaxis] for i_xaxis in [0, 0.8] for i_yaxis in [0, 0.8]]
+    network = _sample_06().compile()
+    results = network.evaluate_scenarios(['X-Axis Stepper', 'Y-Axis Stepper'], currents)
+    scenarios_ok = network.scenarios_ok(results)
+    for scenario, (i_xaxis, i_yaxis) in enumerate(currents):
+        expected = _check(_sample_06(i_xaxis, i_yaxis), compiled=False)
+        state = results.scenario(scenario)
+        for c, component in enumerate(network.components):
+            p_in, _, p_diss = expected[component.name][0][:3]
+            assert [state.comp_p_in[c], state.p_diss[c]] == approx([p_in, p_diss]), component.name
+        for o, output in enumerate(network.outputs):
+            assert [state.i_out[o], state.p_out[o]] == approx(expected[output.full_name()][0]), output.full_name()
+        assert scenarios_ok[scenario] == all(len(warnings) == 0 for _, warnings in expected.values())
+    assert scenarios_ok.tolist() == [True, True, True, False]
+
+
+def test_incremental_update():
+    supply, motor = _network()
+    network = supply.compile()
+    network.update()
+    network.set_i_in(motor, 0.3)
+    network.set_i_in('MCU', 0.8)
+    network.set_v_out('DC/DC', +5.0)
+    network.update(incremental=True)
+    incremental = _results(supply)
+    # the object model reads the changed parameters, and evaluates everything
+    supply.update()
+    for name, (values, _) in _results(supply).items():
+        assert incremental[name][0] == approx(values, nan_ok=True), name
@@ -0,0 +1,47 @@
+import os, subprocess, sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from pdnviz import DcDc, Load, Supply, PowerComponent, PowerInput
+from pdnviz.instrumentation import Instrumentation
+from pdnviz.tracing import Tracer
+
+
+def _network():
+    with Supply('Supply', +12) as supply:
+        supply.add_sink(Load('Motor', v_in_nom=+12, i_in=0.1))
+        with supply.add_sink(DcDc('DC/DC', v_in_nom=+12, v_out=+3.3, eff_pct_over_i_out={0.1: 80, 1: 90})) as dcdc:
+            dcdc.add_sink(Load('MCU', v_in_nom=+3.3, i_in=0.5))
+    return supply
+
+
+def test_stop_in_any_order():
+    update, check, pre_update = PowerComponent.update, PowerComponent.check, PowerInput._pre_update
+    supply = _network()
+    instrumentation, tracer = Instrumentation(), Tracer()
+    instrumentation.start()
+    tracer.start()
+    instrumentation.stop()
+    # the tracer must still be active, and the instrumentation must not count anymore
+    supply.update()
+    assert instrumentation.total_updates == 0
+    assert any(event.phase == 'update' for event in tracer.events)
+    tracer.stop()
+    assert (PowerComponent.update, PowerComponent.check, PowerInput._pre_update) == (update, check, pre_update)
+    assert 'update' not in Supply.__dict__ or not hasattr(Supply.__dict__['update'], '__wrapped__')
+
+
+def test_spreadsheet_imported_when_used(tmp_path):
+    script = f'''if True:
+        import sys, pdnviz
+        from pdnviz.instrumentation import Instrumentation
+        with Instrumentation() as stats:
+            with pdnviz.Supply('Supply', +12) as supply:
+                supply.add_sink(pdnviz.Load('Load', v_in_nom=+12, i_in=0.1))
+            supply.check()
+            assert 'pdnviz.spreadsheet' not in sys.modules and 'openpyxl' not in sys.modules
+            pdnviz.PowerSpreadsheet(supply).save({str(tmp_path / 'pdn.xlsx')!r})
+        assert stats.phases['spreadsheet.drawn'].calls == 1 and stats.phases['spreadsheet.save'].calls == 1
+        assert stats.total_updates > 0 and len(stats.table_rows) > 0
+    '''
+    subprocess.run([sys.executable, '-c', script], check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
@@ -0,0 +1,58 @@
+import os, sys, gc
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import numpy as np
+from dataclasses import fields
+from pdnviz import DcDc, LDO, Load, Supply
+from pdnviz.efficiency import EfficiencyCurve
+from pdnviz.interval import _curve_points, _points
+
+
+I_IN = {'Heater': (0, 2.0), 'Stepper': (0, 0.5), 'Fan': (0, 0.15), 'MCU': (0.05, 0.12)}
+V_OUT = {'Supply': (23.5, 24.5), 'Buck 12V': (11.6, 12.4), 'LDO 3.3V': (3.2, 3.4)}
+
+
+def _network():
+    with Supply('Supply', +24) as supply:
+        supply.add_sink(Load('Heater', v_in_nom=+24, i_in=2.0))
+        with supply.add_sink(DcDc('Buck 12V', v_in_min=+20, v_in_nom=+24, v_in_max=+28, v_out=+12, eff_pct_over_i_out={0.01: 70, 0.1: 85, 1: 92},
+                r_th_ja=50), r_series=0.1) as buck:
+            buck.add_sink(Load('Stepper', v_in_nom=+12, i_in=0.5))
+            buck.add_sink(Load('Fan', v_in_nom=+12, i_in=0.15))
+            with buck.add_sink(LDO('LDO 3.3V', v_in_nom=+12, v_out=+3.3, r_th_ja=100)) as ldo:
+                ldo.add_sink(Load('MCU', v_in_nom=+3.3, i_in=0.1))
+    return supply
+
+
+def test_bounds_enclose_samples():
+    network = _network().compile()
+    state = network.evaluate_intervals(i_in=I_IN, v_out=V_OUT)
+    rng = np.random.default_rng(1)
+    samples = 10_000
+    i_in = np.repeat(network.i_in_fixed[np.newaxis,:], samples, axis=0)
+    for column, (lo, hi) in zip(network._load_columns(list(I_IN)), I_IN.values()):
+        i_in[:, column] = rng.uniform(lo, hi, samples)
+    # including the ends of the ranges
+    i_in[:2, network._load_columns(list(I_IN))] = [[lo for lo, _ in I_IN.values()], [hi for _, hi in I_IN.values()]]
+    v_out = np.repeat(network.v_out[np.newaxis,:], samples, axis=0)
+    for name, (lo, hi) in V_OUT.items():
+        o = network.index(network.find(name)._get_output())
+        v_out[:, o] = rng.uniform(lo, hi, samples)
+        v_out[:2, o] = lo, hi
+    values = network._solve(i_in_fixed=i_in, v_out=v_out)
+    for field in [f.name for f in fields(values)]:
+        value = getattr(values, field)
+        lo, hi = getattr(state.lo, field), getattr(state.hi, field)
+        valid = ~np.isnan(value)
+        assert np.all((value >= lo) | ~valid), field
+        assert np.all((value <= hi) | ~valid), field
+
+
+def test_curve_points_dropped_with_curve():
+    curve = EfficiencyCurve([0.2, 2], [81, 91])
+    _points(curve, 'h')
+    assert curve in _curve_points
+    del curve
+    gc.collect()
+    assert len([c for c in _curve_points if c.i_out.tolist() == [0.2, 2] and c.eff_pct.tolist() == [81, 91]]) == 0
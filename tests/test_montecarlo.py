@@ -0,0 +1,43 @@
+import os, sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from pytest import approx
+from pdnviz import LDO, Load, Supply
+from pdnviz.montecarlo import MonteCarlo, Tolerance
+
+
+def test_failure_probability_of_element():
+    with Supply('Supply', +5) as supply:
+        with supply.add_sink(LDO('LDO', v_in_min=+4, v_in_nom=+5, v_in_max=+6, v_out=+3.3, p_diss_max=0.17, t_j_max=37, r_th_ja=100)) as ldo:
+            ldo.add_sink(Load('Load', v_in_nom=+3.3, i_in=0.1))
+    mc = MonteCarlo(supply)
+    mc.vary('LDO', 'r_th_ja', Tolerance.uniform(0.2))
+    mc.vary('Load', 'i_in', Tolerance.uniform(0.1))
+    result = mc.run(10_000, seed=1, chunk_size=3_000)
+    failures = [p for element, _, p in result.failures() if element is ldo]
+    assert len(failures) == 2
+    # each limit fails in about half of the samples, but not in the same ones; the LDO fails if any of them does
+    assert result.failure_probability(ldo) > max(failures) + 0.1
+    assert result.failure_probability('LDO') == approx(result.failure_probability())
+    assert result.failure_probability('Load') == 0
+
+
+def test_distribution():
+    with Supply('Supply', +5) as supply:
+        with supply.add_sink(LDO('LDO', v_in_nom=+5, v_out=+3.3, p_diss_max=0.17, t_j_max=125, r_th_ja=100)) as ldo:
+            load = ldo.add_sink(Load('Load', v_in_nom=+3.3, i_in=0.1))
+    mc = MonteCarlo(supply)
+    # without variations, every sample is the nominal operating point of the object model
+    result = mc.run(100, seed=1)
+    supply.check()
+    c = mc.network.index(ldo)
+    assert result.p_diss[:, c] == approx(ldo.p_diss_calc, rel=1e-6)
+    assert result.t_j[:, c] == approx(ldo.t_j_calc, rel=1e-6)
+    assert result.failure_probability() == 0
+    # the dissipation of the LDO is proportional to the load current, which is uniformly distributed
+    mc.vary(load, 'i_in', Tolerance.uniform(0.1))
+    result = mc.run(100_000, seed=1)
+    assert result.percentile('p_diss', [0, 50, 100])[:, c] == approx([0.153, 0.17, 0.187], rel=1e-3)
+    assert result.failure_probability() == approx(0.5, abs=0.01)
+    assert result.failure_probability(ldo) == approx(result.failure_probability())
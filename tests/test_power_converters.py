@@ -0,0 +1,17 @@
+import os, sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from pytest import approx
+from pdnviz import DcDc, Load, Supply
+
+
+def test_efficiency_changed_in_place():
+    with Supply('Supply', +12) as supply:
+        dcdc = supply.add_sink(DcDc('DC/DC', v_in_nom=+12, v_out=+3.3, eff_pct_over_i_out={0.1: 80, 1: 90}))
+        dcdc.add_sink(Load('Load', v_in_nom=+3.3, i_in=1))
+    supply.check()
+    assert dcdc.p_diss_calc == approx(3.3/0.9 - 3.3)
+    dcdc.eff_pct_over_i_out[1] = 50
+    supply.check()
+    assert dcdc.p_diss_calc == approx(3.3)
@@ -0,0 +1,33 @@
+import os, sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from pytest import approx
+from pdnviz import DcDc, Load, Supply
+from pdnviz.snapshot import Snapshot
+
+
+def test_series_resistance(tmp_path):
+    with Supply('Supply', +12) as supply:
+        dcdc = supply.add_sink(DcDc('DC/DC', v_in_nom=+12, v_out=+3.3, eff_pct_over_i_out={0.1: 80, 1: 90}), r_series=0.2)
+        dcdc.add_sink(Load('Load', v_in_nom=+3.3, i_in=1))
+    supply.check()
+    path = str(tmp_path / 'network.pdnsnap')
+    Snapshot.save(supply, path)
+    restored = Snapshot(path).restore()
+    restored.check()
+    assert restored.find('DC/DC').input.r_series == 0.2
+    assert restored.find('DC/DC').input.v_in_actual == approx(dcdc.input.v_in_actual)
+
+
+def test_efficiency_surface(tmp_path):
+    with Supply('Supply', +12) as supply:
+        dcdc = supply.add_sink(DcDc('DC/DC', v_in_nom=+12, v_out=+3.3,
+            eff_pct_over_i_out_v_in={10: {0.1: 80, 1: 90}, 14: {0.1: 70, 1: 80}}))
+        dcdc.add_sink(Load('Load', v_in_nom=+3.3, i_in=1))
+    supply.check()
+    path = str(tmp_path / 'network.pdnsnap')
+    Snapshot.save(supply, path)
+    restored = Snapshot(path).restore()
+    restored.check()
+    assert restored.find('DC/DC').p_diss_calc == approx(dcdc.p_diss_calc)
@@ -0,0 +1,127 @@
+import os, sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import openpyxl
+from pdnviz import Load, Supply, LDO, PowerConfig, PowerSpreadsheet
+from pdnviz.cache import get_cache
+
+
+def _network():
+    with Supply('Supply', +12, i_out_max=1.5) as supply:
+        stepper = supply.add_sink(Load('Stepper', v_in_nom=+12))
+        with supply.add_sink(LDO('LDO 3.3V', group='Power Management Unit', v_in_nom=+12, v_out=+3.3, p_diss_max=0.25)) as ldo:
+            ldo.add_sink(Load('MCU', group='Power Management Unit', v_in_nom=+3.3, i_in=10e-3))
+    return supply, stepper
+
+
+def test_scenarios_of_component(tmp_path):
+    # the network is compiled by the spreadsheet, and was never evaluated before
+    supply, stepper = _network()
+    scenarios = supply.compile().evaluate_scenarios([stepper], [[0], [2]])
+    path = str(tmp_path / 'scenarios.xlsx')
+    PowerSpreadsheet(supply, scenarios=scenarios, scenario_names=['Idle', 'Full Load'], cache=False).save(path)
+    sheet = openpyxl.load_workbook(path)['Scenarios']
+    assert [sheet.cell(4,col).value for col in (2, 3)] == ['OK', 'FAIL']
+
+
+def test_long_and_similar_scenario_names(tmp_path):
+    supply, stepper = _network()
+    scenarios = supply.compile().evaluate_scenarios([stepper], [[0], [0.1], [0.2]])
+    names = ['Cold start at minimum load', 'a-b', 'a b']
+    path = str(tmp_path / 'grouped.xlsx')
+    PowerSpreadsheet(supply, grouped=True, scenarios=scenarios, scenario_names=names, cache=False).save(path)
+    workbook = openpyxl.load_workbook(path)
+    assert all(len(title) <= 31 for title in workbook.sheetnames)
+    tables = [name for sheet in workbook.worksheets for name in sheet.tables]
+    assert len(tables) == len(set(name.lower() for name in tables))
+
+
+def test_streaming_table_headers(tmp_path):
+    supply, _ = _network()
+    path = str(tmp_path / 'streaming.xlsx')
+    PowerSpreadsheet(supply, streaming=True, comments=False, cache=False).save(path)
+    for sheet in openpyxl.load_workbook(path).worksheets:
+        for table in sheet.tables.values():
+            header_row = sheet[table.ref.split(':')[0]].row
+            assert [column.name for column in table.tableColumns] == \
+                [cell.value for cell in sheet[header_row][:len(table.tableColumns)]]
+
+
+def test_cache_entry_evicted_before_save(tmp_path, monkeypatch):
+    monkeypatch.setattr(PowerConfig, 'cache_dir', str(tmp_path / 'cache'))
+    supply, _ = _network()
+    PowerSpreadsheet(supply, cache=True).save(str(tmp_path / 'first.xlsx'))
+    spreadsheet = PowerSpreadsheet(supply, cache=True)
+    get_cache('spreadsheets').clear()
+    path = str(tmp_path / 'second.xlsx')
+    spreadsheet.save(path)
+    assert open(path, 'rb').read() == open(str(tmp_path / 'first.xlsx'), 'rb').read()
+
+
+def test_streaming_saved_twice(tmp_path):
+    supply, _ = _network()
+    spreadsheet = PowerSpreadsheet(supply, streaming=True, cache=False)
+    path, moved = str(tmp_path / 'streaming.xlsx'), str(tmp_path / 'moved.xlsx')
+    spreadsheet.save(path)
+    spreadsheet.save(path)
+    os.replace(path, moved)
+    spreadsheet.save(path)
+    assert open(path, 'rb').read() == open(moved, 'rb').read()
+
+
+def test_cached_scenarios_saved_twice(tmp_path, monkeypatch):
+    monkeypatch.setattr(PowerConfig, 'cache_dir', str(tmp_path / 'cache'))
+    supply, stepper = _network()
+    supply.check()
+    network = supply.compile()
+    scenarios = network.evaluate_scenarios([stepper], [[0], [2]])
+    spreadsheet = PowerSpreadsheet(network, scenarios=scenarios, cache=True)
+    path = str(tmp_path / 'scenarios.xlsx')
+    spreadsheet.save(path)
+    spreadsheet.save(path)
+    assert stepper._get_input().i_in == 0
+    # the warnings of the objects changed, but the network and the scenarios are the same
+    cached = PowerSpreadsheet(network, scenarios=scenarios, cache=True)
+    assert cached._saved_bytes == open(path, 'rb').read()
+
+
+def test_scenario_rows_marked_by_their_own_limits(tmp_path):
+    with Supply('Supply', +12) as supply:
+        with supply.add_sink(LDO('LDO 3.3V', v_in_nom=+12, v_out=+3.3, p_diss_max=0.25, t_j_max=150, r_th_ja=50)) as ldo:
+            mcu = ldo.add_sink(Load('MCU', v_in_nom=+3.3, i_in=10e-3))
+    scenarios = supply.compile().evaluate_scenarios([mcu], [[0.01], [0.1]])
+    path = str(tmp_path / 'scenarios.xlsx')
+    PowerSpreadsheet(supply, scenarios=scenarios, cache=False).save(path)
+    sheet = openpyxl.load_workbook(path)['Scenarios']
+    rows = {sheet.cell(row,1).value: row for row in range(1, sheet.max_row+1)}
+    p_diss_row = rows['Power Dissipated'] + 1
+    t_j_row = rows['Junction Temperature'] + 1
+    # 0.87 W exceeds p_diss_max, but 63.5 °C does not exceed t_j_max
+    assert [sheet.cell(p_diss_row,col).style for col in (2, 3)] == ['Normal', 'PDN Warning']
+    assert [sheet.cell(t_j_row,col).style for col in (2, 3)] == ['Normal', 'Normal']
+
+
+def _contents(path: str) -> dict:
+    """Returns the values and styles of all cells, and the tables, of each sheet of a workbook"""
+    result = {}
+    for sheet in openpyxl.load_workbook(path).worksheets:
+        cells = [(cell.coordinate, cell.value, cell.style) for row in sheet.iter_rows() for cell in row if cell.value is not None]
+        tables = sorted((table.name, table.ref) for table in sheet.tables.values())
+        result[sheet.title] = (cells, tables)
+    return result
+
+
+def test_streaming_same_as_regular(tmp_path, monkeypatch):
+    # (the timestamps of the workbooks may differ)
+    monkeypatch.setattr(PowerSpreadsheet, '_add_timestamp', lambda self, sheet, row: None)
+    supply, stepper = _network()
+    scenarios = supply.compile().evaluate_scenarios([stepper], [[0], [2]])
+    for kwargs in [dict(), dict(grouped=True), dict(scenarios=scenarios, scenario_names=['Idle', 'Full Load'])]:
+        paths = [str(tmp_path / f'{streaming}.xlsx') for streaming in (False, True)]
+        for path, streaming in zip(paths, (False, True)):
+            PowerSpreadsheet(supply, streaming=streaming, comments=False, cache=False, title='PDN', **kwargs).save(path)
+        regular, streamed = _contents(paths[0]), _contents(paths[1])
+        assert list(streamed) == list(regular)
+        for title in regular:
+            assert streamed[title] == regular[title], title
@@ -0,0 +1,16 @@
+import os, sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from pdnviz import Load, Supply
+from pdnviz.timeseries import evaluate_profile_csv
+
+
+def test_csv_with_blank_chunk(tmp_path):
+    with Supply('Supply', +5) as supply:
+        supply.add_sink(Load('Load', v_in_nom=+5, i_in=0.1))
+    path = tmp_path / 'profile.csv'
+    # the second chunk consists of blank lines only
+    path.write_text('Load\n0.1\n0.2\n\n\n0.3\n0.4\n')
+    result = evaluate_profile_csv(supply, str(path), dt=1e-3, chunk_size=2)
+    assert result.samples == 4
@@ -0,0 +1,35 @@
+import os, sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from pdnviz import DcDc, Load, Supply
+
+
+def _network():
+    with Supply('Supply', +12) as supply:
+        supply.add_sink(Load('Motor', v_in_nom=+12, i_in=0.1, group='Drive'))
+        with supply.add_sink(DcDc('DC/DC', v_in_nom=+12, v_out=+3.3, eff_pct_over_i_out={0.1: 80, 1: 90})) as dcdc:
+            dcdc.add_sink(Load('MCU', v_in_nom=+3.3, i_in=0.5, group='Logic'))
+    return supply
+
+
+def test_rename_and_regroup():
+    supply = _network()
+    motor = supply.find('Motor')
+    motor.name, motor.group = 'Pump', 'Logic'
+    assert supply.find('Pump') is motor
+    with pytest.raises(KeyError):
+        supply.find('Motor')
+    assert set(supply.get_all_components('Logic')) == {motor, supply.find('MCU')}
+    assert 'Drive' not in supply.get_all_groups()
+    assert supply.find_input('Pump / 12 V In') is motor._get_input()
+    motor._get_input().name = 'Power'
+    assert supply.find_input('Pump / Power') is motor._get_input()
+
+
+def test_duplicate_after_rename():
+    supply = _network()
+    with pytest.warns(UserWarning, match='Duplicate name "MCU"'):
+        supply.find('Motor').name = 'MCU'
+        supply.get_topology()
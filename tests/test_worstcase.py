@@ -0,0 +1,59 @@
+import os, sys, itertools
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import numpy as np
+from pdnviz import DcDc, LDO, Load, Supply, WorstCase
+
+
+# the network and ranges of samples/08_worst_case.py
+RANGES = {'Heater': (0, 2.0), 'X-Axis Stepper': (0, 0.5), 'Y-Axis Stepper': (0, 0.5), 'Z-Axis Stepper': (0, 0.3),
+    'Fan': (0, 0.15), 'MCU': (0.05, 0.12)}
+V_OUT = (11.6, 12.4)
+
+
+def _network():
+    with Supply('Supply', +24, i_out_max=3.0) as supply:
+        supply.add_sink(Load('Heater', v_in_nom=+24, i_in=2.0))
+        with supply.add_sink(DcDc('Buck 12V', v_in_min=+20, v_in_nom=+24, v_in_max=+28, v_out=+12, eff_pct_over_i_out={0.01: 70, 0.1: 85, 1: 92},
+                i_out_max=1.5, p_diss_max=1.0, t_j_max=125, r_th_ja=50)) as buck:
+            buck.add_sink(Load('X-Axis Stepper', v_in_nom=+12, i_in=0.5))
+            buck.add_sink(Load('Y-Axis Stepper', v_in_nom=+12, i_in=0.5))
+            buck.add_sink(Load('Z-Axis Stepper', v_in_nom=+12, i_in=0.3))
+            buck.add_sink(Load('Fan', v_in_nom=+12, i_in=0.15))
+            with buck.add_sink(LDO('LDO 3.3V', v_in_nom=+12, v_out=+3.3, i_out_max=0.3, p_diss_max=1.0, t_j_max=125, r_th_ja=100)) as ldo:
+                ldo.add_sink(Load('MCU', v_in_min=+3.0, v_in_nom=+3.3, v_in_max=+3.6, i_in=0.1))
+    return supply
+
+
+def _brute_force(network, quantity, index, points):
+    """Returns the maximum of the quantity over every combination of the given points of each range"""
+    columns = network._load_columns(list(RANGES))
+    grid = np.array(list(itertools.product(*points)))
+    i_in = np.repeat(network.i_in_fixed[np.newaxis,:], len(grid), axis=0)
+    i_in[:, columns] = grid[:, :-1]
+    v_out = np.repeat(network.v_out[np.newaxis,:], len(grid), axis=0)
+    v_out[:, network.index(network.find('Buck 12V')._get_output())] = grid[:, -1]
+    return getattr(network._solve(i_in_fixed=i_in, v_out=v_out), quantity)[:, index].max()
+
+
+def test_worst_case_against_brute_force():
+    wc = WorstCase(_network())
+    for name, (minimum, maximum) in RANGES.items():
+        wc.set_range(name, 'i_in', minimum, maximum)
+    wc.set_range('Buck 12V', 'v_out', *V_OUT)
+    result = wc.run()
+    network = wc.network
+    corners = list(RANGES.values()) + [V_OUT]
+    # the steppers at 1/40 of their range, the other parameters at their ends
+    grid = [RANGES['Heater'], *[np.linspace(0, 0.5, 41)] * 2, RANGES['Z-Axis Stepper'], RANGES['Fan'], RANGES['MCU'], V_OUT]
+    for limit in result.limits:
+        assert limit.exact
+        index = network.index(limit.element)
+        assert limit.value >= _brute_force(network, limit.quantity, index, corners) - 1e-9
+        assert limit.value >= _brute_force(network, limit.quantity, index, grid) - 1e-6
+    # the loss of the buck converter peaks inside the ranges of the steppers, not in a corner
+    buck = next(l for l in result.limits if l.element.name == 'Buck 12V' and l.quantity == 'p_diss')
+    assert buck.value > _brute_force(network, 'p_diss', network.index(buck.element), corners) + 1e-4
+    bound = network.evaluate_intervals(i_in=RANGES, v_out={'Buck 12V': V_OUT}).range('Buck 12V', 'p_diss_calc')
+    assert buck.value <= bound[1]